@@ -5,7 +5,7 @@ from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from .models import MessageThread, Message
 from .serializers import MessageThreadSerializer, MessageSerializer
-from notifications.models import Notification
+from notifications.fanout import broadcast
 
 class MessageThreadViewSet(viewsets.ModelViewSet):
     serializer_class = MessageThreadSerializer
@@ -60,15 +60,14 @@ class MessageViewSet(viewsets.ModelViewSet):
         thread_id = self.request.data.get("thread")
         thread = get_object_or_404(MessageThread, id=thread_id, participants=self.request.user)
         msg = serializer.save(sender=self.request.user, thread=thread)
-        others = thread.participants.exclude(id=self.request.user.id)
-        for u in others:
-            Notification.objects.create(
-                user=u,
-                kind="message",
-                title="New message",
-                body=msg.body[:140],
-                url=f"/messages?thread={thread.id}",
-            )
+        broadcast(
+            thread.participants.values_list("id", flat=True),
+            kind="message",
+            title="New message",
+            body=msg.body[:140],
+            url=f"/messages?thread={thread.id}",
+            exclude=[self.request.user.id],
+        )
         thread.save()
 
     @action(detail=True, methods=["post"])
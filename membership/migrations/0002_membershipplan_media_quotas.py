@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:55
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("membership", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="membershipplan",
+            name="media_max_files_per_scrimmage",
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name="membershipplan",
+            name="media_max_total_bytes",
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
@@ -14,6 +14,10 @@ class MembershipPlan(models.Model):
     interval = models.CharField(max_length=10, choices=INTERVAL_CHOICES, default="month")
     is_active = models.BooleanField(default=True)
 
+    # Scrimmage media quotas for subscribers (blank = site default)
+    media_max_files_per_scrimmage = models.PositiveIntegerField(null=True, blank=True)
+    media_max_total_bytes = models.PositiveBigIntegerField(null=True, blank=True)
+
     def __str__(self):
         return f"{self.name} ({self.interval})"
 
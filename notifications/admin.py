@@ -1,8 +1,16 @@
 from django.contrib import admin
-from .models import Notification
+from .models import Notification, NotificationBroadcast
 
 @admin.register(Notification)
 class NotificationAdmin(admin.ModelAdmin):
     list_display = ("user", "kind", "title", "is_read", "created_at")
     list_filter = ("kind", "is_read")
     search_fields = ("title", "body")
+
+
+@admin.register(NotificationBroadcast)
+class NotificationBroadcastAdmin(admin.ModelAdmin):
+    list_display = ("id", "title", "kind", "status", "attempts", "available_at", "created_at")
+    list_filter = ("status", "kind")
+    search_fields = ("title",)
+    readonly_fields = ("user_ids", "last_error", "claimed_at", "processed_at", "created_at")
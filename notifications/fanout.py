@@ -0,0 +1,146 @@
+# notifications/fanout.py
+"""
+Notification fan-out.
+
+``broadcast`` sends the same notification to many users:
+
+- recipients are resolved with one query (pass a queryset of user ids,
+  e.g. ``members.values_list("user_id", flat=True)``)
+- rows are written with ``bulk_create`` in chunks of
+  NOTIFICATION_FANOUT_CHUNK_SIZE (default 1000)
+- by default the fan-out is queued: a NotificationBroadcast row is
+  written in the surrounding transaction, so it commits (or rolls back)
+  with the change that caused it and the request never waits for the
+  INSERTs. Set NOTIFICATION_FANOUT_BACKGROUND = False to deliver inline.
+
+Queued broadcasts are delivered right after commit on a background
+thread, as a best effort. The ``process_notification_broadcasts`` worker
+delivers whatever that missed (a failure, a restarted or recycled
+process):
+
+- each broadcast is delivered in one transaction, so a retry never
+  notifies anyone twice
+- failures are retried with exponential backoff and marked "failed"
+  after NOTIFICATION_FANOUT_MAX_ATTEMPTS (default 5)
+- broadcasts claimed by a process that died are reclaimed after the
+  claim timeout (see workqueue/queue.py)
+"""
+import atexit
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import Model
+
+from notifications.models import Notification, NotificationBroadcast
+from workqueue import WorkQueue
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def chunk_size():
+    return getattr(settings, "NOTIFICATION_FANOUT_CHUNK_SIZE", 1000)
+
+
+def max_attempts():
+    return getattr(settings, "NOTIFICATION_FANOUT_MAX_ATTEMPTS", 5)
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, "NOTIFICATION_FANOUT_WORKERS", 2),
+            thread_name_prefix="notification-fanout",
+        )
+        # Let deliveries in flight finish when the process exits
+        atexit.register(_executor.shutdown, wait=True)
+    return _executor
+
+
+def _user_id(recipient):
+    return recipient.pk if isinstance(recipient, Model) else recipient
+
+
+def resolve_recipients(recipients, exclude=()):
+    """Distinct user ids of ``recipients`` minus ``exclude``, in order."""
+    excluded = {_user_id(user) for user in exclude}
+    user_ids = []
+    seen = set(excluded)
+    for recipient in recipients:  # the one recipient query runs here
+        user_id = _user_id(recipient)
+        if user_id is not None and user_id not in seen:
+            seen.add(user_id)
+            user_ids.append(user_id)
+    return user_ids
+
+
+def _write(user_ids, title, body, url, kind):
+    size = chunk_size()
+    for start in range(0, len(user_ids), size):
+        Notification.objects.bulk_create(
+            [
+                Notification(user_id=user_id, kind=kind, title=title, body=body, url=url or "")
+                for user_id in user_ids[start:start + size]
+            ]
+        )
+    return len(user_ids)
+
+
+def deliver(recipients, title, body="", url="", kind="system", exclude=()):
+    """Write the notifications now. Returns how many were created."""
+    return _write(resolve_recipients(recipients, exclude), title, body, url, kind)
+
+
+def broadcast(recipients, title, body="", url="", kind="system", exclude=(), background=None):
+    """
+    Notify every user in ``recipients`` (user ids, users, or a queryset of
+    either), skipping ``exclude``. Queued unless ``background=False``;
+    returns the count only when run inline.
+    """
+    if background is None:
+        background = getattr(settings, "NOTIFICATION_FANOUT_BACKGROUND", True)
+    if not background:
+        return deliver(recipients, title, body, url, kind, exclude)
+    user_ids = resolve_recipients(recipients, exclude)
+    if not user_ids:
+        return None
+    job = NotificationBroadcast.objects.create(
+        kind=kind, title=title, body=body, url=url or "", user_ids=user_ids
+    )
+    transaction.on_commit(lambda: _get_executor().submit(_run, job.pk))
+    return None
+
+
+def _run(job_id):
+    try:
+        process_pending(ids=[job_id])
+    except Exception:
+        # Left for the worker to reclaim
+        logger.exception("Notification broadcast %s failed", job_id)
+    finally:
+        close_old_connections()
+
+
+# ============================================================
+# ✅ Worker
+# ============================================================
+
+queue = WorkQueue(NotificationBroadcast, max_attempts=max_attempts, label="Notification broadcast")
+
+
+def _deliver(job):
+    _write(job.user_ids, job.title, job.body, job.url, job.kind)
+
+
+def process_pending(limit=50, ids=None):
+    """Deliver one batch of due broadcasts. Returns {"done", "retry", "failed"} counts."""
+    return queue.process(limit, _deliver, pks=ids)
+
+
+def purge_done(older_than=timedelta(days=7)):
+    return queue.purge_done(older_than)
@@ -0,0 +1,29 @@
+from datetime import timedelta
+
+from notifications.fanout import process_pending, purge_done
+from workqueue import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = (
+        "Deliver queued notification broadcasts that were not delivered right after commit, "
+        "retrying failures. Runs until interrupted unless --once is given."
+    )
+    summary = "Delivered {done}, retrying {retry}, failed {failed}."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            default=None,
+            help="First delete delivered broadcasts older than this many days.",
+        )
+
+    def prepare(self, options):
+        if options["purge_days"] is not None:
+            purged = purge_done(timedelta(days=options["purge_days"]))
+            self.stdout.write(f"Purged {purged} delivered broadcasts.")
+
+    def process(self, batch_size):
+        return process_pending(limit=batch_size)
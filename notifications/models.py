@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
@@ -24,3 +25,33 @@ class Notification(models.Model):
 
     def __str__(self):
         return f"[{self.kind}] {self.title}"
+
+
+class NotificationBroadcast(models.Model):
+    """A queued fan-out (see fanout.py); delivered by the broadcast worker."""
+
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    ]
+    kind = models.CharField(max_length=32, default="system")
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    url = models.CharField(max_length=255, blank=True)
+    user_ids = models.JSONField(default=list)  # resolved recipients, exclusions applied
+    status = models.CharField(max_length=12, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["status", "available_at"], name="broadcast_status_due_idx")]
+
+    def __str__(self):
+        return f"#{self.pk} {self.title} ({len(self.user_ids)} recipients) [{self.status}]"
@@ -1,3 +1,90 @@
-from django.test import TestCase
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from notifications import fanout
+from notifications.fanout import broadcast, process_pending
+from notifications.models import Notification, NotificationBroadcast
+
+User = get_user_model()
+
+
+class BroadcastTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(email=f"fan{i}@example.com", password="pass123") for i in range(7)]
+
+    @override_settings(NOTIFICATION_FANOUT_CHUNK_SIZE=3)
+    def test_one_recipient_query_and_chunked_inserts(self):
+        recipients = User.objects.filter(email__startswith="fan").values_list("id", flat=True)
+        # 1 SELECT for the recipients + ceil(6 / 3) INSERTs
+        with self.assertNumQueries(3):
+            sent = broadcast(recipients, title="Hi", kind="system", exclude=[self.users[0]], background=False)
+        self.assertEqual(sent, 6)
+        self.assertEqual(
+            set(Notification.objects.values_list("user_id", flat=True)), {u.pk for u in self.users[1:]}
+        )
+
+    def test_duplicates_are_notified_once(self):
+        ids = [u.pk for u in self.users[:2]] * 3
+        self.assertEqual(broadcast(ids, title="Hi", background=False), 2)
+
+    def test_background_delivery_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.assertIsNone(broadcast([u.pk for u in self.users], title="Later"))
+        self.assertEqual(len(callbacks), 1)
+        self.assertFalse(Notification.objects.exists())
+
+    def test_queued_broadcast_is_durable_and_retried(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            broadcast([u.pk for u in self.users], title="Queued", exclude=[self.users[0]])
+        job = NotificationBroadcast.objects.get()
+        self.assertEqual(job.user_ids, [u.pk for u in self.users[1:]])
+
+        # A failed delivery writes nothing and is retried later
+        with mock.patch.object(Notification.objects, "bulk_create", side_effect=RuntimeError("db down")):
+            self.assertEqual(process_pending(), {"done": 0, "retry": 1, "failed": 0})
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("pending", 1))
+        self.assertIn("db down", job.last_error)
+        self.assertFalse(Notification.objects.exists())
+
+        NotificationBroadcast.objects.filter(pk=job.pk).update(available_at=timezone.now())
+        self.assertEqual(process_pending(), {"done": 1, "retry": 0, "failed": 0})
+        self.assertEqual(process_pending(), {"done": 0, "retry": 0, "failed": 0})
+        self.assertEqual(Notification.objects.filter(title="Queued").count(), 6)
+
+    def test_rolled_back_broadcast_is_not_queued(self):
+        try:
+            with transaction.atomic():
+                broadcast([u.pk for u in self.users], title="Never")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+        self.assertFalse(NotificationBroadcast.objects.exists())
+
+    @override_settings(NOTIFICATION_FANOUT_MAX_ATTEMPTS=1)
+    def test_broadcast_is_marked_failed_after_max_attempts(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            broadcast([self.users[0].pk], title="Doomed")
+        with mock.patch.object(Notification.objects, "bulk_create", side_effect=RuntimeError("boom")):
+            self.assertEqual(process_pending(), {"done": 0, "retry": 0, "failed": 1})
+        self.assertEqual(NotificationBroadcast.objects.get().status, "failed")
+
+    def test_reclaimed_broadcast_result_is_discarded(self):
+        with self.captureOnCommitCallbacks(execute=False):
+            broadcast([self.users[0].pk], title="Slow")
+        real_write = fanout._write
+
+        def stalled_write(*args):
+            real_write(*args)
+            # Our claim timed out meanwhile and another worker took the job
+            NotificationBroadcast.objects.update(claimed_at=timezone.now() + timedelta(seconds=1))
+
+        with mock.patch.object(fanout, "_write", side_effect=stalled_write):
+            self.assertEqual(process_pending(), {"done": 0, "retry": 0, "failed": 0})
+        self.assertFalse(Notification.objects.filter(title="Slow").exists())
+        self.assertEqual(NotificationBroadcast.objects.get().status, "processing")
@@ -1,8 +1,11 @@
 from django.contrib import admin
 from .models import (
     CoinPurchase,
+    CreditBalanceSnapshot,
+    CreditLedgerEntry,
     CreditWallet,
     CreditWalletTransaction,  # 🟩 Added new model
+    WebhookEvent,
 )
 
 
@@ -37,3 +40,50 @@ class CreditWalletTransactionAdmin(admin.ModelAdmin):
     search_fields = ("user__email", "reference")
     readonly_fields = ("created_at",)
     ordering = ("-created_at",)
+
+
+# ============================================================
+# ✅ Credit Ledger Admin (append-only: read-only in admin)
+# ============================================================
+@admin.register(CreditLedgerEntry)
+class CreditLedgerEntryAdmin(admin.ModelAdmin):
+    list_display = ("wallet", "amount", "balance_after", "source", "reason", "created_at")
+    list_filter = ("source",)
+    search_fields = ("wallet__user__email", "reason")
+    ordering = ("-id",)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
+
+
+@admin.register(CreditBalanceSnapshot)
+class CreditBalanceSnapshotAdmin(admin.ModelAdmin):
+    list_display = ("wallet", "entry", "balance", "total_earned", "total_spent", "created_at")
+    search_fields = ("wallet__user__email",)
+    readonly_fields = ("created_at",)
+    ordering = ("-id",)
+
+
+# ============================================================
+# ✅ Webhook Event Admin (queue + dead letters)
+# ============================================================
+@admin.register(WebhookEvent)
+class WebhookEventAdmin(admin.ModelAdmin):
+    list_display = ("provider", "event_type", "event_id", "status", "attempts", "received_at", "processed_at")
+    list_filter = ("provider", "status", "event_type")
+    search_fields = ("event_id", "last_error")
+    readonly_fields = ("payload", "received_at", "processed_at", "claimed_at", "last_error")
+    ordering = ("-id",)
+    actions = ["replay_events"]
+
+    @admin.action(description="Replay selected dead/pending events")
+    def replay_events(self, request, queryset):
+        from .webhooks import replay
+
+        self.message_user(request, f"Queued {replay(queryset)} events.")
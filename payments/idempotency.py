@@ -0,0 +1,116 @@
+# payments/idempotency.py
+"""
+``Idempotency-Key`` support for money-moving endpoints.
+
+Decorate a DRF view method (below ``@action``) with ``@idempotent``.
+When an authenticated request carries an ``Idempotency-Key`` header:
+
+- the key row is inserted in the same transaction as the view's work, so
+  a concurrent duplicate blocks on the unique (user, key) index until the
+  first request commits, then replays its response instead of charging
+  twice
+- a repeat with the same method, path and payload gets the stored
+  response back, marked with ``Idempotent-Replayed: true``
+- a repeat with a different payload is rejected with 422
+- 5xx responses and exceptions are not stored, so the client may retry
+
+Keys expire after IDEMPOTENCY_KEY_TTL seconds (default 24 hours);
+``purge_expired_keys`` (the ``purge_idempotency_keys`` command) deletes
+them in batches.
+"""
+import hashlib
+import json
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+def key_ttl():
+    return timedelta(seconds=getattr(settings, "IDEMPOTENCY_KEY_TTL", 24 * 60 * 60))
+
+
+def fingerprint(request):
+    data = request.data
+    if hasattr(data, "lists"):  # QueryDict (form / multipart)
+        data = {key: values for key, values in data.lists()}
+    payload = json.dumps(data, sort_keys=True, cls=JSONEncoder)
+    raw = f"{request.method}\n{request.path}\n{payload}".encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+def _replay(record):
+    response = Response(record.response_body, status=record.response_status)
+    response["Idempotent-Replayed"] = "true"
+    return response
+
+
+def idempotent(view):
+    @wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.headers.get(HEADER)
+        if not key or not request.user.is_authenticated:
+            return view(self, request, *args, **kwargs)
+        if len(key) > MAX_KEY_LENGTH:
+            return Response(
+                {"detail": f"{HEADER} must be at most {MAX_KEY_LENGTH} characters."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        digest = fingerprint(request)
+        now = timezone.now()
+        with transaction.atomic():
+            IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__lte=now).delete()
+            try:
+                with transaction.atomic():
+                    record = IdempotencyKey.objects.create(
+                        user=request.user, key=key, fingerprint=digest, expires_at=now + key_ttl()
+                    )
+            except IntegrityError:
+                # Duplicate: the first request has committed (we waited on its row)
+                record = IdempotencyKey.objects.filter(user=request.user, key=key).first()
+                if record is None or record.response_status is None:
+                    return Response(
+                        {"detail": "A request with this Idempotency-Key is still being processed."},
+                        status=status.HTTP_409_CONFLICT,
+                    )
+                if record.fingerprint != digest:
+                    return Response(
+                        {"detail": f"{HEADER} was already used with a different request."},
+                        status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                    )
+                return _replay(record)
+
+            response = view(self, request, *args, **kwargs)
+            if response.status_code >= 500:
+                record.delete()
+            else:
+                record.response_status = response.status_code
+                record.response_body = response.data
+                record.save(update_fields=["response_status", "response_body"])
+        return response
+
+    return wrapper
+
+
+def purge_expired_keys(batch_size=1000):
+    """Delete expired keys in batches. Returns how many were removed."""
+    removed = 0
+    now = timezone.now()
+    while True:
+        ids = list(
+            IdempotencyKey.objects.filter(expires_at__lte=now).values_list("pk", flat=True)[:batch_size]
+        )
+        if not ids:
+            return removed
+        removed += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
@@ -0,0 +1,207 @@
+# payments/ledger.py
+"""
+Credit ledger.
+
+Every wallet balance movement is:
+
+- one conditional UPDATE of the CreditWallet row with F() arithmetic
+  (debits only match while ``balance >= amount``, so an overdraft updates
+  nothing and raises InsufficientCredits; concurrent movements never
+  overwrite each other)
+- one CreditTransaction (the user-facing history row) and one append-only
+  CreditLedgerEntry carrying the signed amount and the balance after it
+
+Both are written in the same transaction as the UPDATE, which holds the
+wallet's row lock, so ``balance_after`` is exact and ordered per wallet.
+Entry ids (and created_at, stamped under the lock) follow that order;
+ledger reads order by id, so the latest ``balance_after`` is always the
+last movement applied.
+
+``take_snapshots`` (the ``snapshot_credit_balances`` command) records each
+wallet's balance and totals periodically. Statements start from the
+nearest entry's ``balance_after``, and verification only re-sums the
+entries written since the last snapshot.
+"""
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import BigIntegerField, F, Max, OuterRef, Q, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import CreditBalanceSnapshot, CreditLedgerEntry, CreditTransaction, CreditWallet
+
+CENT = Decimal("0.01")
+
+
+class InsufficientCredits(ValueError):
+    """The wallet balance does not cover the debit."""
+
+
+def _amount(amount):
+    amount = Decimal(str(amount)).quantize(CENT)
+    if amount <= 0:
+        raise ValueError("Amount must be positive.")
+    return amount
+
+
+def _post(wallet, amount, source, reason):
+    """Apply a signed movement and append its entry. Returns the entry."""
+    wallets = CreditWallet.objects.filter(pk=wallet.pk)
+    with transaction.atomic():
+        if amount > 0:
+            updated = wallets.update(
+                balance=F("balance") + amount, total_earned=F("total_earned") + amount, last_updated=timezone.now()
+            )
+        else:
+            updated = wallets.filter(balance__gte=-amount).update(
+                balance=F("balance") + amount, total_spent=F("total_spent") - amount, last_updated=timezone.now()
+            )
+        if not updated:
+            raise InsufficientCredits("Insufficient credits.")
+        # The UPDATE holds the row lock until commit: this read is our own
+        # result, and a timestamp taken now follows the order movements apply in
+        now = timezone.now()
+        balance, earned, spent, last_updated = wallets.values_list(
+            "balance", "total_earned", "total_spent", "last_updated"
+        ).get()
+        txn = CreditTransaction.objects.create(
+            user_id=wallet.user_id,
+            amount=abs(amount),
+            transaction_type="credit" if amount > 0 else "debit",
+            source=source[:100],
+            balance_after=balance,
+        )
+        entry = CreditLedgerEntry.objects.create(
+            wallet_id=wallet.pk,
+            transaction=txn,
+            amount=amount,
+            balance_after=balance,
+            source=source[:100],
+            reason=reason[:255],
+            created_at=now,
+        )
+    wallet.balance, wallet.total_earned, wallet.total_spent = balance, earned, spent
+    wallet.last_updated = last_updated
+    return entry
+
+
+def deposit(wallet, amount, source="topup", reason=""):
+    """Credit ``amount`` to the wallet."""
+    return _post(wallet, _amount(amount), source, reason)
+
+
+def withdraw(wallet, amount, source="withdrawal", reason=""):
+    """Debit ``amount``; raises InsufficientCredits instead of overdrawing."""
+    return _post(wallet, -_amount(amount), source, reason)
+
+
+# ============================================================
+# ✅ Statements
+# ============================================================
+
+def balance_at(wallet, when):
+    """Balance right after the last movement at or before ``when``."""
+    balance = (
+        CreditLedgerEntry.objects.filter(wallet=wallet, created_at__lte=when)
+        .order_by("-id")
+        .values_list("balance_after", flat=True)
+        .first()
+    )
+    return balance if balance is not None else Decimal("0.00")
+
+
+def statement(wallet, start, end):
+    """Opening/closing balance and the entries in [start, end)."""
+    entries = list(
+        CreditLedgerEntry.objects.filter(wallet=wallet, created_at__gte=start, created_at__lt=end)
+        .select_related("transaction")
+        .order_by("id")
+    )
+    opening = (
+        CreditLedgerEntry.objects.filter(wallet=wallet, created_at__lt=start)
+        .order_by("-id")
+        .values_list("balance_after", flat=True)
+        .first()
+    ) or Decimal("0.00")
+    return {
+        "opening_balance": opening,
+        "closing_balance": entries[-1].balance_after if entries else opening,
+        "credits": sum((e.amount for e in entries if e.amount > 0), Decimal("0.00")),
+        "debits": sum((-e.amount for e in entries if e.amount < 0), Decimal("0.00")),
+        "entries": entries,
+    }
+
+
+# ============================================================
+# ✅ Snapshots
+# ============================================================
+
+def _changes_since(wallet_id, entry_id):
+    """(sum of credits, sum of debits) of the entries after ``entry_id``."""
+    totals = CreditLedgerEntry.objects.filter(wallet_id=wallet_id, id__gt=entry_id).aggregate(
+        credits=Coalesce(Sum("amount", filter=Q(amount__gt=0)), Decimal("0")),
+        debits=Coalesce(Sum("amount", filter=Q(amount__lt=0)), Decimal("0")),
+    )
+    return totals["credits"], -totals["debits"]
+
+
+def verify_wallet(wallet):
+    """
+    Check the wallet row against its last snapshot plus the entries since.
+    Returns a list of mismatch descriptions (empty when consistent).
+    """
+    snapshot = CreditBalanceSnapshot.objects.filter(wallet=wallet).order_by("-entry_id").first()
+    base = (
+        (snapshot.balance, snapshot.total_earned, snapshot.total_spent, snapshot.entry_id)
+        if snapshot
+        else (Decimal("0"), Decimal("0"), Decimal("0"), 0)
+    )
+    credits, debits = _changes_since(wallet.pk, base[3])
+    wallet.refresh_from_db(fields=["balance", "total_earned", "total_spent"])
+    expected = {
+        "balance": base[0] + credits - debits,
+        "total_earned": base[1] + credits,
+        "total_spent": base[2] + debits,
+    }
+    return [
+        f"{field}: ledger {value} != wallet {getattr(wallet, field)}"
+        for field, value in expected.items()
+        if getattr(wallet, field) != value
+    ]
+
+
+def take_snapshots(batch_size=500):
+    """
+    Snapshot every wallet with entries newer than its last snapshot.
+    Returns (snapshots written, {wallet_id: mismatches}) — a wallet whose
+    row disagrees with its ledger is reported and not snapshotted.
+    """
+    last_snapshot = Subquery(
+        CreditBalanceSnapshot.objects.filter(wallet=OuterRef("pk")).order_by("-entry_id").values("entry_id")[:1],
+        output_field=BigIntegerField(),
+    )
+    wallet_ids = (
+        CreditWallet.objects.annotate(snap=Coalesce(last_snapshot, 0), last=Max("ledger_entries__id"))
+        .filter(last__gt=F("snap"))
+        .values_list("pk", flat=True)
+    )
+    written, problems = 0, {}
+    for wallet in CreditWallet.objects.filter(pk__in=list(wallet_ids)).iterator(chunk_size=batch_size):
+        with transaction.atomic():
+            # Lock the row: no movement lands between the check and the snapshot
+            wallet = CreditWallet.objects.select_for_update().get(pk=wallet.pk)
+            mismatches = verify_wallet(wallet)
+            if mismatches:
+                problems[wallet.pk] = mismatches
+                continue
+            last = CreditLedgerEntry.objects.filter(wallet=wallet).order_by("-id").first()
+            CreditBalanceSnapshot.objects.create(
+                wallet=wallet,
+                entry=last,
+                balance=wallet.balance,
+                total_earned=wallet.total_earned,
+                total_spent=wallet.total_spent,
+            )
+            written += 1
+    return written, problems
@@ -0,0 +1,60 @@
+# payments/management/commands/benchmark_paypal_webhooks.py
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory
+
+from payments.views_webhooks_paypal import PayPalWebhookView
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver signed PayPal webhooks to the webhook view against an offline fake "
+        "PayPal and compare local signature verification with the remote API. "
+        "All stored events are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=200)
+
+    def handle(self, *args, **options):
+        try:
+            from tests.paypal_fake import FakePayPal
+        except ImportError as exc:  # a source checkout with cryptography installed is needed
+            raise CommandError(f"The offline PayPal fake is unavailable: {exc}")
+
+        view = PayPalWebhookView.as_view()
+        factory = APIRequestFactory()
+        with FakePayPal() as paypal:
+            for mode in ("local", "remote"):
+                deliveries = []
+                for i in range(options["events"]):
+                    body = json.dumps(
+                        {"id": f"WH-BENCH-{mode}-{i}", "event_type": "PAYMENT.SALE.DENIED", "resource": {}}
+                    ).encode()
+                    headers = {
+                        "HTTP_" + name.replace("-", "_"): value for name, value in paypal.sign(body).items()
+                    }
+                    deliveries.append((body, headers))
+
+                fetches, checks = paypal.cert_fetches, paypal.remote_checks
+                with override_settings(**paypal.settings(), PAYPAL_WEBHOOK_VERIFICATION=mode), transaction.atomic():
+                    started = time.perf_counter()
+                    for body, headers in deliveries:
+                        request = factory.post("/", body, content_type="application/json", **headers)
+                        response = view(request)
+                        if response.status_code != 200:
+                            self.stderr.write(f"{mode}: unexpected {response.status_code} {response.data}")
+                            break
+                    elapsed = time.perf_counter() - started
+                    transaction.set_rollback(True)
+
+                self.stdout.write(
+                    f"{mode:>6}: {len(deliveries)} webhooks in {elapsed:.2f}s "
+                    f"({len(deliveries) / elapsed:.0f}/s), cert fetches {paypal.cert_fetches - fetches}, "
+                    f"remote checks {paypal.remote_checks - checks}"
+                )
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,13 @@
+from payments.webhooks import process_pending
+from workqueue import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = (
+        "Apply queued Stripe/PayPal webhook events, retrying failures and dead-lettering "
+        "events that keep failing. Runs until interrupted unless --once is given."
+    )
+    summary = "Processed {done}, retrying {retry}, dead-lettered {dead}."
+
+    def process(self, batch_size):
+        return process_pending(limit=batch_size)
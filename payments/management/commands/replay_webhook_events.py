@@ -0,0 +1,56 @@
+# payments/management/commands/replay_webhook_events.py
+from django.core.management.base import BaseCommand
+from django.utils.dateparse import parse_datetime
+
+from payments.models import WebhookEvent
+from payments.webhooks import process_pending, replay
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue dead-lettered (or still pending) webhook events for immediate processing, "
+        "e.g. after fixing a bug or an outage. Processed events are never replayed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--provider", choices=["stripe", "paypal"])
+        parser.add_argument("--event-id", action="append", dest="event_ids", help="Provider event id (repeatable).")
+        parser.add_argument("--since", help="Only events received at or after this ISO datetime.")
+        parser.add_argument(
+            "--include-pending",
+            action="store_true",
+            help="Also make pending events that are backing off due now.",
+        )
+        parser.add_argument("--process", action="store_true", help="Process the replayed backlog now.")
+        parser.add_argument("--batch-size", type=int, default=50)
+
+    def handle(self, *args, **options):
+        events = WebhookEvent.objects.filter(
+            status__in=["dead", "pending"] if options["include_pending"] else ["dead"]
+        )
+        if options["provider"]:
+            events = events.filter(provider=options["provider"])
+        if options["event_ids"]:
+            events = events.filter(event_id__in=options["event_ids"])
+        if options["since"]:
+            since = parse_datetime(options["since"])
+            if since is None:
+                self.stderr.write("--since must be an ISO datetime.")
+                return
+            events = events.filter(received_at__gte=since)
+
+        queued = replay(events)
+        self.stdout.write(f"Queued {queued} events.")
+
+        if options["process"]:
+            totals = {"done": 0, "retry": 0, "dead": 0}
+            while True:
+                counts = process_pending(limit=options["batch_size"])
+                for key, value in counts.items():
+                    totals[key] += value
+                if not any(counts.values()):
+                    break
+            self.stdout.write(
+                f"Processed {totals['done']}, retrying {totals['retry']}, dead-lettered {totals['dead']}."
+            )
+        self.stdout.write(self.style.SUCCESS("Done."))
@@ -0,0 +1,21 @@
+# payments/management/commands/snapshot_credit_balances.py
+from django.core.management.base import BaseCommand
+
+from payments.ledger import take_snapshots
+
+
+class Command(BaseCommand):
+    help = (
+        "Snapshot the balance and totals of every wallet with new ledger entries, "
+        "after checking the wallet row against the ledger. Run periodically (e.g. nightly)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+
+    def handle(self, *args, **options):
+        written, problems = take_snapshots(batch_size=options["batch_size"])
+        for wallet_id, mismatches in problems.items():
+            self.stderr.write(f"Wallet {wallet_id}: " + "; ".join(mismatches))
+        style = self.style.WARNING if problems else self.style.SUCCESS
+        self.stdout.write(style(f"Wrote {written} snapshots, {len(problems)} wallets disagree with their ledger."))
@@ -0,0 +1,133 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:20
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def open_ledgers(apps, schema_editor):
+    """One opening entry and snapshot per existing wallet, at its current balance."""
+    CreditWallet = apps.get_model("payments", "CreditWallet")
+    CreditTransaction = apps.get_model("payments", "CreditTransaction")
+    CreditLedgerEntry = apps.get_model("payments", "CreditLedgerEntry")
+    CreditBalanceSnapshot = apps.get_model("payments", "CreditBalanceSnapshot")
+    for wallet in CreditWallet.objects.iterator():
+        txn = CreditTransaction.objects.create(
+            user_id=wallet.user_id,
+            amount=abs(wallet.balance),
+            transaction_type="credit" if wallet.balance >= 0 else "debit",
+            source="opening_balance",
+            balance_after=wallet.balance,
+        )
+        entry = CreditLedgerEntry.objects.create(
+            wallet=wallet,
+            transaction=txn,
+            amount=wallet.balance,
+            balance_after=wallet.balance,
+            source="opening_balance",
+        )
+        CreditBalanceSnapshot.objects.create(
+            wallet=wallet,
+            entry=entry,
+            balance=wallet.balance,
+            total_earned=wallet.total_earned,
+            total_spent=wallet.total_spent,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0003_creditwallettransaction"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="CreditLedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("balance_after", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("source", models.CharField(default="system", max_length=100)),
+                ("reason", models.CharField(blank=True, max_length=255)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "transaction",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entry",
+                        to="payments.credittransaction",
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="ledger_entries",
+                        to="payments.creditwallet",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["id"],
+            },
+        ),
+        migrations.CreateModel(
+            name="CreditBalanceSnapshot",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("total_earned", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("total_spent", models.DecimalField(decimal_places=2, max_digits=12)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="balance_snapshots",
+                        to="payments.creditwallet",
+                    ),
+                ),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="+",
+                        to="payments.creditledgerentry",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["-entry_id"],
+            },
+        ),
+        migrations.AddIndex(
+            model_name="creditledgerentry",
+            index=models.Index(
+                fields=["wallet", "created_at", "id"], name="ledger_wallet_time_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="creditbalancesnapshot",
+            constraint=models.UniqueConstraint(
+                fields=("wallet", "entry"), name="uniq_snapshot_wallet_entry"
+            ),
+        ),
+        migrations.RunPython(open_ledgers, migrations.RunPython.noop),
+    ]
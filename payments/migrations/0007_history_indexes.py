@@ -0,0 +1,39 @@
+# Generated by Django 5.2.7 on 2026-10-17 03:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0006_webhook_events"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="coinpurchase",
+            index=models.Index(
+                fields=["user", "created_at"], name="coin_user_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="credittransaction",
+            index=models.Index(
+                fields=["user", "created_at"], name="credittxn_user_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="creditwallettransaction",
+            index=models.Index(
+                fields=["user", "created_at"], name="wallettxn_user_time_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="paymenttransaction",
+            index=models.Index(
+                fields=["user", "created_at"], name="payment_user_time_idx"
+            ),
+        ),
+    ]
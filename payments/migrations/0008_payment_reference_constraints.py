@@ -0,0 +1,33 @@
+# Generated by Django 5.2.7 on 2026-10-17 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("payments", "0007_history_indexes"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="coinpurchase",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(("transaction_ref", ""), _negated=True),
+                fields=("provider", "transaction_ref"),
+                name="uniq_coin_purchase_ref",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="creditwallettransaction",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(
+                    ("type", "deposit"), models.Q(("reference", ""), _negated=True)
+                ),
+                fields=("provider", "reference"),
+                name="uniq_wallettxn_deposit_ref",
+            ),
+        ),
+    ]
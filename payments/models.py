@@ -1,4 +1,5 @@
 from django.db import models
+from rest_framework.utils.encoders import JSONEncoder
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
@@ -41,6 +42,7 @@ class PaymentTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"], name="payment_user_time_idx")]
 
     def __str__(self):
         return f"{self.user} - {self.app_source or 'general'} ({self.status})"
@@ -57,20 +59,21 @@ class CreditWallet(models.Model):
     def __str__(self):
         return f"{self.user} - {self.balance:.2f} credits"
 
-    def deposit(self, amount, reason="topup"):
-        from decimal import Decimal
-        self.balance += Decimal(amount)
-        self.total_earned += Decimal(amount)
-        self.save(update_fields=["balance", "total_earned", "last_updated"])
+    # Balance changes go through the ledger (payments/ledger.py): one
+    # conditional UPDATE per movement plus an append-only entry.
+    def deposit(self, amount, reason="topup", source=None):
+        from .ledger import deposit
+        deposit(self, amount, source=source or reason, reason=reason)
         return self.balance
 
-    def spend(self, amount, reason="purchase"):
-        from decimal import Decimal
-        if self.balance < Decimal(amount):
-            raise ValueError("Insufficient credits.")
-        self.balance -= Decimal(amount)
-        self.total_spent += Decimal(amount)
-        self.save(update_fields=["balance", "total_spent", "last_updated"])
+    def spend(self, amount, reason="purchase", source=None):
+        from .ledger import withdraw
+        withdraw(self, amount, source=source or reason, reason=reason)
+        return self.balance
+
+    def withdraw(self, amount, purpose="withdrawal", reason="", source=None):
+        from .ledger import withdraw
+        withdraw(self, amount, source=source or purpose, reason=reason)
         return self.balance
 
 
@@ -85,10 +88,57 @@ class CreditTransaction(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [models.Index(fields=["user", "created_at"], name="credittxn_user_time_idx")]
 
     def __str__(self):
         return f"{self.user} {self.transaction_type} {self.amount} ({self.source})"
 
+class CreditLedgerEntry(models.Model):
+    """
+    Append-only record of one wallet balance movement (signed amount),
+    written by payments.ledger together with its CreditTransaction.
+    """
+    wallet = models.ForeignKey(CreditWallet, on_delete=models.CASCADE, related_name="ledger_entries")
+    transaction = models.OneToOneField(CreditTransaction, on_delete=models.CASCADE, related_name="ledger_entry")
+    amount = models.DecimalField(max_digits=12, decimal_places=2)
+    balance_after = models.DecimalField(max_digits=12, decimal_places=2)
+    source = models.CharField(max_length=100, default="system")
+    reason = models.CharField(max_length=255, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [models.Index(fields=["wallet", "created_at", "id"], name="ledger_wallet_time_idx")]
+
+    def __str__(self):
+        return f"{self.wallet_id} {self.amount:+.2f} → {self.balance_after:.2f} ({self.source})"
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError("Ledger entries are append-only.")
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        raise ValueError("Ledger entries are append-only.")
+
+
+class CreditBalanceSnapshot(models.Model):
+    """Wallet balance and totals as of ``entry`` (see ledger.take_snapshots)."""
+    wallet = models.ForeignKey(CreditWallet, on_delete=models.CASCADE, related_name="balance_snapshots")
+    entry = models.ForeignKey(CreditLedgerEntry, on_delete=models.CASCADE, related_name="+")
+    balance = models.DecimalField(max_digits=12, decimal_places=2)
+    total_earned = models.DecimalField(max_digits=12, decimal_places=2)
+    total_spent = models.DecimalField(max_digits=12, decimal_places=2)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-entry_id"]
+        constraints = [models.UniqueConstraint(fields=["wallet", "entry"], name="uniq_snapshot_wallet_entry")]
+
+    def __str__(self):
+        return f"{self.wallet_id} @ entry {self.entry_id}: {self.balance:.2f}"
+
+
 # 🟩 Added
 class CreditWalletTransaction(models.Model):
     TYPE_CHOICES = [
@@ -111,6 +161,17 @@ class CreditWalletTransaction(models.Model):
     reference = models.CharField(max_length=255, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at"], name="wallettxn_user_time_idx")]
+        constraints = [
+            # A provider payment is deposited once (see utils.add_credits)
+            models.UniqueConstraint(
+                fields=["provider", "reference"],
+                condition=models.Q(type="deposit") & ~models.Q(reference=""),
+                name="uniq_wallettxn_deposit_ref",
+            )
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.type} {self.amount} ({self.status})"
 
@@ -154,6 +215,16 @@ class CoinPurchase(models.Model):
     transaction_ref = models.CharField(max_length=128, blank=True, default="")
     created_at = models.DateTimeField(default=timezone.now)
 
+    class Meta:
+        indexes = [models.Index(fields=["user", "created_at"], name="coin_user_time_idx")]
+        constraints = [
+            models.UniqueConstraint(
+                fields=["provider", "transaction_ref"],
+                condition=~models.Q(transaction_ref=""),
+                name="uniq_coin_purchase_ref",
+            )
+        ]
+
     def __str__(self):
         return f"{self.user.email} bought {self.coin_amount} Coins @ {self.exchange_rate} {self.currency}/coin"
 
@@ -165,3 +236,60 @@ class PaymentLink(models.Model):
     description = models.CharField(max_length=255, blank=True)
     status = models.CharField(max_length=20, choices=[("pending","Pending"),("paid","Paid"),("refunded","Refunded")], default="pending")
     created_at = models.DateTimeField(auto_now_add=True)
+
+
+class IdempotencyKey(models.Model):
+    """
+    First response to a request sent with an ``Idempotency-Key`` header
+    (see payments/idempotency.py); repeats within the TTL replay it.
+    """
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="idempotency_keys")
+    key = models.CharField(max_length=255)
+    fingerprint = models.CharField(max_length=64)  # sha256 of method, path and payload
+    response_status = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True, encoder=JSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        constraints = [models.UniqueConstraint(fields=["user", "key"], name="uniq_idempotency_user_key")]
+
+    def __str__(self):
+        return f"{self.user} {self.key} ({self.response_status})"
+
+
+class WebhookEvent(models.Model):
+    """
+    A verified Stripe/PayPal webhook delivery, stored once per provider
+    event id and processed by the ``process_webhook_events`` worker
+    (see payments/webhooks.py).
+    """
+    PROVIDER_CHOICES = [("stripe", "Stripe"), ("paypal", "PayPal")]
+    STATUS_CHOICES = [
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("dead", "Dead-lettered"),
+    ]
+
+    provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES)
+    event_id = models.CharField(max_length=255)
+    event_type = models.CharField(max_length=100, blank=True)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default="pending")
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["id"]
+        constraints = [
+            models.UniqueConstraint(fields=["provider", "event_id"], name="uniq_webhook_provider_event")
+        ]
+        indexes = [models.Index(fields=["status", "available_at"], name="webhook_status_due_idx")]
+
+    def __str__(self):
+        return f"{self.provider} {self.event_type} {self.event_id} ({self.status})"
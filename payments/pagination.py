@@ -0,0 +1,125 @@
+# payments/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.db import connection
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ============================================================
+# ✅ Keyset (cursor) pagination over a UNION ALL on (row_at, key)
+#   - Takes the per-source querysets (same .values() projection) and
+#     applies the cursor to each one before the UNION, so every source
+#     is a range scan on its (user, created_at) index.
+#   - Newest first; ``key`` ("<kind>-<pk>") breaks created_at ties.
+# ============================================================
+class HistoryCursorPagination(BasePagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, querysets, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            at, key, reverse = None, None, False
+        else:
+            at, key, reverse = cursor
+
+        ordering = ("row_at", "key") if reverse else ("-row_at", "-key")
+        parts = []
+        for queryset in querysets:
+            if at is not None:
+                if reverse:
+                    queryset = queryset.filter(Q(row_at__gt=at) | Q(row_at=at, key__gt=key))
+                else:
+                    queryset = queryset.filter(Q(row_at__lt=at) | Q(row_at=at, key__lt=key))
+            queryset = queryset.order_by()
+            if connection.features.supports_slicing_ordering_in_compound:
+                # Each source contributes at most one page (e.g. PostgreSQL)
+                queryset = queryset.order_by(*ordering)[:size + 1]
+            parts.append(queryset)
+
+        if not parts:
+            rows = []
+        else:
+            combined = parts[0].union(*parts[1:], all=True) if len(parts) > 1 else parts[0]
+            rows = list(combined.order_by(*ordering)[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        # Forward: a next page exists if we over-fetched; a previous page
+        # exists whenever we started from a cursor. Mirrored for reverse.
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ----------------------------
+    # Cursor encoding
+    # ----------------------------
+
+    def encode_cursor(self, row, reverse):
+        payload = {"s": row["row_at"].isoformat(), "k": row["key"]}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            at = parse_datetime(payload["s"])
+            key = payload["k"]
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if at is None or not isinstance(key, str):
+            raise NotFound(self.invalid_cursor_message)
+        return at, key, bool(payload.get("r"))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.last_row is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
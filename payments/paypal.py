@@ -0,0 +1,199 @@
+# payments/paypal.py
+"""
+PayPal webhook signature verification.
+
+Local (default): PayPal signs ``transmission_id|transmission_time|
+webhook_id|crc32(body)`` with the key of the certificate at
+PAYPAL-CERT-URL. The certificate is fetched once, cached (Django cache)
+until PAYPAL_CERT_CACHE_SECONDS (default 1 hour) or its expiry, whichever
+comes first, and the signature is checked in-process.
+
+Remote (fallback): when the signature cannot be checked locally
+(cryptography missing, unsupported algorithm, certificate unavailable)
+PayPal's verify-webhook-signature API is called. Set
+PAYPAL_WEBHOOK_VERIFICATION = "remote" to always use it.
+
+Both go through one pooled ``requests`` session with timeouts
+(PAYPAL_HTTP_TIMEOUT, default (3.05, 10) seconds). Certificates are only
+fetched from URLs starting with one of PAYPAL_CERT_URL_PREFIXES.
+
+See tests/paypal_fake.py for an offline PayPal stand-in (tests, benchmarks).
+"""
+import base64
+import hashlib
+import json
+import logging
+import zlib
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    from cryptography import x509
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.asymmetric import padding
+except ImportError:
+    x509 = None
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CERT_URL_PREFIXES = (
+    "https://api.paypal.com/",
+    "https://api-m.paypal.com/",
+    "https://api.sandbox.paypal.com/",
+    "https://api-m.sandbox.paypal.com/",
+)
+SUPPORTED_ALGORITHMS = {"SHA256withRSA"}
+CERT_CACHE_PREFIX = "payments:paypal-cert:"
+
+_session = None
+
+
+class LocalVerificationUnavailable(Exception):
+    """The signature cannot be checked locally; use the remote API."""
+
+
+def api_base():
+    default = (
+        "https://api-m.paypal.com"
+        if getattr(settings, "PAYPAL_ENVIRONMENT", "sandbox") == "live"
+        else "https://api-m.sandbox.paypal.com"
+    )
+    return getattr(settings, "PAYPAL_API_BASE", default).rstrip("/")
+
+
+def http_timeout():
+    return getattr(settings, "PAYPAL_HTTP_TIMEOUT", (3.05, 10))
+
+
+def get_session():
+    """Process-wide session: keeps connections to PayPal alive between webhooks."""
+    global _session
+    if _session is None:
+        pool_size = getattr(settings, "PAYPAL_HTTP_POOL_SIZE", 10)
+        retry = Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=None)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=retry)
+        session = requests.Session()
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _session = session
+    return _session
+
+
+# ============================================================
+# ✅ Local verification
+# ============================================================
+
+def _trusted_cert_url(url):
+    prefixes = getattr(settings, "PAYPAL_CERT_URL_PREFIXES", DEFAULT_CERT_URL_PREFIXES)
+    return bool(url) and url.startswith(tuple(prefixes))
+
+
+def get_certificate(url):
+    """The signing certificate at ``url``, from the cache or PayPal."""
+    key = CERT_CACHE_PREFIX + hashlib.sha256(url.encode()).hexdigest()
+    pem = cache.get(key)
+    if pem is None:
+        try:
+            response = get_session().get(url, timeout=http_timeout())
+            response.raise_for_status()
+        except requests.RequestException as exc:
+            raise LocalVerificationUnavailable(f"Certificate fetch failed: {exc}")
+        pem = response.content
+    try:
+        cert = x509.load_pem_x509_certificate(pem)
+    except ValueError:
+        raise LocalVerificationUnavailable("Certificate is not valid PEM.")
+
+    now = datetime.now(dt_timezone.utc)
+    if not cert.not_valid_before_utc <= now < cert.not_valid_after_utc:
+        cache.delete(key)
+        raise LocalVerificationUnavailable("Certificate is outside its validity period.")
+    remaining = int((cert.not_valid_after_utc - now).total_seconds())
+    ttl = min(getattr(settings, "PAYPAL_CERT_CACHE_SECONDS", 3600), remaining)
+    if ttl > 0:
+        cache.add(key, pem, timeout=ttl)
+    return cert
+
+
+def signed_message(transmission_id, transmission_time, webhook_id, body):
+    return f"{transmission_id}|{transmission_time}|{webhook_id}|{zlib.crc32(body)}".encode()
+
+
+def verify_locally(body, headers, webhook_id):
+    """
+    True/False for a valid/invalid signature; raises
+    LocalVerificationUnavailable when it cannot be checked here.
+    """
+    if x509 is None:
+        raise LocalVerificationUnavailable("cryptography is not installed.")
+    algorithm = headers.get("PAYPAL-AUTH-ALGO")
+    if algorithm not in SUPPORTED_ALGORITHMS:
+        raise LocalVerificationUnavailable(f"Unsupported algorithm {algorithm!r}.")
+    cert_url = headers.get("PAYPAL-CERT-URL")
+    if not _trusted_cert_url(cert_url):
+        return False
+    transmission_id = headers.get("PAYPAL-TRANSMISSION-ID")
+    transmission_time = headers.get("PAYPAL-TRANSMISSION-TIME")
+    signature = headers.get("PAYPAL-TRANSMISSION-SIG")
+    if not (transmission_id and transmission_time and signature):
+        return False
+
+    cert = get_certificate(cert_url)
+    try:
+        cert.public_key().verify(
+            base64.b64decode(signature),
+            signed_message(transmission_id, transmission_time, webhook_id, body),
+            padding.PKCS1v15(),
+            hashes.SHA256(),
+        )
+    except (InvalidSignature, ValueError):
+        return False
+    return True
+
+
+# ============================================================
+# ✅ Remote verification (fallback)
+# ============================================================
+
+def verify_remotely(body, headers, webhook_id):
+    auth = (getattr(settings, "PAYPAL_CLIENT_ID", ""), getattr(settings, "PAYPAL_CLIENT_SECRET", ""))
+    try:
+        payload = {
+            "auth_algo": headers.get("PAYPAL-AUTH-ALGO"),
+            "cert_url": headers.get("PAYPAL-CERT-URL"),
+            "transmission_id": headers.get("PAYPAL-TRANSMISSION-ID"),
+            "transmission_sig": headers.get("PAYPAL-TRANSMISSION-SIG"),
+            "transmission_time": headers.get("PAYPAL-TRANSMISSION-TIME"),
+            "webhook_id": webhook_id,
+            "webhook_event": json.loads(body),  # ValueError on a malformed body
+        }
+        response = get_session().post(
+            f"{api_base()}/v1/notifications/verify-webhook-signature",
+            json=payload,
+            auth=auth,
+            timeout=http_timeout(),
+        )
+        return response.json().get("verification_status") == "SUCCESS"
+    except (requests.RequestException, ValueError) as exc:
+        # PayPal redelivers unacknowledged webhooks: reject and let it retry
+        logger.warning("PayPal remote verification failed: %s", exc)
+        return False
+
+
+def verify_webhook_signature(body, headers):
+    """Verify a PayPal webhook delivery (raw body bytes, request headers)."""
+    if isinstance(body, str):
+        body = body.encode("utf-8")
+    webhook_id = settings.PAYPAL_WEBHOOK_ID
+    if getattr(settings, "PAYPAL_WEBHOOK_VERIFICATION", "local") != "remote":
+        try:
+            return verify_locally(body, headers, webhook_id)
+        except LocalVerificationUnavailable as exc:
+            logger.info("PayPal local verification unavailable (%s); using the API", exc)
+    return verify_remotely(body, headers, webhook_id)
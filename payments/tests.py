@@ -1,3 +1,662 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
+from io import StringIO
+from decimal import Decimal
+from unittest import skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from .ledger import InsufficientCredits, deposit, statement, take_snapshots, verify_wallet, withdraw
+from .models import (
+    CoinPurchase,
+    CreditBalanceSnapshot,
+    CreditLedgerEntry,
+    CreditTransaction,
+    CreditWallet,
+    CreditWalletTransaction,
+    IdempotencyKey,
+    PaymentTransaction,
+    WebhookEvent,
+)
+
+try:
+    from tests.paypal_fake import FakePayPal
+except ImportError:  # cryptography not installed
+    FakePayPal = None
+
+User = get_user_model()
+
+
+class CreditLedgerTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="wallet@example.com", password="pass123")
+        self.wallet = CreditWallet.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+
+    def test_movements_append_linked_entries(self):
+        deposit(self.wallet, "20.00", source="topup")
+        entry = withdraw(self.wallet, Decimal("7.50"), source="scrimmage", reason="Entry fee")
+
+        self.wallet.refresh_from_db()
+        self.assertEqual(
+            (self.wallet.balance, self.wallet.total_earned, self.wallet.total_spent),
+            (Decimal("12.50"), Decimal("20.00"), Decimal("7.50")),
+        )
+        self.assertEqual((entry.amount, entry.balance_after), (Decimal("-7.50"), Decimal("12.50")))
+        txn = entry.transaction
+        self.assertEqual((txn.transaction_type, txn.amount, txn.source), ("debit", Decimal("7.50"), "scrimmage"))
+        self.assertEqual(CreditTransaction.objects.filter(user=self.user).count(), 2)
+
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+
+    def test_overdraft_is_refused_without_writing(self):
+        deposit(self.wallet, 5)
+        with self.assertRaises(InsufficientCredits):
+            withdraw(self.wallet, "5.01")
+        with self.assertRaises(ValueError):
+            withdraw(self.wallet, -1)
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, Decimal("5.00"))
+        self.assertEqual(CreditLedgerEntry.objects.count(), 1)
+
+    def test_wallet_methods_accept_caller_keywords(self):
+        self.assertEqual(self.wallet.deposit(10, source="topup"), Decimal("10.00"))
+        self.assertEqual(self.wallet.deposit(5, reason="purchase_coin"), Decimal("15.00"))
+        self.assertEqual(self.wallet.withdraw(3, purpose="scrimmage"), Decimal("12.00"))
+        self.assertEqual(self.wallet.spend(2, reason="membership_payment"), Decimal("10.00"))
+        self.assertEqual(
+            list(CreditLedgerEntry.objects.values_list("source", flat=True)),
+            ["topup", "purchase_coin", "scrimmage", "membership_payment"],
+        )
+
+    def test_spend_and_withdraw_endpoints(self):
+        self.client.post(reverse("wallet-topup"), {"amount": "10.00"})
+        res = self.client.post(reverse("wallet-spend"), {"amount": "4.00", "purpose": "ticket"})
+        self.assertEqual(res.status_code, 200, res.data)
+        self.assertEqual(res.data["balance"], "6.00")
+
+        res = self.client.post(reverse("wallet-spend"), {"amount": "7.00"})
+        self.assertEqual((res.status_code, res.data["detail"]), (400, "Insufficient credits."))
+        res = self.client.post(reverse("wallet-withdraw-credits"), {"amount": "7.00"})
+        self.assertEqual(res.status_code, 400)
+        res = self.client.post(reverse("wallet-withdraw-credits"), {"amount": "6.00", "provider": "paypal"})
+        self.assertEqual(res.data["balance"], Decimal("0.00"))
+
+        history = self.client.get(reverse("wallet-history")).data
+        self.assertEqual([row["transaction_type"] for row in history], ["debit", "debit", "credit"])
+
+    def test_statement_and_snapshots(self):
+        deposit(self.wallet, 30)
+        withdraw(self.wallet, 10)
+        middle = timezone.now()
+        deposit(self.wallet, 5)
+        withdraw(self.wallet, 1)
+
+        result = statement(self.wallet, middle, timezone.now() + timedelta(seconds=1))
+        self.assertEqual(
+            (result["opening_balance"], result["credits"], result["debits"], result["closing_balance"]),
+            (Decimal("20.00"), Decimal("5.00"), Decimal("1.00"), Decimal("24.00")),
+        )
+
+        self.assertEqual(take_snapshots(), (1, {}))
+        self.assertEqual(take_snapshots(), (0, {}))
+        snapshot = CreditBalanceSnapshot.objects.get()
+        self.assertEqual(snapshot.balance, Decimal("24.00"))
+
+        # Verification only looks at entries after the snapshot
+        deposit(self.wallet, 1)
+        with self.assertNumQueries(3):
+            self.assertEqual(verify_wallet(self.wallet), [])
+        CreditWallet.objects.filter(pk=self.wallet.pk).update(balance=Decimal("99.00"))
+        written, problems = take_snapshots()
+        self.assertEqual(written, 0)
+        self.assertIn("balance: ledger 25.00 != wallet 99.00", problems[self.wallet.pk])
+
+        res = self.client.get(reverse("wallet-statement"))
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["entries"]), 5)
+        self.assertEqual(res.data["opening_balance"], "0.00")
+
+    def test_statement_bounds(self):
+        deposit(self.wallet, 5)
+        url = reverse("wallet-statement")
+        # A naive bound is read in the current time zone, next to an aware default
+        naive_start = (timezone.localtime() - timedelta(days=1)).replace(tzinfo=None).isoformat()
+        res = self.client.get(url, {"start": naive_start})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.data["entries"]), 1)
+
+        for params in ({"start": "yesterday"}, {"end": "2024-13-01T00:00:00"}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+        self.assertEqual(self.client.get(url, {"start": "2030-01-02T00:00", "end": "2030-01-01T00:00"}).status_code, 400)
+
+    def test_reads_follow_apply_order_not_clock_order(self):
+        from .ledger import balance_at
+
+        first = deposit(self.wallet, 10)
+        second = withdraw(self.wallet, 4)
+        # The later-applied movement carries the earlier timestamp
+        # (e.g. clock skew between workers)
+        stamp = timezone.now() - timedelta(minutes=1)
+        CreditLedgerEntry.objects.filter(pk=first.pk).update(created_at=stamp)
+        CreditLedgerEntry.objects.filter(pk=second.pk).update(created_at=stamp - timedelta(seconds=1))
+
+        self.assertEqual(balance_at(self.wallet, timezone.now()), Decimal("6.00"))
+        result = statement(self.wallet, stamp - timedelta(seconds=1), timezone.now())
+        self.assertEqual([e.pk for e in result["entries"]], [first.pk, second.pk])
+        self.assertEqual(result["closing_balance"], Decimal("6.00"))
+        self.assertEqual(statement(self.wallet, timezone.now(), timezone.now())["opening_balance"], Decimal("6.00"))
+
+    def test_snapshot_command(self):
+        deposit(self.wallet, 3)
+        call_command("snapshot_credit_balances", stdout=open("/dev/null", "w"))
+        self.assertEqual(CreditBalanceSnapshot.objects.get().entry, CreditLedgerEntry.objects.get())
+
+
+class CreditLedgerConcurrencyTests(TransactionTestCase):
+    """Concurrent deposits and debits must neither lose updates nor overdraw."""
+
+    START = Decimal("100.00")
+    DEBITS = 200
+    DEPOSITS = 50
+    WORKERS = 16
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="busy@example.com", password="pass123")
+        self.wallet = CreditWallet.objects.create(user=self.user)
+        deposit(self.wallet, self.START, source="seed")
+
+    def move(self, kind):
+        from django.db import OperationalError, connection
+
+        wallet = CreditWallet.objects.get(pk=self.wallet.pk)
+        try:
+            # SQLite reports write contention as "database is locked" instead
+            # of waiting on a row lock; retry like a client would.
+            for _ in range(200):
+                try:
+                    if kind == "deposit":
+                        deposit(wallet, 1, source="stress")
+                    else:
+                        withdraw(wallet, 1, source="stress")
+                    return "ok"
+                except InsufficientCredits:
+                    return "refused"
+                except OperationalError:
+                    time.sleep(0.01)
+            raise AssertionError("Movement never acquired the database")
+        finally:
+            connection.close()
+
+    def test_balance_invariant_under_concurrent_movements(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        kinds = ["withdraw"] * self.DEBITS + ["deposit"] * self.DEPOSITS
+        kinds[::5] = ["deposit"] * len(kinds[::5])
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            outcomes = list(pool.map(self.move, kinds))
+
+        deposits = kinds.count("deposit")
+        debits = sum(1 for kind, outcome in zip(kinds, outcomes) if kind == "withdraw" and outcome == "ok")
+        self.wallet.refresh_from_db()
+        self.assertEqual(self.wallet.balance, self.START + deposits - debits)
+        self.assertGreaterEqual(self.wallet.balance, 0)
+        self.assertEqual(self.wallet.total_spent, debits)
+
+        entries = CreditLedgerEntry.objects.filter(wallet=self.wallet).order_by("id")
+        self.assertEqual(entries.count(), 1 + deposits + debits)
+        running = Decimal("0")
+        for entry in entries:
+            running += entry.amount
+            self.assertEqual(entry.balance_after, running)
+            self.assertGreaterEqual(entry.balance_after, 0)
+        self.assertEqual(verify_wallet(self.wallet), [])
+
+
+class IdempotencyKeyTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="retry@example.com", password="pass123")
+        self.client.force_authenticate(user=self.user)
+
+    def post(self, name, data, key):
+        return self.client.post(reverse(name), data, format="json", HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_repeat_replays_the_first_response(self):
+        first = self.post("transactions-create-intent", {"amount": "12.00"}, "intent-1")
+        again = self.post("transactions-create-intent", {"amount": "12.00"}, "intent-1")
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((again.status_code, again.data), (201, first.data))
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(PaymentTransaction.objects.filter(user=self.user).count(), 1)
+
+        # A new key is a new request
+        self.post("transactions-create-intent", {"amount": "12.00"}, "intent-2")
+        self.assertEqual(PaymentTransaction.objects.filter(user=self.user).count(), 2)
+
+    def test_money_moves_once_per_key(self):
+        for _ in range(3):
+            res = self.post("wallet-topup", {"amount": "10.00"}, "topup-1")
+            self.assertEqual(res.data["balance"], "10.00")
+        self.post("wallet-add-credits", {"amount": "5.00", "reference": "pi_1"}, "add-1")
+        self.post("wallet-add-credits", {"amount": "5.00", "reference": "pi_1"}, "add-1")
+        for _ in range(2):
+            self.post("wallet-spend", {"amount": "4.00"}, "spend-1")
+            res = self.post("wallet-withdraw-credits", {"amount": "6.00"}, "payout-1")
+        # Replays carry the body as rendered (the Decimal balance goes out as a JSON number)
+        self.assertEqual((res["Idempotent-Replayed"], res.json()), ("true", {"balance": 5.0}))
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("5.00"))
+        self.assertEqual(CreditLedgerEntry.objects.count(), 4)
+
+        # Refusals are stored too: the retry does not start succeeding
+        refused = self.post("wallet-spend", {"amount": "50.00"}, "spend-2")
+        self.assertEqual(refused.status_code, 400)
+        self.assertEqual(self.post("wallet-spend", {"amount": "50.00"}, "spend-2").status_code, 400)
+
+    def test_reusing_a_key_for_another_request_is_rejected(self):
+        self.post("wallet-topup", {"amount": "10.00"}, "k")
+        res = self.post("wallet-topup", {"amount": "99.00"}, "k")
+        self.assertEqual(res.status_code, 422)
+        res = self.post("wallet-spend", {"amount": "10.00"}, "k")
+        self.assertEqual(res.status_code, 422)
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("10.00"))
+
+    def test_keys_are_per_user_and_expire(self):
+        from .idempotency import purge_expired_keys
+
+        other = User.objects.create_user(email="other@example.com", password="pass123")
+        self.post("wallet-topup", {"amount": "1.00"}, "shared")
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.post("wallet-topup", {"amount": "1.00"}, "shared").data["balance"], "1.00")
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+        IdempotencyKey.objects.filter(user=other).update(expires_at=timezone.now())
+        # An expired key is a fresh request
+        self.assertEqual(self.post("wallet-topup", {"amount": "1.00"}, "shared").data["balance"], "2.00")
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertEqual(purge_expired_keys(batch_size=1), 2)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+    def test_without_header_nothing_is_stored(self):
+        self.client.post(reverse("wallet-topup"), {"amount": "1.00"})
+        self.client.post(reverse("wallet-topup"), {"amount": "1.00"})
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("2.00"))
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+
+class IdempotencyConcurrencyTests(TransactionTestCase):
+    """Simultaneous retries with one key must charge exactly once."""
+
+    RETRIES = 12
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="burst@example.com", password="pass123")
+
+    def topup(self, _):
+        from django.db import OperationalError, connection
+        from rest_framework.test import APIClient
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        try:
+            for _ in range(200):
+                try:
+                    return client.post(
+                        reverse("wallet-topup"), {"amount": "10.00"}, format="json", HTTP_IDEMPOTENCY_KEY="burst"
+                    ).data
+                except OperationalError:
+                    time.sleep(0.01)
+            raise AssertionError("Top-up never acquired the database")
+        finally:
+            connection.close()
+
+    def test_concurrent_duplicates_are_serialized(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        CreditWallet.objects.create(user=self.user)
+        with ThreadPoolExecutor(max_workers=6) as pool:
+            results = list(pool.map(self.topup, range(self.RETRIES)))
+
+        self.assertEqual(results, [{"balance": "10.00"}] * self.RETRIES)
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("10.00"))
+        self.assertEqual(CreditLedgerEntry.objects.count(), 1)
+
+
+@override_settings(STRIPE_WEBHOOK_SECRET="whsec_test", PAYMENTS_WEBHOOK_MAX_ATTEMPTS=2)
+class WebhookQueueTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="buyer@example.com", password="pass123")
+
+    def stripe_event(
+        self, event_id="evt_1", purpose="coin_purchase", user_id=None, amount=2500,
+        event_type="checkout.session.completed", **fields
+    ):
+        obj = {
+            "id": f"cs_{event_id}",
+            "amount_total": amount,
+            "currency": "usd",
+            "metadata": {"user_id": str(user_id or self.user.pk), "purpose": purpose},
+        }
+        obj.update(fields)
+        return {"id": event_id, "type": event_type, "data": {"object": obj}}
+
+    def one_payment_events(self, purpose):
+        """The checkout session and payment intent events Stripe sends for one payment."""
+        return [
+            self.stripe_event("evt_cs", purpose, payment_intent="pi_1"),
+            self.stripe_event("evt_pi", purpose, event_type="payment_intent.succeeded", id="pi_1", amount=2500),
+        ]
+
+    def post_stripe(self, event, secret="whsec_test"):
+        import hashlib
+        import hmac
+        import json
+
+        payload = json.dumps(event)
+        timestamp = int(time.time())
+        signature = hmac.new(secret.encode(), f"{timestamp}.{payload}".encode(), hashlib.sha256).hexdigest()
+        return self.client.post(
+            reverse("stripe-webhook"),
+            payload,
+            content_type="application/json",
+            HTTP_STRIPE_SIGNATURE=f"t={timestamp},v1={signature}",
+        )
+
+    def test_stripe_event_is_queued_once_and_processed_by_the_worker(self):
+        from .webhooks import process_pending
+
+        res = self.post_stripe(self.stripe_event())
+        self.assertEqual(res.data, {"received": True, "duplicate": False})
+        self.assertFalse(CreditWallet.objects.filter(user=self.user).exists())
+
+        # Provider redelivery: acknowledged, not stored again
+        self.assertEqual(self.post_stripe(self.stripe_event()).data["duplicate"], True)
+        self.assertEqual(WebhookEvent.objects.count(), 1)
+
+        self.assertEqual(process_pending(), {"done": 1, "retry": 0, "dead": 0})
+        self.assertEqual(process_pending(), {"done": 0, "retry": 0, "dead": 0})
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("25.00"))
+        self.assertEqual(WebhookEvent.objects.get().status, "done")
+
+    def test_invalid_stripe_signature_is_rejected(self):
+        res = self.post_stripe(self.stripe_event(), secret="whsec_wrong")
+        self.assertEqual(res.status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_paypal_topup_is_queued(self):
+        from unittest import mock
+
+        from .webhooks import process_pending
+
+        event = {
+            "id": "WH-1",
+            "event_type": "PAYMENT.SALE.COMPLETED",
+            "resource": {
+                "id": "SALE-1",
+                "custom_id": f"{self.user.pk}:credit_topup",
+                "amount": {"total": "12.50", "currency": "USD"},
+            },
+        }
+        with mock.patch("payments.views_webhooks_paypal.verify_paypal_signature", return_value=True):
+            for _ in range(2):
+                res = self.client.post(reverse("paypal-webhook"), event, format="json")
+                self.assertEqual(res.status_code, 200)
+        self.assertEqual(process_pending()["done"], 1)
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("12.50"))
+
+    def test_failing_event_is_retried_dead_lettered_and_replayed(self):
+        from io import StringIO
+
+        from .webhooks import process_pending
+
+        self.post_stripe(self.stripe_event(user_id=999999))
+        event = WebhookEvent.objects.get()
+
+        self.assertEqual(process_pending(), {"done": 0, "retry": 1, "dead": 0})
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("pending", 1))
+        self.assertIn("User 999999 not found", event.last_error)
+        self.assertEqual(process_pending()["retry"], 0)  # backing off
+
+        WebhookEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+        self.assertEqual(process_pending()["dead"], 1)
+        self.assertFalse(CoinPurchase.objects.exists())
+
+        # Fix the data, then replay the dead letters
+        payload = event.payload
+        payload["data"]["object"]["metadata"]["user_id"] = str(self.user.pk)
+        WebhookEvent.objects.filter(pk=event.pk).update(payload=payload)
+        out = StringIO()
+        call_command("replay_webhook_events", "--provider", "stripe", "--process", stdout=out)
+        self.assertIn("Queued 1 events.", out.getvalue())
+        self.assertIn("Processed 1, retrying 0, dead-lettered 0.", out.getvalue())
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("25.00"))
+
+        # Processed events are never replayed
+        call_command("replay_webhook_events", "--include-pending", "--process", stdout=out)
+        self.assertEqual(CoinPurchase.objects.count(), 1)
+
+    def test_both_stripe_events_of_one_coin_purchase_credit_once(self):
+        from .webhooks import process_pending
+
+        for event in self.one_payment_events("coin_purchase"):
+            self.post_stripe(event)
+        self.assertEqual(process_pending(), {"done": 2, "retry": 0, "dead": 0})
+        self.assertEqual(CoinPurchase.objects.get().transaction_ref, "pi_1")
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("25.00"))
+
+        # Replaying both events changes nothing
+        WebhookEvent.objects.update(status="dead")
+        call_command("replay_webhook_events", "--process", stdout=StringIO())
+        self.assertEqual(WebhookEvent.objects.filter(status="done").count(), 2)
+        self.assertEqual(CoinPurchase.objects.count(), 1)
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("25.00"))
+
+    def test_both_stripe_events_of_one_topup_deposit_once(self):
+        from .webhooks import process_pending
+
+        for event in self.one_payment_events("credit_topup"):
+            self.post_stripe(event)
+        self.assertEqual(process_pending()["done"], 2)
+        self.assertEqual(CreditWalletTransaction.objects.get().reference, "pi_1")
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("25.00"))
+
+    def test_reclaimed_event_is_applied_once(self):
+        from unittest import mock
+
+        from . import webhooks
+
+        self.post_stripe(self.stripe_event())
+        apply_stripe = webhooks.PROCESSORS["stripe"]
+
+        def stalled(payload):
+            apply_stripe(payload)
+            # The claim timed out meanwhile and another worker took the event
+            WebhookEvent.objects.update(claimed_at=timezone.now() + timedelta(seconds=1))
+
+        with mock.patch.dict(webhooks.PROCESSORS, {"stripe": stalled}):
+            self.assertEqual(webhooks.process_pending(), {"done": 0, "retry": 0, "dead": 0})
+        self.assertFalse(CoinPurchase.objects.exists())
+        self.assertEqual(WebhookEvent.objects.get().status, "processing")
+
+        # The new owner's claim expires too; the event is applied exactly once
+        WebhookEvent.objects.update(claimed_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(webhooks.process_pending()["done"], 1)
+        self.assertEqual(CreditWallet.objects.get(user=self.user).balance, Decimal("25.00"))
+
+
+@skipUnless(FakePayPal, "cryptography is not installed")
+class PayPalSignatureTests(APITestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.paypal = FakePayPal().start()
+        cls.addClassCleanup(cls.paypal.stop)
+
+    def setUp(self):
+        from django.core.cache import cache
+
+        cache.clear()
+        overrides = override_settings(**self.paypal.settings())
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+
+    def deliver(self, event_id="WH-1", headers=None, body=None):
+        import json
+
+        body = body or json.dumps({"id": event_id, "event_type": "PAYMENT.SALE.DENIED", "resource": {}}).encode()
+        headers = headers or self.paypal.sign(body)
+        meta = {"HTTP_" + name.replace("-", "_"): value for name, value in headers.items()}
+        return self.client.post(reverse("paypal-webhook"), body, content_type="application/json", **meta)
+
+    def test_local_verification_fetches_the_cert_once(self):
+        fetches, checks = self.paypal.cert_fetches, self.paypal.remote_checks
+        for i in range(3):
+            self.assertEqual(self.deliver(f"WH-{i}").status_code, 200)
+        self.assertEqual(WebhookEvent.objects.filter(provider="paypal").count(), 3)
+        self.assertEqual((self.paypal.cert_fetches - fetches, self.paypal.remote_checks - checks), (1, 0))
+
+    def test_tampered_or_untrusted_deliveries_are_rejected(self):
+        import json
+
+        body = json.dumps({"id": "WH-9", "event_type": "PAYMENT.SALE.COMPLETED"}).encode()
+        headers = self.paypal.sign(body)
+        self.assertEqual(self.deliver(body=body.replace(b"WH-9", b"WH-8"), headers=headers).status_code, 400)
+
+        untrusted = {**headers, "PAYPAL-CERT-URL": "https://evil.example.com/cert.pem"}
+        self.assertEqual(self.deliver(body=body, headers=untrusted).status_code, 400)
+        self.assertFalse(WebhookEvent.objects.exists())
+
+    def test_remote_api_is_the_fallback(self):
+        import json
+
+        checks = self.paypal.remote_checks
+        body = json.dumps({"id": "WH-R", "event_type": "PAYMENT.SALE.DENIED"}).encode()
+        headers = {**self.paypal.sign(body), "PAYPAL-AUTH-ALGO": "SHA512withRSA"}
+        self.assertEqual(self.deliver(body=body, headers=headers).status_code, 200)
+        self.assertEqual(self.paypal.remote_checks, checks + 1)
+
+        with override_settings(PAYPAL_WEBHOOK_VERIFICATION="remote"):
+            self.assertEqual(self.deliver("WH-R2").status_code, 200)
+        self.assertEqual(self.paypal.remote_checks, checks + 2)
+
+    def test_unreachable_paypal_rejects_without_hanging(self):
+        import socket
+
+        with socket.socket() as sock:
+            sock.bind(("127.0.0.1", 0))
+            closed = f"http://127.0.0.1:{sock.getsockname()[1]}"
+        with override_settings(
+            PAYPAL_WEBHOOK_VERIFICATION="remote", PAYPAL_API_BASE=closed, PAYPAL_HTTP_TIMEOUT=(0.5, 0.5)
+        ):
+            started = time.monotonic()
+            self.assertEqual(self.deliver("WH-DOWN").status_code, 400)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_malformed_body_is_rejected_by_the_remote_check(self):
+        checks = self.paypal.remote_checks
+        body = b"{not json"
+        with override_settings(PAYPAL_WEBHOOK_VERIFICATION="remote"):
+            self.assertEqual(self.deliver(body=body, headers=self.paypal.sign(body)).status_code, 400)
+        self.assertEqual(self.paypal.remote_checks, checks)
+
+
+class TransactionHistoryTests(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(email="history@example.com", password="pass123")
+        self.wallet = CreditWallet.objects.create(user=self.user)
+        self.client.force_authenticate(user=self.user)
+        self.now = timezone.now().replace(microsecond=0)
+
+    def _at(self, obj, hours_ago):
+        type(obj).objects.filter(pk=obj.pk).update(created_at=self.now - timedelta(hours=hours_ago))
+        return obj
+
+    def _seed(self):
+        """One row per source, plus two credits sharing a timestamp."""
+        self._at(CreditTransaction.objects.create(user=self.user, amount=5, transaction_type="credit", source="topup"), 1)
+        self._at(CreditTransaction.objects.create(user=self.user, amount=2, transaction_type="debit", source="scrimmage"), 1)
+        self._at(CreditWalletTransaction.objects.create(
+            user=self.user, wallet=self.wallet, amount=20, type="deposit", provider="stripe", status="succeeded"
+        ), 2)
+        CoinPurchase.objects.create(
+            user=self.user, amount_fiat=10, coin_amount=10, exchange_rate=1, provider="paypal",
+            created_at=self.now - timedelta(hours=3),
+        )
+        self._at(PaymentTransaction.objects.create(
+            user=self.user, app_source="membership", amount=9, provider="stripe", status="succeeded"
+        ), 4)
+        other = User.objects.create_user(email="other@example.com", password="pass123")
+        CreditTransaction.objects.create(user=other, amount=1, transaction_type="credit")
+
+    def test_sources_are_merged_newest_first_across_pages(self):
+        self._seed()
+        url = reverse("transaction-history-list")
+
+        seen, pages, next_url = [], 0, f"{url}?page_size=2"
+        while next_url:
+            with self.assertNumQueries(1):
+                res = self.client.get(next_url)
+            self.assertEqual(res.status_code, 200)
+            seen += res.data["results"]
+            next_url, pages = res.data["next"], pages + 1
+
+        self.assertEqual(pages, 3)
+        self.assertEqual(
+            [row["type"] for row in seen], ["debit", "credit", "deposit", "purchase", "membership"]
+        )
+        ids = [row["id"] for row in seen]
+        self.assertEqual(len(set(ids)), 5)
+        payment = PaymentTransaction.objects.get(user=self.user)
+        self.assertEqual(ids[-1], f"payment-{payment.id}")
+        self.assertEqual(seen[-1]["description"], "Membership payment (card)")
+        self.assertEqual(seen[3]["currency"], "USD")
+        self.assertEqual(seen[3]["description"], "Purchased 10.00 ProjectCoins")
+
+    def test_previous_link_returns_the_earlier_page(self):
+        self._seed()
+        first = self.client.get(reverse("transaction-history-list"), {"page_size": 2}).data
+        self.assertIsNone(first["previous"])
+        second = self.client.get(first["next"]).data
+        back = self.client.get(second["previous"]).data
+        self.assertEqual([row["id"] for row in back["results"]], [row["id"] for row in first["results"]])
+
+    def test_filters_by_type_and_date_range(self):
+        self._seed()
+        url = reverse("transaction-history-list")
+
+        res = self.client.get(url, {"type": "deposit,membership"})
+        self.assertEqual([row["type"] for row in res.data["results"]], ["deposit", "membership"])
+
+        res = self.client.get(url, {
+            "start": (self.now - timedelta(hours=3)).isoformat(),
+            "end": (self.now - timedelta(hours=1)).isoformat(),
+        })
+        self.assertEqual([row["type"] for row in res.data["results"]], ["deposit", "purchase"])
+
+        self.assertEqual(self.client.get(url, {"start": "yesterday"}).status_code, 400)
+        self.assertEqual(self.client.get(url, {"cursor": "not-a-cursor"}).status_code, 404)
+
+    def test_naive_date_range_is_read_in_the_current_time_zone(self):
+        self._seed()
+
+        def naive(hours_ago):
+            return timezone.localtime(self.now - timedelta(hours=hours_ago)).replace(tzinfo=None).isoformat()
+
+        import warnings
+
+        with warnings.catch_warnings():
+            # Django only warns when a naive datetime reaches an aware column
+            warnings.simplefilter("error", RuntimeWarning)
+            res = self.client.get(
+                reverse("transaction-history-list"), {"start": naive(3), "end": naive(1)}
+            )
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([row["type"] for row in res.data["results"]], ["deposit", "purchase"])
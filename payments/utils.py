@@ -12,6 +12,7 @@ import stripe
 from django.conf import settings
 
 from .models import PaymentTransaction, CreditWallet, CreditTransaction, BonusTier, OrganizerFee
+from .ledger import InsufficientCredits
 from notifications.models import Notification
 
 def process_auto_payment(user, amount, app_source, related_id, description="Auto payment"):
@@ -113,29 +114,15 @@ def process_auto_payment(user, amount: Decimal, app_source, related_id, descript
         organizer_fee = max(percent_cut, organizer_fee_flat)
 
     try:
+        paid = False
         if wallet.balance >= amount:  # pay with credits
-            with db_txn.atomic():
-                wallet.withdraw(amount, purpose=app_source)
-                PaymentTransaction.objects.create(
-                    user=payer,
-                    app_source=app_source,
-                    related_id=str(related_id),
-                    amount=amount,
-                    currency="USD",
-                    provider="credits",
-                    method="credits",
-                    status="succeeded",
-                    description=description,
-                    processed_at=timezone.now(),
-                )
-                # credit organizer immediately (net fee), if any
-                if organizer and organizer_fee > 0:
-                    o_wallet, _ = CreditWallet.objects.get_or_create(user=organizer)
-                    o_wallet.deposit(organizer_fee, source=f"organizer_fee:{app_source}")
-                    OrganizerFee.objects.create(
-                        organizer=organizer, app_source=app_source,
-                        related_id=str(related_id), amount=organizer_fee, status="succeeded"
-                    )
+            try:
+                with db_txn.atomic():
+                    paid = _pay_with_credits(wallet, payer, amount, app_source, related_id, description,
+                                             organizer, organizer_fee)
+            except InsufficientCredits:
+                pass  # spent concurrently since the read: fall back to a card intent
+        if paid:
             Notification.objects.create(
                 user=payer,
                 kind="payment",
@@ -184,6 +171,31 @@ def process_auto_payment(user, amount: Decimal, app_source, related_id, descript
         )
         return {"status": "error", "detail": str(e)}
 
+def _pay_with_credits(wallet, payer, amount, app_source, related_id, description, organizer, organizer_fee):
+    """Debit the payer (raises InsufficientCredits) and credit the organizer fee."""
+    wallet.withdraw(amount, purpose=app_source)
+    PaymentTransaction.objects.create(
+        user=payer,
+        app_source=app_source,
+        related_id=str(related_id),
+        amount=amount,
+        currency="USD",
+        provider="credits",
+        method="credits",
+        status="succeeded",
+        description=description,
+        processed_at=timezone.now(),
+    )
+    # credit organizer immediately (net fee), if any
+    if organizer and organizer_fee > 0:
+        o_wallet, _ = CreditWallet.objects.get_or_create(user=organizer)
+        o_wallet.deposit(organizer_fee, source=f"organizer_fee:{app_source}")
+        OrganizerFee.objects.create(
+            organizer=organizer, app_source=app_source,
+            related_id=str(related_id), amount=organizer_fee, status="succeeded"
+        )
+    return True
+
 def settle_organizer_fees_on_success(app_source: str, related_id: str):
     """Call from Stripe/PayPal webhooks after successful capture for card payments."""
     for fee in OrganizerFee.objects.filter(app_source=app_source, related_id=str(related_id), status="pending"):
@@ -294,25 +306,33 @@ def convert_to_fiat(user, coins):
     return total_usd
 
 def add_credits(user, amount: Decimal, provider="stripe", reference=None):
-    """Safely deposit credits into wallet after fiat confirmation."""
+    """
+    Safely deposit credits into wallet after fiat confirmation. A provider
+    ``reference`` is deposited once; repeats leave the balance unchanged.
+    """
     with transaction.atomic():
         wallet, _ = CreditWallet.objects.get_or_create(user=user)
-        wallet.deposit(amount, reason="fiat_deposit")
-        CreditWalletTransaction.objects.create(
-            user=user, wallet=wallet, amount=amount, type="deposit",
-            provider=provider, status="succeeded", reference=reference
-        )
+        fields = {"user": user, "wallet": wallet, "amount": amount, "status": "succeeded"}
+        if reference:
+            # The unique (provider, reference) deposit row claims the payment
+            _, created = CreditWalletTransaction.objects.get_or_create(
+                type="deposit", provider=provider, reference=reference, defaults=fields
+            )
+            if not created:
+                return {"balance": wallet.balance}
+        else:
+            CreditWalletTransaction.objects.create(type="deposit", provider=provider, reference="", **fields)
+        wallet.deposit(amount, source="fiat_deposit", reason=f"{provider}:{reference or ''}")
     return {"balance": wallet.balance}
 
 def withdraw_credits(user, amount: Decimal, provider="stripe", reference=None):
     """Safely withdraw credits and create a pending payout transaction."""
-    wallet = CreditWallet.objects.get(user=user)
-    if wallet.balance < amount:
-        raise ValueError("Insufficient credits to withdraw.")
+    wallet, _ = CreditWallet.objects.get_or_create(user=user)
     with transaction.atomic():
-        wallet.spend(amount, reason="withdrawal")
+        # Conditional debit: raises InsufficientCredits (a ValueError) on overdraft
+        wallet.withdraw(amount, purpose="withdrawal", reason=f"payout:{provider}")
         CreditWalletTransaction.objects.create(
             user=user, wallet=wallet, amount=amount, type="withdrawal",
-            provider=provider, status="pending", reference=reference
+            provider=provider, status="pending", reference=reference or ""
         )
     return {"balance": wallet.balance}
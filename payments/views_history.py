@@ -1,17 +1,112 @@
-from itertools import chain
+import uuid
+
+from django.conf import settings
+from django.db.models import CharField, F, Value
+from django.db.models.functions import Cast, Concat
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import viewsets
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.response import Response
 
 from .models import (
+    CoinPurchase,
     CreditTransaction,
     CreditWalletTransaction,
-    CoinPurchase,
     PaymentTransaction,
 )
+from .pagination import HistoryCursorPagination
 from .serializers import TransactionHistorySerializer
 
 
+def _text(value):
+    return Value(value, output_field=CharField())
+
+
+def _projection(queryset, kind, row_type, amount, currency, status, source, detail=None):
+    """Map one source onto the common history row (same columns, same order)."""
+    ref = Cast("pk", output_field=CharField())  # int / uuid primary keys
+    return queryset.order_by().values(**{
+        "key": Concat(_text(f"{kind}-"), ref, output_field=CharField()),
+        "kind": _text(kind),
+        "ref": ref,
+        "row_type": row_type,
+        "row_amount": amount,
+        "row_currency": currency,
+        "row_status": status,
+        "row_source": source,
+        "row_detail": detail if detail is not None else _text(""),
+        "row_at": F("created_at"),
+    })
+
+
+def history_querysets(user, types=None, start=None, end=None):
+    """
+    One ``.values()`` queryset per source, projected onto the same
+    columns and filtered, ready to be combined with UNION ALL.
+    """
+    querysets = [
+        # 1️⃣ Credit Transactions (internal credit-based ledger)
+        _projection(
+            CreditTransaction.objects.filter(user=user), "credit",
+            row_type=F("transaction_type"), amount=F("amount"), currency=_text("CREDITS"),
+            status=_text("succeeded"), source=F("source"),
+        ),
+        # 2️⃣ Wallet (Fiat Deposits / Withdrawals)
+        _projection(
+            CreditWalletTransaction.objects.filter(user=user), "wallet",
+            row_type=F("type"), amount=F("amount"), currency=_text("USD"),
+            status=F("status"), source=F("provider"),
+        ),
+        # 3️⃣ Coin Purchases
+        _projection(
+            CoinPurchase.objects.filter(user=user), "coin",
+            row_type=_text("purchase"), amount=F("coin_amount"), currency=F("currency"),
+            status=_text("succeeded"), source=F("provider"),
+        ),
+        # 4️⃣ Payment Transactions (Scrimmages, Events, Memberships)
+        _projection(
+            PaymentTransaction.objects.filter(user=user), "payment",
+            row_type=F("app_source"), amount=F("amount"), currency=F("currency"),
+            status=F("status"), source=F("provider"), detail=F("method"),
+        ),
+    ]
+    if types:
+        querysets = [qs.filter(row_type__in=types) for qs in querysets]
+    if start is not None:
+        querysets = [qs.filter(row_at__gte=start) for qs in querysets]
+    if end is not None:
+        querysets = [qs.filter(row_at__lt=end) for qs in querysets]
+    return querysets
+
+
+def _describe(row):
+    kind, row_type = row["kind"], row["row_type"]
+    if kind == "credit":
+        return f"{row_type.title()} from {row['row_source']}"
+    if kind == "wallet":
+        return f"Wallet {row_type.title()} via {row['row_source']}"
+    if kind == "coin":
+        return f"Purchased {row['row_amount']} ProjectCoins"
+    return f"{row_type.title()} payment ({row['row_detail']})"
+
+
+def to_history_entry(row):
+    ref = row["ref"]
+    if row["kind"] == "payment":
+        ref = str(uuid.UUID(ref))  # same id format on every backend
+    return {
+        "id": f"{row['kind']}-{ref}",
+        "type": row["row_type"],
+        "amount": row["row_amount"],
+        "currency": row["row_currency"],
+        "status": row["row_status"],
+        "source": row["row_source"],
+        "description": _describe(row),
+        "created_at": row["row_at"],
+    }
+
+
 class TransactionHistoryViewSet(viewsets.ViewSet):
     """
     Unified transaction history for a user across all payment systems:
@@ -19,77 +114,33 @@ class TransactionHistoryViewSet(viewsets.ViewSet):
     - Fiat deposits & withdrawals
     - Coin purchases
     - App-based payments (scrimmages, events, memberships)
+
+    The sources are merged in the database (UNION ALL) and paginated by
+    a (created_at, id) cursor, newest first. Filters:
+    ?type=deposit,membership  ?start= & ?end= (ISO datetimes, end exclusive)
     """
     permission_classes = [IsAuthenticated]
+    pagination_class = HistoryCursorPagination
 
     def list(self, request):
-        user = request.user
+        params = request.query_params
+        types = [value for value in params.get("type", "").split(",") if value]
+        bounds = {}
+        for name in ("start", "end"):
+            raw = params.get(name)
+            if not raw:
+                continue
+            try:
+                bounds[name] = parse_datetime(raw)
+            except ValueError:
+                bounds[name] = None
+            if bounds[name] is None:
+                raise ValidationError({name: "Expected an ISO 8601 datetime."})
+            if settings.USE_TZ and timezone.is_naive(bounds[name]):
+                # Compared with aware created_at columns
+                bounds[name] = timezone.make_aware(bounds[name])
 
-        # 1️⃣ Credit Transactions (internal credit-based ledger)
-        credit_txns = [
-            {
-                "id": f"credit-{t.id}",
-                "type": "credit" if t.transaction_type == "credit" else "debit",
-                "amount": t.amount,
-                "currency": "CREDITS",
-                "status": "succeeded",
-                "source": t.source,
-                "description": f"{t.transaction_type.title()} from {t.source}",
-                "created_at": t.created_at,
-            }
-            for t in CreditTransaction.objects.filter(user=user)
-        ]
-
-        # 2️⃣ Wallet (Fiat Deposits / Withdrawals)
-        wallet_txns = [
-            {
-                "id": f"wallet-{t.id}",
-                "type": t.type,
-                "amount": t.amount,
-                "currency": "USD",
-                "status": t.status,
-                "source": t.provider,
-                "description": f"Wallet {t.type.title()} via {t.provider}",
-                "created_at": t.created_at,
-            }
-            for t in CreditWalletTransaction.objects.filter(user=user)
-        ]
-
-        # 3️⃣ Coin Purchases
-        coin_txns = [
-            {
-                "id": f"coin-{t.id}",
-                "type": "purchase",
-                "amount": t.coin_amount,
-                "currency": t.currency,
-                "status": "succeeded",
-                "source": t.provider,
-                "description": f"Purchased {t.coin_amount} ProjectCoins",
-                "created_at": t.created_at,
-            }
-            for t in CoinPurchase.objects.filter(user=user)
-        ]
-
-        # 4️⃣ Payment Transactions (Scrimmages, Events, Memberships)
-        payment_txns = [
-            {
-                "id": f"payment-{t.id}",
-                "type": t.app_source,
-                "amount": t.amount,
-                "currency": t.currency,
-                "status": t.status,
-                "source": t.provider,
-                "description": f"{t.app_source.title()} payment ({t.method})",
-                "created_at": t.created_at,
-            }
-            for t in PaymentTransaction.objects.filter(user=user)
-        ]
-
-        # 5️⃣ Combine all and sort chronologically
-        combined = sorted(
-            chain(credit_txns, wallet_txns, coin_txns, payment_txns),
-            key=lambda x: x["created_at"],
-            reverse=True,
-        )
-
-        return Response(TransactionHistorySerializer(combined, many=True).data)
+        paginator = self.pagination_class()
+        rows = paginator.paginate_queryset(history_querysets(request.user, types, **bounds), request, view=self)
+        data = TransactionHistorySerializer([to_history_entry(row) for row in rows], many=True).data
+        return paginator.get_paginated_response(data)
@@ -1,7 +1,9 @@
 # payments/views_transactions.py
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from rest_framework import status, viewsets
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from django.conf import settings
@@ -19,9 +21,29 @@ from rest_framework.decorators import action
 from .utils import (
     process_topup_with_bonus, bulk_refund, distribute_prize_pool
 )
+from .idempotency import idempotent
 from decimal import Decimal
 
 
+def _query_datetime(params, name):
+    """
+    ISO datetime query parameter, or None if absent. Naive values are taken
+    in the current time zone so they compare with aware timestamps.
+    """
+    raw = params.get(name)
+    if not raw:
+        return None
+    try:
+        value = parse_datetime(raw)
+    except ValueError:  # well-formed but out of range, e.g. month 13
+        value = None
+    if value is None:
+        raise ValidationError({name: "Expected an ISO 8601 datetime."})
+    if settings.USE_TZ and timezone.is_naive(value):
+        value = timezone.make_aware(value)
+    return value
+
+
 class PaymentTransactionViewSet(viewsets.ModelViewSet):
     """
     Handles general payment operations and custom on-demand charges.
@@ -33,6 +55,7 @@ class PaymentTransactionViewSet(viewsets.ModelViewSet):
         return PaymentTransaction.objects.filter(user=self.request.user)
 
     @action(detail=False, methods=["post"])
+    @idempotent
     def create_intent(self, request):
         """
         Create an on-demand one-time payment intent.
@@ -108,6 +131,7 @@ class CreditWalletViewSet(viewsets.ViewSet):
         return Response(CreditWalletSerializer(wallet).data)
 
     @action(detail=False, methods=["post"])
+    @idempotent
     def topup(self, request):
         """
         Add credits to the user's wallet (simulate Stripe/PayPal purchase).
@@ -129,6 +153,7 @@ class CreditWalletViewSet(viewsets.ViewSet):
         return Response({"balance": str(wallet.balance)})
 
     @action(detail=False, methods=["post"])
+    @idempotent
     def spend(self, request):
         """
         Spend credits for purchases (scrimmages, tickets, etc.)
@@ -155,8 +180,40 @@ class CreditWalletViewSet(viewsets.ViewSet):
     def history(self, request):
         txns = CreditTransaction.objects.filter(user=request.user).order_by("-created_at")
         return Response(CreditTransactionSerializer(txns, many=True).data)
+
+    @action(detail=False, methods=["get"])
+    def statement(self, request):
+        """
+        Ledger statement for ?start= & ?end= (ISO datetimes; default: the last 30 days).
+        Opening balance comes from the ledger, not from re-summing history.
+        """
+        from datetime import timedelta
+        from .ledger import statement
+
+        end = _query_datetime(request.query_params, "end") or timezone.now()
+        start = _query_datetime(request.query_params, "start") or end - timedelta(days=30)
+        if start >= end:
+            return Response({"detail": "start must be before end"}, status=400)
+
+        result = statement(self.get_wallet(request.user), start, end)
+        entries = result.pop("entries")
+        return Response({
+            **{key: str(value) for key, value in result.items()},
+            "entries": [
+                {
+                    "id": entry.transaction_id,
+                    "amount": str(entry.amount),
+                    "balance_after": str(entry.balance_after),
+                    "source": entry.source,
+                    "reason": entry.reason,
+                    "created_at": entry.created_at,
+                }
+                for entry in entries
+            ],
+        })
     
     @action(detail=False, methods=["post"])
+    @idempotent
     def topup_with_bonus(self, request):
         amount = Decimal(request.data.get("amount", "0"))
         if amount <= 0:
@@ -166,6 +223,7 @@ class CreditWalletViewSet(viewsets.ViewSet):
 
     # 🟩 Add after topup_with_bonus()
     @action(detail=False, methods=["post"])
+    @idempotent
     def add_credits(self, request):
         """
         Add fiat-purchased credits to wallet (after payment confirmation).
@@ -181,6 +239,7 @@ class CreditWalletViewSet(viewsets.ViewSet):
         return Response(result, status=200)
 
     @action(detail=False, methods=["post"])
+    @idempotent
     def withdraw_credits(self, request):
         """
         Request fiat withdrawal from wallet.
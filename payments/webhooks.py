@@ -0,0 +1,238 @@
+# payments/webhooks.py
+"""
+Webhook ingestion queue.
+
+The webhook views only verify the signature and ``ingest`` the event: one
+INSERT under a unique (provider, event id), then a 200. Provider
+redeliveries of the same event hit the unique index and are acknowledged
+without being stored again, so wallets are never credited twice.
+
+The ``process_webhook_events`` worker applies stored events:
+
+- each event runs in its own transaction, so a failure leaves nothing
+  half-applied and the retry starts clean
+- failures are retried with exponential backoff; after
+  PAYMENTS_WEBHOOK_MAX_ATTEMPTS (default 8) the event is dead-lettered
+  (status "dead") for inspection
+- ``replay`` (the ``replay_webhook_events`` command) queues dead-lettered
+  events, or a backlog still backing off, for immediate processing after
+  a fix or an outage; processed events are never applied twice
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from notifications.models import Notification
+from membership.models import Membership, MembershipPlan
+from membership.views import extend_period
+from workqueue import WorkQueue
+
+from .models import CoinPurchase, CreditWallet, PaymentTransaction, WebhookEvent
+from .utils import add_credits
+
+STRIPE_SUCCEEDED = ("checkout.session.completed", "payment_intent.succeeded", "invoice.paid")
+STRIPE_FAILED = ("invoice.payment_failed", "payment_intent.payment_failed")
+PAYPAL_SUCCEEDED = ("PAYMENT.SALE.COMPLETED", "BILLING.SUBSCRIPTION.RENEWED")
+PAYPAL_FAILED = ("PAYMENT.SALE.DENIED", "BILLING.SUBSCRIPTION.SUSPENDED")
+
+
+class WebhookError(Exception):
+    """The event cannot be applied (yet); it is retried, then dead-lettered."""
+
+
+def max_attempts():
+    return getattr(settings, "PAYMENTS_WEBHOOK_MAX_ATTEMPTS", 8)
+
+
+def ingest(provider, event_id, event_type, payload):
+    """Store a verified event once. Returns (event, created)."""
+    try:
+        with transaction.atomic():
+            event = WebhookEvent.objects.create(
+                provider=provider, event_id=event_id, event_type=event_type or "", payload=payload
+            )
+        return event, True
+    except IntegrityError:
+        return WebhookEvent.objects.get(provider=provider, event_id=event_id), False
+
+
+# ============================================================
+# ✅ Processing (moved from the webhook views)
+# ============================================================
+
+def _user(user_id):
+    if not user_id:
+        return None
+    user = get_user_model().objects.filter(id=user_id).first()
+    if user is None:
+        raise WebhookError(f"User {user_id} not found.")
+    return user
+
+
+def _renew_membership(user, plan, title, body):
+    membership = (
+        Membership.objects.filter(user=user, plan=plan).order_by("-started_at").first()
+        or Membership.objects.create(
+            user=user, plan=plan, status="active", started_at=timezone.now(), current_period_end=timezone.now()
+        )
+    )
+    extend_period(membership)
+    Notification.objects.create(user=user, kind="payment", title=title, body=body, url="/memberships")
+
+
+def process_stripe_event(payload):
+    event_type = payload.get("type", "")
+    data = payload["data"]["object"]
+    metadata = data.get("metadata") or {}
+    purpose = metadata.get("purpose")  # 'coin_purchase' | 'credit_topup' | membership
+    plan_id = metadata.get("plan_id")
+    user = _user(metadata.get("user_id"))
+    plan = MembershipPlan.objects.filter(id=plan_id).first() if plan_id else None
+
+    provider_ref = data.get("id") or data.get("payment_intent") or data.get("invoice")
+    # checkout.session.completed and payment_intent.succeeded both arrive for
+    # one payment; the PaymentIntent id is what they have in common
+    payment_ref = data.get("payment_intent") or data.get("id") or ""
+    amount_usd = Decimal(data.get("amount_total") or data.get("amount") or 0) / 100
+
+    if event_type in STRIPE_SUCCEEDED:
+        if user and plan:
+            PaymentTransaction.objects.create(
+                user=user, app_source="membership",
+                related_id=str(plan_id),
+                amount=plan.price,
+                currency=plan.currency,
+                provider="stripe", method="card",
+                provider_ref=provider_ref or "", status="succeeded",
+                processed_at=timezone.now()
+            )
+            _renew_membership(
+                user, plan,
+                title="Stripe payment successful",
+                body=f"Your {plan.name} plan was renewed successfully.",
+            )
+
+        if purpose == "credit_topup" and user:
+            add_credits(user, amount_usd, provider="stripe", reference=payment_ref)
+
+    elif event_type in STRIPE_FAILED:
+        if user:
+            PaymentTransaction.objects.create(
+                user=user, app_source="membership", related_id=str(plan_id),
+                amount=Decimal(data.get("amount_due") or 0) / 100,
+                currency=(data.get("currency") or "USD").upper(),
+                provider="stripe", method="card",
+                provider_ref=provider_ref or "", status="failed"
+            )
+            Notification.objects.create(
+                user=user, kind="payment",
+                title="Stripe payment failed",
+                body="Your payment could not be processed. Please update billing info.",
+                url="/billing"
+            )
+
+    # Handle Coin Purchases
+    if event_type in ("checkout.session.completed", "payment_intent.succeeded") and purpose == "coin_purchase":
+        if not user:
+            raise WebhookError("Coin purchase without a user.")
+        if not payment_ref:
+            raise WebhookError("Coin purchase without a payment reference.")
+        currency = (data.get("currency") or "usd").upper()
+        rate = Decimal(1)  # 1 USD = 1 Coin (static peg)
+        coins = amount_usd / rate
+        _, created = CoinPurchase.objects.get_or_create(
+            provider="stripe",
+            transaction_ref=payment_ref,
+            defaults={
+                "user": user,
+                "amount_fiat": amount_usd,
+                "coin_amount": coins,
+                "exchange_rate": rate,
+                "currency": currency,
+            },
+        )
+        if not created:
+            return  # the other event of the same payment was applied
+        wallet, _ = CreditWallet.objects.get_or_create(user=user)
+        wallet.deposit(coins, source="purchase_coin", reason=payment_ref)
+        Notification.objects.create(
+            user=user,
+            kind="wallet",
+            title="Coin Purchase Successful",
+            body=f"You purchased {coins} ProjectCoins worth {amount_usd} {currency}.",
+            url="/wallet",
+        )
+
+
+def process_paypal_event(payload):
+    event_type = payload.get("event_type")
+    resource = payload.get("resource") or {}
+
+    custom_id = resource.get("custom_id") or resource.get("billing_agreement_id") or ""
+    user_id, _, plan_id = custom_id.partition(":")
+    provider_ref = resource.get("id") or resource.get("sale_id") or ""
+    amount_data = resource.get("amount") or {}
+    amount = Decimal(str(amount_data.get("value") or amount_data.get("total") or 0))
+    currency = amount_data.get("currency_code") or amount_data.get("currency") or "USD"
+
+    user = _user(user_id if user_id.isdigit() else None)
+    plan = MembershipPlan.objects.filter(id=plan_id).first() if plan_id.isdigit() else None
+
+    if event_type in PAYPAL_SUCCEEDED:
+        if event_type == "PAYMENT.SALE.COMPLETED" and "credit_topup" in custom_id and user:
+            add_credits(user, amount, provider="paypal", reference=provider_ref)
+
+        if user and plan:
+            PaymentTransaction.objects.create(
+                user=user, app_source="membership", related_id=str(plan_id),
+                amount=amount, currency=currency,
+                provider="paypal", method="wallet",
+                provider_ref=provider_ref, status="succeeded",
+                processed_at=timezone.now()
+            )
+            _renew_membership(
+                user, plan,
+                title="PayPal payment successful",
+                body=f"Your {plan.name} plan was renewed successfully via PayPal.",
+            )
+
+    elif event_type in PAYPAL_FAILED:
+        if user:
+            Notification.objects.create(
+                user=user, kind="payment",
+                title="PayPal payment issue",
+                body="Your subscription payment failed or was suspended.",
+                url="/billing"
+            )
+
+
+PROCESSORS = {"stripe": process_stripe_event, "paypal": process_paypal_event}
+
+
+# ============================================================
+# ✅ Worker
+# ============================================================
+
+queue = WorkQueue(WebhookEvent, max_attempts=max_attempts, dead="dead", label="Webhook event")
+
+
+def _apply(event):
+    PROCESSORS[event.provider](event.payload)
+
+
+def process_pending(limit=50):
+    """Process one batch of due events. Returns {"done", "retry", "dead"} counts."""
+    return queue.process(limit, _apply)
+
+
+def replay(events):
+    """
+    Make the dead or pending ``events`` (a WebhookEvent queryset) due now
+    with a fresh attempt budget. Returns how many were queued.
+    """
+    return events.filter(status__in=["dead", "pending"]).update(
+        status="pending", attempts=0, available_at=timezone.now(), claimed_at=None
+    )
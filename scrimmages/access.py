@@ -0,0 +1,51 @@
+# scrimmages/access.py
+"""
+Scrimmage visibility resolution.
+
+Each way a user can be entitled to see a scrimmage is a separate EXISTS
+subquery (or a plain column test) ORed together on the scrimmage row. No
+branch joins a to-many relation, so the result never fans out and needs
+no DISTINCT. Every subquery probes an indexed column: rsvps by
+(user, scrimmage), group members by (user, group), leagues by pk.
+"""
+from django.db.models import Exists, OuterRef, Q
+
+from groups.models import GroupMember
+from leagues.models import League
+
+from .models import Scrimmage, ScrimmageRSVP
+
+
+# Statuses anonymous visitors may browse
+PUBLIC_STATUSES = ("upcoming", "ongoing")
+
+
+def visibility_filter(user):
+    """Q object selecting the scrimmages ``user`` may see."""
+    if not user or not user.is_authenticated:
+        return Q(visibility="public", status__in=PUBLIC_STATUSES)
+
+    is_participant = Exists(
+        ScrimmageRSVP.objects.filter(scrimmage=OuterRef("pk"), user=user)
+    )
+    is_group_member = Exists(
+        GroupMember.objects.filter(group=OuterRef("group_id"), user=user)
+    )
+    # Leagues have no member table yet; the owner is their only member.
+    is_league_member = Exists(
+        League.objects.filter(pk=OuterRef("league_id"), owner=user)
+    )
+    return (
+        Q(visibility="public")
+        | Q(host=user)
+        | is_participant
+        | is_group_member
+        | is_league_member
+    )
+
+
+def visible_scrimmages(user, queryset=None):
+    """Filter ``queryset`` (default: all scrimmages) to what ``user`` may see."""
+    if queryset is None:
+        queryset = Scrimmage.objects.all()
+    return queryset.filter(visibility_filter(user))
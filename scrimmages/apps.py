@@ -8,3 +8,5 @@ class ScrimmagesConfig(AppConfig):
     def ready(self):
         # register signals
         from . import signals  # noqa
+        # register outbox handlers
+        from . import side_effects  # noqa
@@ -0,0 +1,176 @@
+# scrimmages/cache.py
+"""
+Shared response cache for anonymous scrimmage browsing.
+
+Anonymous visitors all see the same public queryset, so list and detail
+responses are cached per query string. Entries are never deleted one by
+one; instead every key embeds a version number:
+
+- a list generation, bumped whenever a public listing can change
+- a per-scrimmage version, bumped whenever that scrimmage or its RSVPs change
+
+Bumping a version makes every older entry unreachable and they age out
+on their own. Versions are bumped by the handlers in signals.py, once
+immediately and once after the surrounding transaction commits (so a
+request racing the write cannot re-cache pre-commit data).
+
+The versions only work if every web worker sees the same counters, so
+the alias must name a shared backend (Redis, Memcached, database). On a
+per-process backend (LocMem, dummy) the cache stays off: a bump in one
+worker would leave the others serving stale entries.
+
+Settings:
+- SCRIMMAGE_CACHE_ALIAS       (default "default"; must be a shared backend)
+- SCRIMMAGE_CACHE_TIMEOUT     (seconds, default 300; 0 disables the cache)
+- SCRIMMAGE_CACHE_ALLOW_LOCAL (default False; True allows a per-process
+  backend, for a single-process server or tests)
+"""
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+
+PREFIX = "scrimmages"
+LIST_GENERATION_KEY = f"{PREFIX}:list-gen"
+STATS_KEYS = {"hits": f"{PREFIX}:stats:hits", "misses": f"{PREFIX}:stats:misses"}
+
+
+def get_cache():
+    return caches[getattr(settings, "SCRIMMAGE_CACHE_ALIAS", "default")]
+
+
+def cache_timeout():
+    return getattr(settings, "SCRIMMAGE_CACHE_TIMEOUT", 300)
+
+
+def is_shared(cache):
+    """LocMem and dummy caches live in one process; other workers never see a bump."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def is_enabled():
+    if cache_timeout() <= 0:
+        return False
+    return getattr(settings, "SCRIMMAGE_CACHE_ALLOW_LOCAL", False) or is_shared(get_cache())
+
+
+def _detail_version_key(scrimmage_id):
+    return f"{PREFIX}:detail-ver:{scrimmage_id}"
+
+
+# ============================================================
+# ✅ Versions
+# ============================================================
+
+def _incr(cache, key):
+    """
+    Increment a counter that never expires. A missing (evicted) counter is
+    seeded from the clock so it can't fall back to an already-used value.
+    """
+    cache.add(key, int(time.time() * 1000), timeout=None)
+    try:
+        return cache.incr(key)
+    except ValueError:  # evicted between add and incr
+        cache.set(key, int(time.time() * 1000), timeout=None)
+        return cache.get(key)
+
+
+def _versions(cache, keys):
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            seed = int(time.time() * 1000)
+            cache.add(key, seed, timeout=None)
+            found[key] = cache.get(key, seed)
+    return found
+
+
+def _bump(scrimmage_ids, listings=True):
+    cache = get_cache()
+    if listings:
+        _incr(cache, LIST_GENERATION_KEY)
+    for scrimmage_id in scrimmage_ids:
+        _incr(cache, _detail_version_key(scrimmage_id))
+
+
+def invalidate(scrimmage_id=None, listings=True):
+    """Invalidate cached listings and/or one scrimmage's detail, now and on commit."""
+    invalidate_many([] if scrimmage_id is None else [scrimmage_id], listings)
+
+
+def invalidate_many(scrimmage_ids, listings=True):
+    """Invalidate cached listings and/or several scrimmages' details, now and on commit."""
+    if not is_enabled():
+        return
+    scrimmage_ids = list(scrimmage_ids)
+    _bump(scrimmage_ids, listings)
+    transaction.on_commit(lambda: _bump(scrimmage_ids, listings))
+
+
+# ============================================================
+# ✅ Lookup
+# ============================================================
+
+def response_key(request, scope, scrimmage_id=None):
+    """Versioned cache key for a request: scope, host and sorted query params."""
+    cache = get_cache()
+    params = sorted(
+        (name, value)
+        for name in request.query_params
+        for value in request.query_params.getlist(name)
+    )
+    digest = hashlib.sha1(
+        repr((request.get_host(), scope, params)).encode()
+    ).hexdigest()
+
+    if scrimmage_id is None:
+        version = _versions(cache, [LIST_GENERATION_KEY])[LIST_GENERATION_KEY]
+        return f"{PREFIX}:resp:{scope}:{version}:{digest}"
+    version_key = _detail_version_key(scrimmage_id)
+    version = _versions(cache, [version_key])[version_key]
+    return f"{PREFIX}:resp:{scope}:{scrimmage_id}:{version}:{digest}"
+
+
+def get_response_data(key):
+    cache = get_cache()
+    data = cache.get(key)
+    _incr_stat(cache, "misses" if data is None else "hits")
+    return data
+
+
+def set_response_data(key, data):
+    get_cache().set(key, data, timeout=cache_timeout())
+
+
+# ============================================================
+# ✅ Hit / miss counters
+# ============================================================
+
+def _incr_stat(cache, name):
+    key = STATS_KEYS[name]
+    cache.add(key, 0, timeout=None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, timeout=None)
+
+
+def stats():
+    cache = get_cache()
+    values = cache.get_many(list(STATS_KEYS.values()))
+    hits = values.get(STATS_KEYS["hits"], 0)
+    misses = values.get(STATS_KEYS["misses"], 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else None,
+    }
+
+
+def reset_stats():
+    get_cache().delete_many(list(STATS_KEYS.values()))
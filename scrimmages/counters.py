@@ -0,0 +1,151 @@
+# scrimmages/counters.py
+"""
+Denormalized RSVP counters stored on Scrimmage.
+
+Every RSVP status has its own ``<status>_count`` column. Counters are only
+changed with database-side arithmetic (F expressions), so concurrent RSVP
+writes never lose updates, and they are applied in the same transaction as
+the RSVP row change (see ScrimmageRSVP.save and the post_delete handler in
+signals.py).
+"""
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Value
+from django.db.models.functions import Greatest
+
+from .cache import invalidate
+from .models import Scrimmage, ScrimmageRSVP
+
+
+STATUS_COUNTER_FIELDS = {status: f"{status}_count" for status, _ in ScrimmageRSVP.STATUS}
+
+# Statuses that occupy a seat (used for spots_left)
+SEAT_STATUSES = ("going", "checked_in", "completed")
+
+
+def counter_field(status):
+    return STATUS_COUNTER_FIELDS.get(status)
+
+
+def status_change_updates(old_status, new_status, count=1):
+    """
+    Build the ``.update()`` kwargs moving ``count`` RSVPs from ``old_status``
+    to ``new_status``. Either side may be None (create / delete).
+    """
+    updates = {}
+    if old_status == new_status or not count:
+        return updates
+    old_field = counter_field(old_status)
+    new_field = counter_field(new_status)
+    if old_field:
+        updates[old_field] = Greatest(F(old_field) - count, Value(0))
+    if new_field:
+        updates[new_field] = F(new_field) + count
+    return updates
+
+
+def apply_status_change(scrimmage_id, old_status, new_status, count=1):
+    """
+    Atomically move ``count`` RSVPs between status counters and bump the
+    scrimmage's ``rsvp_version`` (used for ETags). Called for every RSVP
+    write, so the version moves even when the status does not.
+    """
+    updates = status_change_updates(old_status, new_status, count)
+    updates["rsvp_version"] = F("rsvp_version") + 1
+    return Scrimmage.objects.filter(pk=scrimmage_id).update(**updates)
+
+
+class ScrimmageFull(ValidationError):
+    """No seat is free and the scrimmage has no waitlist."""
+
+
+def seats_taken_expression():
+    """SQL counterpart of the seat part of Scrimmage.spots_left."""
+    return F("going_count") + F("checked_in_count") + F("completed_count")
+
+
+def claim_seats(scrimmage_id, from_status, count=1):
+    """
+    Move ``count`` RSVPs from ``from_status`` to going only if that many
+    seats are free, as one conditional UPDATE. The capacity test and the
+    increment happen on the same (write-locked) row, so concurrent claims
+    can never overbook. Returns True if the seats were granted.
+    """
+    updates = status_change_updates(from_status, "going", count)
+    updates["rsvp_version"] = F("rsvp_version") + 1
+    return bool(
+        Scrimmage.objects.filter(
+            pk=scrimmage_id,
+            max_participants__gte=seats_taken_expression() + count,
+        ).update(**updates)
+    )
+
+
+def admit(scrimmage_id, previous_status, status):
+    """
+    Apply an RSVP status change to the counters, deciding going vs
+    waitlisted atomically. Returns the status actually granted; raises
+    ScrimmageFull when no seat is free and the waitlist is disabled.
+    """
+    if status != "going" or previous_status in SEAT_STATUSES:
+        apply_status_change(scrimmage_id, previous_status, status)
+        return status
+    if claim_seats(scrimmage_id, previous_status):
+        return "going"
+
+    waitlist_enabled = (
+        Scrimmage.objects.filter(pk=scrimmage_id).values_list("waitlist_enabled", flat=True).first()
+    )
+    if not waitlist_enabled:
+        raise ScrimmageFull("This scrimmage is full.")
+    apply_status_change(scrimmage_id, previous_status, "waitlisted")
+    return "waitlisted"
+
+
+def count_rsvps(scrimmage_ids):
+    """Recount RSVPs per status from the rsvps table: {scrimmage_id: {field: n}}."""
+    counts = {
+        sid: {field: 0 for field in Scrimmage.COUNTER_FIELDS} for sid in scrimmage_ids
+    }
+    rows = (
+        ScrimmageRSVP.objects.filter(scrimmage_id__in=scrimmage_ids)
+        .values("scrimmage_id", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        field = counter_field(row["status"])
+        if field:
+            counts[row["scrimmage_id"]][field] = row["n"]
+    return counts
+
+
+def rebuild_counters(scrimmage_ids, dry_run=False):
+    """
+    Recompute counters for the given scrimmages and fix any drift.
+    Returns a list of (scrimmage_id, {field: (stored, actual)}) for drifted rows.
+    """
+    drifted = []
+    with transaction.atomic():
+        # Lock the scrimmage rows first: RSVP writes update the same rows, so
+        # they wait until the recount is stored.
+        stored = list(
+            Scrimmage.objects.select_for_update()
+            .filter(pk__in=scrimmage_ids)
+            .values("pk", *Scrimmage.COUNTER_FIELDS)
+        )
+        actual = count_rsvps(scrimmage_ids)
+        for row in stored:
+            expected = actual[row["pk"]]
+            diff = {
+                field: (row[field], expected[field])
+                for field in Scrimmage.COUNTER_FIELDS
+                if row[field] != expected[field]
+            }
+            if not diff:
+                continue
+            drifted.append((row["pk"], diff))
+            if not dry_run:
+                Scrimmage.objects.filter(pk=row["pk"]).update(**expected)
+                invalidate(row["pk"])
+    return drifted
@@ -0,0 +1,153 @@
+# scrimmages/geo.py
+"""
+Proximity helpers that work on any database (no PostGIS required).
+
+Scrimmages store a geohash of their coordinates in an indexed column.
+A radius query first narrows candidates to the geohash cells around the
+centre (a handful of indexed prefix lookups), then computes the exact
+haversine distance in SQL for the survivors.
+"""
+import math
+
+from django.db.models import F, FloatField, Q, Value
+from django.db.models.functions import ASin, Cos, Least, Power, Radians, Sin, Sqrt
+
+EARTH_RADIUS_KM = 6371.0088
+BOX_MARGIN_DEGREES = 1e-6  # ~0.1 m; absorbs float rounding at the edge
+
+GEOHASH_PRECISION = 9  # ~5 m cells; plenty for venue coordinates
+_BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+# ============================================================
+# ✅ Geohash encoding
+# ============================================================
+
+def encode_geohash(latitude, longitude, precision=GEOHASH_PRECISION):
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    bit_count = 0
+    even = True  # even bits refine longitude
+    while len(chars) < precision:
+        rng, value = (lon_range, longitude) if even else (lat_range, latitude)
+        mid = (rng[0] + rng[1]) / 2
+        bits <<= 1
+        if value >= mid:
+            bits |= 1
+            rng[0] = mid
+        else:
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(_BASE32[bits])
+            bits = 0
+            bit_count = 0
+    return "".join(chars)
+
+
+def cell_size_degrees(precision):
+    """(lat_degrees, lon_degrees) covered by one geohash cell."""
+    total_bits = 5 * precision
+    lon_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (2 ** lat_bits), 360.0 / (2 ** lon_bits)
+
+
+def bounding_box(latitude, longitude, radius_km):
+    """
+    (min_lat, max_lat, min_lon, max_lon, lat_span, lon_span) enclosing the
+    circle on the sphere haversine_expression measures on. The longitude
+    half-span is the exact one, asin(sin(r/R) / cos(lat)); it is 360 when
+    the circle reaches a pole.
+    """
+    angular = radius_km / EARTH_RADIUS_KM
+    lat_span = math.degrees(angular) + BOX_MARGIN_DEGREES
+    cos_lat = math.cos(math.radians(latitude))
+    if angular >= math.pi / 2 or math.sin(angular) >= cos_lat:
+        lon_span = 360.0
+    else:
+        lon_span = min(math.degrees(math.asin(math.sin(angular) / cos_lat)) + BOX_MARGIN_DEGREES, 360.0)
+    return (
+        max(latitude - lat_span, -90.0),
+        min(latitude + lat_span, 90.0),
+        longitude - lon_span,
+        longitude + lon_span,
+        lat_span,
+        lon_span,
+    )
+
+
+def covering_prefixes(latitude, longitude, radius_km):
+    """
+    Geohash prefixes whose cells cover the circle: the centre cell and its
+    eight neighbours, at the finest precision whose cells are at least as
+    large as the radius. Returns [] when the circle is too large to benefit
+    from a prefilter.
+    """
+    _, _, _, _, lat_span, lon_span = bounding_box(latitude, longitude, radius_km)
+    precision = 0
+    for candidate in range(GEOHASH_PRECISION, 0, -1):
+        cell_lat, cell_lon = cell_size_degrees(candidate)
+        if cell_lat >= lat_span and cell_lon >= lon_span:
+            precision = candidate
+            break
+    if not precision:
+        return []
+
+    cell_lat, cell_lon = cell_size_degrees(precision)
+    prefixes = set()
+    for dlat in (-cell_lat, 0.0, cell_lat):
+        lat = latitude + dlat
+        if lat < -90.0 or lat > 90.0:
+            continue
+        for dlon in (-cell_lon, 0.0, cell_lon):
+            lon = (longitude + dlon + 180.0) % 360.0 - 180.0
+            prefixes.add(encode_geohash(lat, lon, precision))
+    return sorted(prefixes)
+
+
+# ============================================================
+# ✅ Query building
+# ============================================================
+
+def proximity_prefilter(latitude, longitude, radius_km, field="geohash"):
+    """
+    Q object narrowing rows to the cells around the point. Each prefix is a
+    ``startswith`` lookup, so it does not depend on the column's collation
+    (a ``prefix + "{"`` upper bound would). On PostgreSQL it is served by
+    the ``_like`` (varchar_pattern_ops) index Django adds for the indexed
+    CharField.
+    """
+    min_lat, max_lat, min_lon, max_lon, _, _ = bounding_box(latitude, longitude, radius_km)
+    condition = Q(latitude__gte=min_lat, latitude__lte=max_lat)
+    if min_lon >= -180.0 and max_lon <= 180.0:
+        condition &= Q(longitude__gte=min_lon, longitude__lte=max_lon)
+
+    prefixes = covering_prefixes(latitude, longitude, radius_km)
+    if prefixes:
+        cells = Q()
+        for prefix in prefixes:
+            cells |= Q(**{f"{field}__startswith": prefix})
+        condition &= cells
+    return condition
+
+
+def haversine_expression(latitude, longitude):
+    """SQL expression for the great-circle distance (km) from a point."""
+    dlat = Radians(F("latitude") - Value(latitude)) / 2
+    dlon = Radians(F("longitude") - Value(longitude)) / 2
+    a = Power(Sin(dlat), 2) + Value(math.cos(math.radians(latitude))) * Cos(
+        Radians(F("latitude"))
+    ) * Power(Sin(dlon), 2)
+    return Value(2 * EARTH_RADIUS_KM) * ASin(Least(Sqrt(a), Value(1.0)), output_field=FloatField())
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Python equivalent of haversine_expression (for tests and scripts)."""
+    dlat = math.radians(lat2 - lat1) / 2
+    dlon = math.radians(lon2 - lon1) / 2
+    a = math.sin(dlat) ** 2 + math.cos(math.radians(lat1)) * math.cos(math.radians(lat2)) * math.sin(dlon) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(math.sqrt(a), 1.0))
@@ -0,0 +1,35 @@
+# scrimmages/imaging.py
+"""
+Image resizing run inside the rendition worker's process pool.
+
+Kept free of Django imports: pool processes only unpickle and call
+``render_renditions``, they never touch settings or the database.
+"""
+import io
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+
+def render_renditions(source, sizes, quality=82):
+    """
+    Resize image bytes to each (label, max_width, max_height) in ``sizes``,
+    keeping the aspect ratio and never upscaling.
+    Returns [(label, width, height, jpeg_bytes)].
+    """
+    if Image is None:
+        raise RuntimeError("Pillow is not installed.")
+    with Image.open(io.BytesIO(source)) as original:
+        original = ImageOps.exif_transpose(original)
+        if original.mode not in ("RGB", "L"):
+            original = original.convert("RGB")
+        renditions = []
+        for label, max_width, max_height in sizes:
+            image = original.copy()
+            image.thumbnail((max_width, max_height), Image.LANCZOS)
+            out = io.BytesIO()
+            image.save(out, "JPEG", quality=quality, optimize=True, progressive=True)
+            renditions.append((label, image.width, image.height, out.getvalue()))
+        return renditions
@@ -0,0 +1,132 @@
+# scrimmages/management/commands/benchmark_scrimmage_visibility.py
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from groups.models import Group, GroupMember
+from scrimmages.access import visible_scrimmages
+from scrimmages.models import Scrimmage, ScrimmageRSVP
+
+
+def legacy_visible_scrimmages(user, queryset):
+    """The previous OR-join + DISTINCT visibility query, kept for comparison."""
+    return queryset.filter(
+        Q(visibility="public")
+        | Q(host=user)
+        | Q(rsvps__user=user)
+        | Q(group__members__user=user)
+    ).distinct()
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a throwaway dataset and compare the legacy OR-join visibility query "
+        "with the EXISTS-based one. All seeded rows are rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=300)
+        parser.add_argument("--scrimmages", type=int, default=5000)
+        parser.add_argument("--groups", type=int, default=50)
+        parser.add_argument("--rsvps-per-scrimmage", type=int, default=15)
+        parser.add_argument("--members-per-group", type=int, default=40)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=20)
+        parser.add_argument("--explain", action="store_true", help="Print both query plans.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        random.seed(options["seed"])
+        with transaction.atomic():
+            viewer = self.seed(options)
+            self.compare(viewer, options)
+            transaction.set_rollback(True)
+
+    # ----------------------------
+    # Dataset
+    # ----------------------------
+
+    def seed(self, options):
+        User = get_user_model()
+        run = int(time.time())
+        users = [
+            User.objects.create_user(email=f"bench-{run}-{i}@example.invalid", password=None)
+            for i in range(options["users"])
+        ]
+        groups = Group.objects.bulk_create(
+            Group(owner=random.choice(users), name=f"Bench {i}", slug=f"bench-{run}-{i}")
+            for i in range(options["groups"])
+        )
+        members = []
+        for group in groups:
+            for user in random.sample(users, min(options["members_per_group"], len(users))):
+                members.append(GroupMember(group=group, user=user))
+        GroupMember.objects.bulk_create(members, batch_size=1000)
+
+        now = timezone.now()
+        visibilities = ["public", "members", "private"]
+        scrimmages = Scrimmage.objects.bulk_create(
+            (
+                Scrimmage(
+                    title=f"Bench scrimmage {i}",
+                    host=random.choice(users),
+                    group=random.choice(groups + [None]),
+                    visibility=random.choice(visibilities),
+                    status="upcoming",
+                    start_datetime=now + timedelta(hours=i),
+                    end_datetime=now + timedelta(hours=i + 2),
+                )
+                for i in range(options["scrimmages"])
+            ),
+            batch_size=1000,
+        )
+        rsvps = []
+        for scrim in scrimmages:
+            for user in random.sample(users, min(options["rsvps_per_scrimmage"], len(users))):
+                rsvps.append(ScrimmageRSVP(scrimmage=scrim, user=user, status="going"))
+        ScrimmageRSVP.objects.bulk_create(rsvps, batch_size=1000)
+
+        self.stdout.write(
+            f"Seeded {len(users)} users, {len(groups)} groups, {len(members)} memberships, "
+            f"{len(scrimmages)} scrimmages, {len(rsvps)} RSVPs."
+        )
+        return users[0]
+
+    # ----------------------------
+    # Measurements
+    # ----------------------------
+
+    def compare(self, viewer, options):
+        base = Scrimmage.objects.order_by("start_datetime", "id")
+        variants = [
+            ("legacy OR-join + DISTINCT", legacy_visible_scrimmages(viewer, base)),
+            ("EXISTS subqueries", visible_scrimmages(viewer, base)),
+        ]
+
+        counts = {label: qs.count() for label, qs in variants}
+        if len(set(counts.values())) != 1:
+            self.stderr.write(self.style.ERROR(f"Result sets differ: {counts}"))
+
+        for label, qs in variants:
+            count_ms = self.time(lambda: qs.count(), options["repeat"])
+            page_ms = self.time(lambda: list(qs[: options["page_size"]]), options["repeat"])
+            self.stdout.write(
+                f"{label:<28} rows={counts[label]:<7} count: {count_ms:8.2f} ms   "
+                f"first page: {page_ms:8.2f} ms"
+            )
+            if options["explain"]:
+                self.stdout.write(f"--- plan ({connection.vendor}) ---")
+                self.stdout.write(qs[: options["page_size"]].explain())
+
+    def time(self, fn, repeat):
+        fn()  # warm up
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) * 1000 / repeat
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from scrimmages.outbox import drain, purge_done
+from workqueue import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = (
+        "Apply queued scrimmage side effects (calendar entries, notifications, "
+        "recurrences) from the outbox. Runs until interrupted unless --once is given."
+    )
+    batch_size = 100
+    summary = "Applied {done}, retrying {retry}, failed {failed}."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--purge-days",
+            type=int,
+            default=None,
+            help="First delete processed events older than this many days.",
+        )
+
+    def prepare(self, options):
+        if options["purge_days"] is not None:
+            purged = purge_done(timedelta(days=options["purge_days"]))
+            self.stdout.write(f"Purged {purged} processed events.")
+
+    def process(self, batch_size):
+        return drain(limit=batch_size)
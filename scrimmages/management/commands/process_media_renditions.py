@@ -0,0 +1,26 @@
+# scrimmages/management/commands/process_media_renditions.py
+from scrimmages.renditions import process_pending_renditions, queue_missing_renditions
+from workqueue import WorkerCommand
+
+
+class Command(WorkerCommand):
+    help = (
+        "Render queued thumbnails for scrimmage gallery images in a process pool. "
+        "Runs until interrupted unless --once is given."
+    )
+    summary = "Rendered {ready}, retrying {retry}, failed {failed}."
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            "--backfill",
+            action="store_true",
+            help="First queue renditions for images attached before the pipeline existed.",
+        )
+
+    def prepare(self, options):
+        if options["backfill"]:
+            self.stdout.write(f"Queued {queue_missing_renditions()} renditions.")
+
+    def process(self, batch_size):
+        return process_pending_renditions(limit=batch_size)
@@ -0,0 +1,17 @@
+# scrimmages/management/commands/purge_upload_sessions.py
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from scrimmages.uploads import purge_stale_uploads
+
+
+class Command(BaseCommand):
+    help = "Delete chunked upload sessions (and their partial files) idle for longer than --hours."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=24)
+
+    def handle(self, *args, **options):
+        purged = purge_stale_uploads(timedelta(hours=options["hours"]))
+        self.stdout.write(self.style.SUCCESS(f"Purged {purged} upload sessions."))
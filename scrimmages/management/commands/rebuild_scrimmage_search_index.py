@@ -0,0 +1,19 @@
+# scrimmages/management/commands/rebuild_scrimmage_search_index.py
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from scrimmages.search import rebuild_index
+
+
+class Command(BaseCommand):
+    help = "Rebuild the scrimmage full-text search index from the scrimmage table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            count = rebuild_index(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {count} scrimmages ({connection.vendor}).")
+        )
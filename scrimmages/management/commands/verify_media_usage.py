@@ -0,0 +1,45 @@
+# scrimmages/management/commands/verify_media_usage.py
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+
+from scrimmages.media_quota import rebuild_media_usage
+
+
+class Command(BaseCommand):
+    help = (
+        "Recount the scrimmage media quota ledger (files and bytes per user and "
+        "per user/scrimmage) from uploads in batches and correct drift."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift; do not write corrected usage.",
+        )
+        parser.add_argument("--user", type=int, action="append", dest="user_ids")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        ids = get_user_model().objects.order_by("pk").values_list("pk", flat=True)
+        if options["user_ids"]:
+            ids = ids.filter(pk__in=options["user_ids"])
+        ids = list(ids)
+
+        checked = 0
+        drifted = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            for user_id, scrimmage_id, (stored, actual) in rebuild_media_usage(batch, dry_run=dry_run):
+                drifted += 1
+                scope = f"scrimmage {scrimmage_id}" if scrimmage_id else "total"
+                self.stdout.write(
+                    f"User {user_id} ({scope}): files/bytes {stored[0]}/{stored[1]} → {actual[0]}/{actual[1]}"
+                )
+            checked += len(batch)
+
+        verb = "found" if dry_run else "fixed"
+        self.stdout.write(self.style.SUCCESS(f"Checked {checked} users, {verb} drift on {drifted} ledger rows."))
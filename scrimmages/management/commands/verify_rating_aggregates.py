@@ -0,0 +1,47 @@
+# scrimmages/management/commands/verify_rating_aggregates.py
+from django.core.management.base import BaseCommand
+
+from scrimmages.models import Scrimmage
+from scrimmages.ratings import rebuild_rating_aggregates
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute scrimmage rating aggregates (sum, count, average) from RSVP "
+        "ratings in batches and correct drift. Safe to run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report drift; do not write corrected aggregates.",
+        )
+        parser.add_argument("--scrimmage", type=int, action="append", dest="scrimmage_ids")
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        dry_run = options["dry_run"]
+
+        ids = Scrimmage.objects.order_by("pk").values_list("pk", flat=True)
+        if options["scrimmage_ids"]:
+            ids = ids.filter(pk__in=options["scrimmage_ids"])
+        ids = list(ids)
+
+        checked = 0
+        drifted = 0
+        for start in range(0, len(ids), batch_size):
+            batch = ids[start:start + batch_size]
+            for scrimmage_id, diff in rebuild_rating_aggregates(batch, dry_run=dry_run):
+                drifted += 1
+                details = ", ".join(
+                    f"{field}: {stored} → {actual}" for field, (stored, actual) in diff.items()
+                )
+                self.stdout.write(f"Scrimmage {scrimmage_id}: {details}")
+            checked += len(batch)
+
+        verb = "found" if dry_run else "fixed"
+        self.stdout.write(
+            self.style.SUCCESS(f"Checked {checked} scrimmages, {verb} drift on {drifted}.")
+        )
@@ -0,0 +1,197 @@
+# scrimmages/media_quota.py
+"""
+Media quota ledger.
+
+Uploads are counted per (user, scrimmage) in ScrimmageMediaUsage and per
+user in MediaUsage. ``charge`` moves both with conditional F() updates
+that only match while the upload still fits, so concurrent uploads cannot
+overshoot the quota and checks never sum the uploads table.
+
+Quotas:
+- files per scrimmage: SCRIMMAGE_MEDIA_MAX_FILES_PER_SCRIMMAGE (default 5)
+- bytes per user:      SCRIMMAGE_MEDIA_MAX_TOTAL_BYTES (default 50 MB)
+
+An active membership whose plan sets ``media_max_*`` overrides the
+default (the most generous active plan wins).
+"""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Count, F, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest
+
+from .models import MediaUsage, ScrimmageMedia, ScrimmageMediaUsage
+
+# Optional imports for integrations
+try:
+    from membership.models import Membership
+except ImportError:
+    Membership = None
+
+
+class MediaQuotaExceeded(ValidationError):
+    pass
+
+
+# ============================================================
+# ✅ Quotas
+# ============================================================
+
+def default_quota():
+    return (
+        getattr(settings, "SCRIMMAGE_MEDIA_MAX_FILES_PER_SCRIMMAGE", 5),
+        getattr(settings, "SCRIMMAGE_MEDIA_MAX_TOTAL_BYTES", 50 * 1024 * 1024),
+    )
+
+
+def quota_for(user_id):
+    """(max files per scrimmage, max total bytes) for ``user_id``."""
+    max_files, max_bytes = default_quota()
+    if Membership is None or user_id is None:
+        return max_files, max_bytes
+    plans = Membership.objects.filter(user_id=user_id, status="active").values_list(
+        "plan__media_max_files_per_scrimmage", "plan__media_max_total_bytes"
+    )
+    plan_files = [files for files, _ in plans if files is not None]
+    plan_bytes = [size for _, size in plans if size is not None]
+    return (max(plan_files) if plan_files else max_files, max(plan_bytes) if plan_bytes else max_bytes)
+
+
+def usage(user_id, scrimmage_id):
+    """(files in this scrimmage, total bytes) from the ledger, in one query."""
+    row = (
+        MediaUsage.objects.filter(user_id=user_id)
+        .annotate(
+            scrimmage_files=Subquery(
+                ScrimmageMediaUsage.objects.filter(user_id=user_id, scrimmage_id=scrimmage_id).values(
+                    "file_count"
+                )[:1]
+            )
+        )
+        .values_list("scrimmage_files", "total_bytes")
+        .first()
+    )
+    if row is None:
+        return 0, 0
+    return row[0] or 0, row[1]
+
+
+def check_quota(user_id, scrimmage_id, size, quota=None):
+    """Raise MediaQuotaExceeded if one more upload of ``size`` bytes would not fit."""
+    max_files, max_bytes = quota or quota_for(user_id)
+    files, total_bytes = usage(user_id, scrimmage_id)
+    if files + 1 > max_files:
+        raise MediaQuotaExceeded(f"You've reached the upload limit ({max_files} files per scrimmage).")
+    if total_bytes + size > max_bytes:
+        raise MediaQuotaExceeded(f"Total upload size exceeds {max_bytes / (1024 * 1024):.1f} MB limit.")
+
+
+# ============================================================
+# ✅ Ledger updates
+# ============================================================
+
+def _conditional_add(model, lookup, files, size, guards):
+    """Add to the ledger row if ``guards`` match; create the row on first use."""
+    updates = {"file_count": F("file_count") + files, "total_bytes": F("total_bytes") + size}
+    if model.objects.filter(**lookup, **guards).update(**updates):
+        return True
+    if model.objects.filter(**lookup).exists():
+        return False
+    # First upload: the row starts at zero, so only the guards on the new values apply
+    model.objects.bulk_create([model(**lookup)], ignore_conflicts=True)
+    return bool(model.objects.filter(**lookup, **guards).update(**updates))
+
+
+def charge(user_id, scrimmage_id, files, size, quota=None):
+    """
+    Count ``files`` uploads of ``size`` total bytes against the ledger.
+    Raises MediaQuotaExceeded (and changes nothing) if they don't fit.
+    """
+    max_files, max_bytes = quota or quota_for(user_id)
+    with transaction.atomic():
+        if not _conditional_add(
+            ScrimmageMediaUsage,
+            {"user_id": user_id, "scrimmage_id": scrimmage_id},
+            files,
+            size,
+            {"file_count__lte": max_files - files},
+        ):
+            raise MediaQuotaExceeded(f"You've reached the upload limit ({max_files} files per scrimmage).")
+        if not _conditional_add(
+            MediaUsage,
+            {"user_id": user_id},
+            files,
+            size,
+            {"total_bytes__lte": max_bytes - size},
+        ):
+            # Raising inside atomic() also rolls back the scrimmage row above
+            raise MediaQuotaExceeded(f"Total upload size exceeds {max_bytes / (1024 * 1024):.1f} MB limit.")
+
+
+def release(user_id, scrimmage_id, files, size):
+    """Credit back deleted uploads (never below zero)."""
+    updates = {
+        "file_count": Greatest(F("file_count") - files, Value(0)),
+        "total_bytes": Greatest(F("total_bytes") - size, Value(0)),
+    }
+    with transaction.atomic():
+        ScrimmageMediaUsage.objects.filter(user_id=user_id, scrimmage_id=scrimmage_id).update(**updates)
+        MediaUsage.objects.filter(user_id=user_id).update(**updates)
+
+
+# ============================================================
+# ✅ Drift repair
+# ============================================================
+
+def rebuild_media_usage(user_ids, dry_run=False):
+    """
+    Recount the ledger of ``user_ids`` from ScrimmageMedia and fix drift.
+    Returns a list of (user_id, scrimmage_id or None, (stored, actual)) for
+    drifted rows, where the values are (file_count, total_bytes).
+    """
+    actual = {}
+    for row in (
+        ScrimmageMedia.objects.filter(uploader_id__in=user_ids)
+        .values("uploader_id", "scrimmage_id")
+        .annotate(n=Count("id"), size=Coalesce(Sum("file_size"), 0))
+        .order_by()
+    ):
+        actual[(row["uploader_id"], row["scrimmage_id"])] = (row["n"], row["size"])
+    per_user = {}
+    for (user_id, _), (n, size) in actual.items():
+        files, total = per_user.get(user_id, (0, 0))
+        per_user[user_id] = (files + n, total + size)
+
+    drifted = []
+    with transaction.atomic():
+        stored = {
+            (row[0], row[1]): row[2:]
+            for row in ScrimmageMediaUsage.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .values_list("user_id", "scrimmage_id", "file_count", "total_bytes")
+        }
+        for key in stored.keys() | actual.keys():
+            have, want = stored.get(key, (0, 0)), actual.get(key, (0, 0))
+            if have != want:
+                drifted.append((*key, (have, want)))
+                if not dry_run:
+                    ScrimmageMediaUsage.objects.update_or_create(
+                        user_id=key[0], scrimmage_id=key[1],
+                        defaults={"file_count": want[0], "total_bytes": want[1]},
+                    )
+
+        stored = {
+            row[0]: row[1:]
+            for row in MediaUsage.objects.select_for_update()
+            .filter(user_id__in=user_ids)
+            .values_list("user_id", "file_count", "total_bytes")
+        }
+        for user_id in user_ids:
+            have, want = stored.get(user_id, (0, 0)), per_user.get(user_id, (0, 0))
+            if have != want:
+                drifted.append((user_id, None, (have, want)))
+                if not dry_run:
+                    MediaUsage.objects.update_or_create(
+                        user_id=user_id, defaults={"file_count": want[0], "total_bytes": want[1]}
+                    )
+    return drifted
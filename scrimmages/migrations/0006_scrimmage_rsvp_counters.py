@@ -0,0 +1,66 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:18
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rsvp_counters(apps, schema_editor):
+    Scrimmage = apps.get_model("scrimmages", "Scrimmage")
+    ScrimmageRSVP = apps.get_model("scrimmages", "ScrimmageRSVP")
+
+    counts = {}
+    rows = (
+        ScrimmageRSVP.objects.values("scrimmage_id", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        counts.setdefault(row["scrimmage_id"], {})[f"{row['status']}_count"] = row["n"]
+    for scrimmage_id, fields in counts.items():
+        Scrimmage.objects.filter(pk=scrimmage_id).update(**fields)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0005_scrimmage_payment_options_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrimmage",
+            name="cancelled_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="checked_in_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="completed_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="going_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="interested_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="pending_payment_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="waitlisted_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(backfill_rsvp_counters, migrations.RunPython.noop),
+    ]
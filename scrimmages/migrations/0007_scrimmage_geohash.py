@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:26
+
+from django.db import migrations, models
+
+from scrimmages.geo import encode_geohash
+
+
+def backfill_geohash(apps, schema_editor):
+    Scrimmage = apps.get_model("scrimmages", "Scrimmage")
+    rows = Scrimmage.objects.filter(latitude__isnull=False, longitude__isnull=False)
+    for pk, lat, lng in list(rows.values_list("pk", "latitude", "longitude")):
+        Scrimmage.objects.filter(pk=pk).update(geohash=encode_geohash(lat, lng))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0006_scrimmage_rsvp_counters"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrimmage",
+            name="geohash",
+            field=models.CharField(
+                blank=True, db_index=True, editable=False, max_length=12
+            ),
+        ),
+        migrations.RunPython(backfill_geohash, migrations.RunPython.noop),
+    ]
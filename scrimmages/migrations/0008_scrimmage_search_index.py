@@ -0,0 +1,81 @@
+from django.db import migrations
+
+# Frozen copies of the schema in scrimmages/search.py as of this migration;
+# later changes to the live module must come with their own migration.
+FTS_TABLE = "scrimmages_scrimmage_fts"
+PG_TABLE = "scrimmages_scrimmage_search"
+PG_CONFIG = "english"
+BATCH_SIZE = 1000
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+            "title, description, category, scrimmage_type, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        # Title hits weigh most, then category/type, then description
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rank) VALUES ('rank', 'bm25(10.0, 1.0, 4.0, 4.0)')"
+        )
+        insert = (
+            f"INSERT INTO {FTS_TABLE}(rowid, title, description, category, scrimmage_type) "
+            "VALUES (%s, %s, %s, %s, %s)"
+        )
+    elif vendor == "postgresql":
+        schema_editor.execute(
+            f"CREATE TABLE IF NOT EXISTS {PG_TABLE} ("
+            "scrimmage_id bigint PRIMARY KEY "
+            "REFERENCES scrimmages_scrimmage(id) ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            f"CREATE INDEX IF NOT EXISTS {PG_TABLE}_document_gin ON {PG_TABLE} USING GIN (document)"
+        )
+        insert = (
+            f"INSERT INTO {PG_TABLE} (scrimmage_id, document) VALUES (%s, "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'A') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'C') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B') || "
+            f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B'))"
+        )
+    else:
+        return  # other backends search with icontains
+
+    # Populate from existing rows (historical models, the migration's connection)
+    Scrimmage = apps.get_model("scrimmages", "Scrimmage")
+    rows = (
+        Scrimmage.objects.using(schema_editor.connection.alias)
+        .order_by("pk")
+        .values_list("id", "title", "description", "category__name", "scrimmage_type__name")
+    )
+    batch = []
+    with schema_editor.connection.cursor() as cursor:
+        for pk, title, description, category, type_name in rows.iterator(chunk_size=BATCH_SIZE):
+            batch.append((pk, title or "", description or "", category or "", type_name or ""))
+            if len(batch) == BATCH_SIZE:
+                cursor.executemany(insert, batch)
+                batch = []
+        if batch:
+            cursor.executemany(insert, batch)
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == "sqlite":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+    elif vendor == "postgresql":
+        schema_editor.execute(f"DROP TABLE IF EXISTS {PG_TABLE}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0007_scrimmage_geohash"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0008_scrimmage_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrimmage",
+            name="rsvp_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
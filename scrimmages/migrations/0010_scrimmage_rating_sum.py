@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:44
+
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_rating_aggregates(apps, schema_editor):
+    Scrimmage = apps.get_model("scrimmages", "Scrimmage")
+    ScrimmageRSVP = apps.get_model("scrimmages", "ScrimmageRSVP")
+    rows = (
+        ScrimmageRSVP.objects.filter(rating__isnull=False)
+        .values("scrimmage_id")
+        .annotate(total=Sum("rating"), n=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        Scrimmage.objects.filter(pk=row["scrimmage_id"]).update(
+            rating_sum=row["total"],
+            rating_count=row["n"],
+            rating_avg=row["total"] / row["n"],
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0009_scrimmage_rsvp_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrimmage",
+            name="rating_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_aggregates, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:47
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0010_scrimmage_rating_sum"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="scrimmage",
+            name="occurrence_date",
+            field=models.DateField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name="scrimmage",
+            name="recurrence_series",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="occurrences",
+                to="scrimmages.recurrencerule",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="scrimmage",
+            constraint=models.UniqueConstraint(
+                fields=("recurrence_series", "occurrence_date"),
+                name="uniq_series_occurrence_date",
+            ),
+        ),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 5.2.7 on 2026-10-17 02:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Sum
+
+
+def backfill_media_usage(apps, schema_editor):
+    ScrimmageMedia = apps.get_model("scrimmages", "ScrimmageMedia")
+    ScrimmageMediaUsage = apps.get_model("scrimmages", "ScrimmageMediaUsage")
+    MediaUsage = apps.get_model("scrimmages", "MediaUsage")
+    rows = (
+        ScrimmageMedia.objects.values("uploader_id", "scrimmage_id")
+        .annotate(n=Count("id"), size=Sum("file_size"))
+        .order_by()
+    )
+    per_user = {}
+    usage = []
+    for row in rows:
+        usage.append(
+            ScrimmageMediaUsage(
+                user_id=row["uploader_id"],
+                scrimmage_id=row["scrimmage_id"],
+                file_count=row["n"],
+                total_bytes=row["size"] or 0,
+            )
+        )
+        files, size = per_user.get(row["uploader_id"], (0, 0))
+        per_user[row["uploader_id"]] = (files + row["n"], size + (row["size"] or 0))
+    ScrimmageMediaUsage.objects.bulk_create(usage, batch_size=500)
+    MediaUsage.objects.bulk_create(
+        [
+            MediaUsage(user_id=user_id, file_count=files, total_bytes=size)
+            for user_id, (files, size) in per_user.items()
+        ],
+        batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scrimmages", "0011_scrimmage_recurrence_series"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MediaUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_count", models.PositiveIntegerField(default=0)),
+                ("total_bytes", models.PositiveBigIntegerField(default=0)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="media_usage",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="ScrimmageMediaUsage",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("file_count", models.PositiveIntegerField(default=0)),
+                ("total_bytes", models.PositiveBigIntegerField(default=0)),
+                (
+                    "scrimmage",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="media_usage",
+                        to="scrimmages.scrimmage",
+                    ),
+                ),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="scrimmage_media_usage",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("user", "scrimmage"),
+                        name="uniq_media_usage_user_scrimmage",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_media_usage, migrations.RunPython.noop),
+    ]
@@ -1,10 +1,13 @@
 from __future__ import annotations
 
+import uuid
+
 from django.conf import settings
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.db import models
+from django.db import models, transaction
 from django.db.models import Q
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 
 # Optional Postgres field for array of payment options
 try:
@@ -177,6 +180,8 @@ class Scrimmage(models.Model):
     address = models.CharField(max_length=255, blank=True)
     latitude = models.FloatField(null=True, blank=True)
     longitude = models.FloatField(null=True, blank=True)
+    # Derived from latitude/longitude on save; prefilter for "near me" queries
+    geohash = models.CharField(max_length=12, blank=True, db_index=True, editable=False)
 
     # Schedule
     start_datetime = models.DateTimeField()
@@ -226,13 +231,37 @@ class Scrimmage(models.Model):
     # Example: {"Team A": [user_id,...], "Team B": [user_id,...]}
     teams = models.JSONField(default=dict, blank=True)
 
-    # Ratings aggregate
+    # Ratings aggregate (maintained incrementally by scrimmages.ratings)
     rating_avg = models.FloatField(default=0)
     rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0, editable=False)
+
+    # RSVP counters (one per RSVP status; maintained by scrimmages.counters)
+    interested_count = models.PositiveIntegerField(default=0)
+    pending_payment_count = models.PositiveIntegerField(default=0)
+    waitlisted_count = models.PositiveIntegerField(default=0)
+    going_count = models.PositiveIntegerField(default=0)
+    checked_in_count = models.PositiveIntegerField(default=0)
+    completed_count = models.PositiveIntegerField(default=0)
+    cancelled_count = models.PositiveIntegerField(default=0)
+    # Bumped on every RSVP write; with updated_at it forms the ETag version
+    rsvp_version = models.PositiveIntegerField(default=0, editable=False)
 
     # Lifecycle
     status = models.CharField(max_length=10, choices=STATUS, default="draft")
 
+    # Occurrence of a recurring series (generated by scrimmages.recurrence);
+    # (series, date) is the idempotency key for generation.
+    recurrence_series = models.ForeignKey(
+        "RecurrenceRule",
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        related_name="occurrences",
+        editable=False,
+    )
+    occurrence_date = models.DateField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -250,6 +279,13 @@ class Scrimmage(models.Model):
             models.Index(fields=["visibility", "start_datetime"]),
             models.Index(fields=["category", "start_datetime"]),
         ]
+        constraints = [
+            # One materialized scrimmage per series date
+            models.UniqueConstraint(
+                fields=["recurrence_series", "occurrence_date"],
+                name="uniq_series_occurrence_date",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.title} ({self.status})"
@@ -259,9 +295,40 @@ class Scrimmage(models.Model):
         if self.start_datetime and self.end_datetime and self.end_datetime <= self.start_datetime:
             raise ValidationError("End time must be after start time.")
 
+    COUNTER_FIELDS = (
+        "interested_count",
+        "pending_payment_count",
+        "waitlisted_count",
+        "going_count",
+        "checked_in_count",
+        "completed_count",
+        "cancelled_count",
+    )
+    # Columns only ever written with F() updates
+    DB_MAINTAINED_FIELDS = (*COUNTER_FIELDS, "rsvp_version", "rating_sum", "rating_count", "rating_avg")
+
     def save(self, *args, **kwargs):
+        from .geo import encode_geohash
+
         self.is_paid = (self.entry_fee or 0) > 0
-        super().save(*args, **kwargs)
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = ""
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude"} & set(update_fields):
+            kwargs["update_fields"] = [*update_fields, "geohash"]
+        # Counters are only ever written with F() updates; a full save of a
+        # (possibly stale) instance must not overwrite them.
+        if not self._state.adding and not args and kwargs.get("update_fields") is None:
+            kwargs["update_fields"] = [
+                f.name
+                for f in self._meta.concrete_fields
+                if not f.primary_key and f.name not in self.DB_MAINTAINED_FIELDS
+            ]
+        # post_save handlers write outbox events; commit them with the row
+        with transaction.atomic():
+            super().save(*args, **kwargs)
 
     def get_media_by_context(self, context_name: str):
         """
@@ -276,17 +343,19 @@ class Scrimmage(models.Model):
         ).select_related("media")
 
     # 🟨 REORDERED for clarity (spots_taken and spots_left grouped last)
+    # Both read the stored RSVP counters instead of counting rows.
     @property
     def spots_taken(self) -> int:
-        return self.rsvps.filter(
-            status__in=["going", "checked_in", "completed", "pending_payment"]
-        ).count()
+        return (
+            self.going_count
+            + self.checked_in_count
+            + self.completed_count
+            + self.pending_payment_count
+        )
 
     @property
     def spots_left(self) -> int:
-        taken = self.rsvps.filter(
-            status__in=["going", "checked_in", "completed"]
-        ).count()
+        taken = self.going_count + self.checked_in_count + self.completed_count
         return max(self.max_participants - taken, 0)
 
 
@@ -357,6 +426,42 @@ class ScrimmageRSVP(models.Model):
     def __str__(self) -> str:
         return f"{self.user} → {self.scrimmage} [{self.status}/{self.role}]"
 
+    def save(self, *args, **kwargs):
+        """
+        Save and keep the scrimmage's RSVP counters, rating aggregates and
+        rsvp_version in the same transaction. Asking for "going" only grants
+        a seat if one is free (see counters.admit); otherwise the RSVP is
+        waitlisted, or ScrimmageFull is raised when the waitlist is disabled.
+        """
+        from .counters import admit
+        from .ratings import apply_rating_change
+
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            previous, previous_rating = None, None
+            if not self._state.adding and self.pk:
+                previous, previous_rating = self.status, self.rating
+                if update_fields is None or {"status", "rating"} & set(update_fields):
+                    # Read the committed values under a row lock so concurrent
+                    # updates of the same RSVP cannot double-count.
+                    committed = (
+                        ScrimmageRSVP.objects.select_for_update()
+                        .filter(pk=self.pk)
+                        .values_list("status", "rating")
+                        .first()
+                    ) or (None, None)
+                    if update_fields is None or "status" in update_fields:
+                        previous = committed[0]
+                    if update_fields is None or "rating" in update_fields:
+                        previous_rating = committed[1]
+            # Counters move before the row is written, so post_save handlers
+            # (which may save this RSVP again) already see them updated.
+            self.status = admit(self.scrimmage_id, previous, self.status)
+            apply_rating_change(self.scrimmage_id, previous_rating, self.rating)
+            if ScrimmageRSVP.scrimmage.is_cached(self):
+                self.scrimmage.refresh_from_db(fields=Scrimmage.DB_MAINTAINED_FIELDS)
+            super().save(*args, **kwargs)
+
 
 # ============================================================
 # ✅ Participant Media (host moderation + limits via views)
@@ -385,6 +490,183 @@ class ScrimmageMedia(models.Model):
     def __str__(self) -> str:
         return f"{self.scrimmage.title} – {self.uploader}"
 
+    def save(self, *args, **kwargs):
+        """
+        Save and charge the uploader's media quota ledger in the same
+        transaction; raises MediaQuotaExceeded when over quota. Deletions
+        are credited back by the post_delete signal.
+        """
+        from .media_quota import charge, release
+
+        update_fields = kwargs.get("update_fields")
+        with transaction.atomic():
+            if self._state.adding or not self.pk:
+                charge(self.uploader_id, self.scrimmage_id, 1, self.file_size)
+            elif update_fields is None or {"uploader", "scrimmage", "file_size"} & set(update_fields):
+                committed = (
+                    ScrimmageMedia.objects.select_for_update()
+                    .filter(pk=self.pk)
+                    .values_list("uploader_id", "scrimmage_id", "file_size")
+                    .first()
+                )
+                if committed and committed != (self.uploader_id, self.scrimmage_id, self.file_size):
+                    release(*committed[:2], 1, committed[2])
+                    charge(self.uploader_id, self.scrimmage_id, 1, self.file_size)
+            super().save(*args, **kwargs)
+
+
+# ============================================================
+# ✅ Chunked Uploads (see uploads.py)
+#   - A session collects chunks on disk until it is completed.
+#   - Blobs map a content hash to the one stored Media file.
+# ============================================================
+class MediaUploadSession(models.Model):
+    STATUS = (("open", "Open"), ("complete", "Complete"))
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    scrimmage = models.ForeignKey(
+        Scrimmage, on_delete=models.CASCADE, related_name="upload_sessions"
+    )
+    uploader = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="scrimmage_upload_sessions"
+    )
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100, blank=True)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS, default="open")
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["status", "updated_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.filename} ({self.received_bytes}/{self.total_size} B)"
+
+
+class MediaBlob(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    media = models.OneToOneField(
+        "media.Media", on_delete=models.CASCADE, related_name="scrimmage_blob"
+    )
+    size = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        return f"{self.sha256[:12]}… ({self.size} B)"
+
+
+# ============================================================
+# ✅ Media Renditions (thumbnails; see renditions.py)
+#   - Rows are queued as "pending" when a gallery image is attached
+#     and filled in by the process_media_renditions worker.
+# ============================================================
+class MediaRendition(models.Model):
+    STATUS = (
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("ready", "Ready"),
+        ("failed", "Failed"),
+    )
+
+    relation = models.ForeignKey(
+        MediaRelation, on_delete=models.CASCADE, related_name="scrimmage_renditions"
+    )
+    label = models.CharField(max_length=20)  # e.g. "thumb", "small", "medium"
+    file = models.FileField(upload_to="scrimmages/renditions/", blank=True)
+    width = models.PositiveIntegerField(null=True, blank=True)
+    height = models.PositiveIntegerField(null=True, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    error = models.CharField(max_length=255, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["relation", "label"], name="uniq_rendition_relation_label"),
+        ]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self) -> str:
+        return f"{self.relation_id}/{self.label} [{self.status}]"
+
+
+# ============================================================
+# ✅ Outbox (side effects of scrimmage writes; see outbox.py)
+#   - Written in the same transaction as the change that caused it,
+#     applied later by the drain_scrimmage_outbox worker.
+# ============================================================
+class OutboxEvent(models.Model):
+    STATUS = (
+        ("pending", "Pending"),
+        ("processing", "Processing"),
+        ("done", "Done"),
+        ("failed", "Failed"),
+    )
+
+    # Events of one scrimmage are applied in id order
+    scrimmage_id = models.BigIntegerField(db_index=True)
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=12, choices=STATUS, default="pending")
+    attempts = models.PositiveSmallIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"]),
+            models.Index(fields=["scrimmage_id", "status", "id"]),
+        ]
+
+    def __str__(self) -> str:
+        return f"#{self.pk} {self.kind} (scrimmage {self.scrimmage_id}) [{self.status}]"
+
+
+# ============================================================
+# ✅ Media Quota Ledger (maintained by ScrimmageMedia save/delete)
+#   - Quota checks read one row instead of summing uploads.
+# ============================================================
+class ScrimmageMediaUsage(models.Model):
+    """Uploads by one user to one scrimmage."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="scrimmage_media_usage"
+    )
+    scrimmage = models.ForeignKey(
+        Scrimmage, on_delete=models.CASCADE, related_name="media_usage"
+    )
+    file_count = models.PositiveIntegerField(default=0)
+    total_bytes = models.PositiveBigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "scrimmage"], name="uniq_media_usage_user_scrimmage"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.user} @ {self.scrimmage_id}: {self.file_count} files, {self.total_bytes} B"
+
+
+class MediaUsage(models.Model):
+    """All scrimmage uploads by one user."""
+
+    user = models.OneToOneField(
+        User, on_delete=models.CASCADE, related_name="media_usage"
+    )
+    file_count = models.PositiveIntegerField(default=0)
+    total_bytes = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self) -> str:
+        return f"{self.user}: {self.file_count} files, {self.total_bytes} B"
+
 
 # ============================================================
 # ✅ Recurrence Rule (manual mgmt command/cron support)
@@ -0,0 +1,109 @@
+# scrimmages/outbox.py
+"""
+Transactional outbox for scrimmage side effects.
+
+Signal handlers call ``enqueue`` instead of writing calendar entries or
+notifications themselves. The OutboxEvent row commits (or rolls back)
+with the write that caused it, so requests finish after a single commit
+and no side effect is lost or sent for a change that never happened.
+
+``drain`` (the ``drain_scrimmage_outbox`` worker) applies pending events:
+
+- per scrimmage, strictly in id order: an event waits while an earlier
+  event of the same scrimmage is pending or being retried
+- a failing event is retried with exponential backoff, and is marked
+  "failed" after SCRIMMAGE_OUTBOX_MAX_ATTEMPTS (default 5)
+- events claimed by a worker that died are reclaimed after the claim
+  timeout (see workqueue/queue.py)
+
+Handlers are registered with ``@handler("kind")`` (see side_effects.py)
+and are called with the scrimmage id and the event payload. They must be
+safe to run more than once.
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q
+
+from workqueue import WorkQueue
+
+from .models import OutboxEvent
+
+HANDLERS = {}
+
+
+def handler(kind):
+    def register(func):
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def max_attempts():
+    return getattr(settings, "SCRIMMAGE_OUTBOX_MAX_ATTEMPTS", 5)
+
+
+def enqueue(kind, scrimmage_id, **payload):
+    """Record a side effect in the current transaction."""
+    return OutboxEvent.objects.create(kind=kind, scrimmage_id=scrimmage_id, payload=payload)
+
+
+# ============================================================
+# ✅ Worker
+# ============================================================
+
+class OutboxQueue(WorkQueue):
+    def eligible(self, queryset, now):
+        # An earlier event of the same scrimmage that is backing off or held by
+        # another worker blocks the rest; earlier claimable ones come first anyway.
+        blocking = OutboxEvent.objects.filter(
+            Q(status="pending", available_at__gt=now)
+            | Q(status="processing", claimed_at__gte=now - self.claim_timeout),
+            scrimmage_id=OuterRef("scrimmage_id"),
+            id__lt=OuterRef("id"),
+        )
+        return queryset.exclude(Exists(blocking))
+
+
+queue = OutboxQueue(OutboxEvent, max_attempts=max_attempts, label="Outbox event")
+
+
+def _apply(event):
+    func = HANDLERS.get(event.kind)
+    if func is None:
+        raise LookupError(f"No outbox handler for {event.kind!r}.")
+    func(event.scrimmage_id, **event.payload)
+
+
+def drain(limit=100):
+    """
+    Apply one batch of due events. Returns {"done", "retry", "failed"} counts.
+    """
+    counts = queue.counts()
+    blocked = set()  # scrimmages whose earlier event failed in this batch
+    for event in queue.claim(limit):
+        if event.scrimmage_id in blocked:
+            # Keep per-scrimmage order: wait for the failed event's retry
+            queue.release(event)
+            continue
+        outcome = queue.run(event, _apply)
+        if outcome != "done":
+            blocked.add(event.scrimmage_id)
+        if outcome:
+            counts[outcome] += 1
+    return counts
+
+
+def drain_all(limit=100):
+    """Drain until nothing is due (tests, management shell)."""
+    totals = queue.counts()
+    while True:
+        counts = drain(limit)
+        for key, value in counts.items():
+            totals[key] += value
+        if not counts["done"]:
+            return totals
+
+
+def purge_done(older_than=timedelta(days=7)):
+    return queue.purge_done(older_than)
@@ -0,0 +1,130 @@
+# scrimmages/pagination.py
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+# ============================================================
+# ✅ Keyset (cursor) pagination on (start_datetime, id)
+#   - Each page is a range scan after the last row of the previous
+#     page, so page N costs the same as page 1.
+#   - Rows inserted while a client scrolls never shift or repeat
+#     already-seen results.
+# ============================================================
+class ScrimmageCursorPagination(BasePagination):
+    page_size = 20
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        size = self.get_page_size(request)
+        cursor = self.decode_cursor(request)
+
+        if cursor is None:
+            start, pk, reverse = None, None, False
+        else:
+            start, pk, reverse = cursor
+
+        if reverse:
+            queryset = queryset.order_by("-start_datetime", "-id")
+            if start is not None:
+                queryset = queryset.filter(
+                    Q(start_datetime__lt=start) | Q(start_datetime=start, id__lt=pk)
+                )
+        else:
+            queryset = queryset.order_by("start_datetime", "id")
+            if start is not None:
+                queryset = queryset.filter(
+                    Q(start_datetime__gt=start) | Q(start_datetime=start, id__gt=pk)
+                )
+
+        rows = list(queryset[:size + 1])
+        has_more = len(rows) > size
+        rows = rows[:size]
+        if reverse:
+            rows.reverse()
+
+        # Forward: a next page exists if we over-fetched; a previous page
+        # exists whenever we started from a cursor. Mirrored for reverse.
+        self.has_next = has_more if not reverse else cursor is not None
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.first_row = rows[0] if rows else None
+        self.last_row = rows[-1] if rows else None
+        return rows
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    # ----------------------------
+    # Cursor encoding
+    # ----------------------------
+
+    def encode_cursor(self, row, reverse):
+        payload = {"s": row.start_datetime.isoformat(), "i": row.pk}
+        if reverse:
+            payload["r"] = 1
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        token = base64.urlsafe_b64encode(raw).decode().rstrip("=")
+        return replace_query_param(self.base_url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+            payload = json.loads(raw)
+            start = parse_datetime(payload["s"])
+            pk = int(payload["i"])
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+        if start is None:
+            raise NotFound(self.invalid_cursor_message)
+        return start, pk, bool(payload.get("r"))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.last_row is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.last_row, reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first_row is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(self.first_row, reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ("next", self.get_next_link()),
+            ("previous", self.get_previous_link()),
+            ("results", data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
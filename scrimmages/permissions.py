@@ -86,6 +86,9 @@ class RSVPWritePermission(BasePermission):
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
+        if not hasattr(obj, "user"):
+            # Scrimmage-level actions (rsvp, feedback) act on the caller's own RSVP
+            return request.user.is_authenticated
         return (
             request.user.is_authenticated and
             (obj.user == request.user or obj.scrimmage.host == request.user or request.user.is_staff)
@@ -102,11 +105,24 @@ class MediaUploadPermission(BasePermission):
     - Only uploader or host/admin can edit/delete.
     """
 
+    @staticmethod
+    def can_upload(user, scrim):
+        is_host = scrim.host_id == user.pk
+        is_participant = scrim.rsvps.filter(
+            user=user, status__in=["going", "checked_in", "completed"]
+        ).exists()
+        return is_host or is_participant or user.is_staff
+
     def has_object_permission(self, request, view, obj):
         if request.method in SAFE_METHODS:
             return True
 
         user = request.user
+        from .models import Scrimmage
+        if isinstance(obj, Scrimmage):
+            # Scrimmage-level upload actions (upload_media, chunked uploads)
+            return user.is_authenticated and self.can_upload(user, obj)
+
         scrim = getattr(obj, "scrimmage", None)
         if not scrim:
             return False
@@ -124,22 +140,23 @@ class MediaUploadPermission(BasePermission):
         if not user.is_authenticated:
             return False
 
-        scrimmage_id = view.kwargs.get("scrimmage_pk") or request.data.get("scrimmage")
+        from .models import Scrimmage
+        if getattr(view, "queryset", None) is not None and view.queryset.model is Scrimmage:
+            # Scrimmage upload actions: the scrimmage is in the URL. Don't
+            # parse request.data here (chunk uploads send raw bytes).
+            scrimmage_id = view.kwargs.get(view.lookup_url_kwarg or view.lookup_field)
+        else:
+            scrimmage_id = view.kwargs.get("scrimmage_pk") or request.data.get("scrimmage")
         if not scrimmage_id:
             return False
 
-        from .models import Scrimmage
         try:
             scrim = Scrimmage.objects.get(id=scrimmage_id)
-        except Scrimmage.DoesNotExist:
+        except (Scrimmage.DoesNotExist, ValueError, TypeError):
             return False
 
         # Upload permission check
-        is_host = scrim.host == user
-        is_participant = scrim.rsvps.filter(
-            user=user, status__in=["going", "checked_in", "completed"]
-        ).exists()
-        return is_host or is_participant or user.is_staff
+        return self.can_upload(user, scrim)
 
 
 # ============================================================
@@ -0,0 +1,101 @@
+# scrimmages/ratings.py
+"""
+Incremental rating aggregates stored on Scrimmage.
+
+``rating_sum`` and ``rating_count`` move by the difference between an
+RSVP's old and new rating with one F() update; ``rating_avg`` is derived
+in the same statement. Nothing reads the ratings back into Python. The
+``verify_rating_aggregates`` command recounts in batches and fixes drift.
+"""
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Sum, Value
+from django.db.models.functions import Cast, Coalesce, NullIf
+
+from .cache import invalidate
+from .models import Scrimmage, ScrimmageRSVP
+
+AGGREGATE_FIELDS = ("rating_sum", "rating_count", "rating_avg")
+
+
+def rating_change_updates(old_rating, new_rating):
+    """
+    Build the ``.update()`` kwargs for an RSVP rating going from
+    ``old_rating`` to ``new_rating`` (either may be None).
+    """
+    old_rating = None if old_rating is None else int(old_rating)
+    new_rating = None if new_rating is None else int(new_rating)
+    if old_rating == new_rating:
+        return {}
+    delta_sum = (new_rating or 0) - (old_rating or 0)
+    delta_count = (new_rating is not None) - (old_rating is not None)
+
+    new_sum = F("rating_sum") + delta_sum
+    new_count = F("rating_count") + delta_count
+    # rating_avg first and built from the old column values, so the result
+    # doesn't depend on the order the database assigns SET columns in.
+    return {
+        "rating_avg": Coalesce(
+            Cast(new_sum, FloatField()) / Cast(NullIf(new_count, Value(0)), FloatField()),
+            Value(0.0),
+        ),
+        "rating_sum": new_sum,
+        "rating_count": new_count,
+    }
+
+
+def apply_rating_change(scrimmage_id, old_rating, new_rating):
+    updates = rating_change_updates(old_rating, new_rating)
+    if not updates:
+        return 0
+    return Scrimmage.objects.filter(pk=scrimmage_id).update(**updates)
+
+
+def rating_totals(scrimmage_ids):
+    """Recount ratings from the rsvps table: {scrimmage_id: {field: value}}."""
+    totals = {sid: {"rating_sum": 0, "rating_count": 0, "rating_avg": 0.0} for sid in scrimmage_ids}
+    rows = (
+        ScrimmageRSVP.objects.filter(scrimmage_id__in=scrimmage_ids, rating__isnull=False)
+        .values("scrimmage_id")
+        .annotate(total=Sum("rating"), n=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        totals[row["scrimmage_id"]] = {
+            "rating_sum": row["total"],
+            "rating_count": row["n"],
+            "rating_avg": row["total"] / row["n"],
+        }
+    return totals
+
+
+def rebuild_rating_aggregates(scrimmage_ids, dry_run=False):
+    """
+    Recompute rating aggregates for the given scrimmages and fix any drift.
+    Returns a list of (scrimmage_id, {field: (stored, actual)}) for drifted rows.
+    """
+    drifted = []
+    with transaction.atomic():
+        stored = list(
+            Scrimmage.objects.select_for_update()
+            .filter(pk__in=scrimmage_ids)
+            .values("pk", *AGGREGATE_FIELDS)
+        )
+        actual = rating_totals(scrimmage_ids)
+        for row in stored:
+            expected = actual[row["pk"]]
+            diff = {
+                field: (row[field], expected[field])
+                for field in AGGREGATE_FIELDS
+                if (
+                    abs(row[field] - expected[field]) > 1e-9
+                    if field == "rating_avg"
+                    else row[field] != expected[field]
+                )
+            }
+            if not diff:
+                continue
+            drifted.append((row["pk"], diff))
+            if not dry_run:
+                Scrimmage.objects.filter(pk=row["pk"]).update(**expected)
+                invalidate(row["pk"])
+    return drifted
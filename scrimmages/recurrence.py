@@ -0,0 +1,333 @@
+# scrimmages/recurrence.py
+"""
+Recurrence engine for RecurrenceRule series.
+
+A rule's base scrimmage is the template: every occurrence copies its
+fields and its local start time / duration. Dates are expanded from
+``rule.start_date``:
+
+- weekly:  every ``interval`` weeks on ``day_of_week`` (one or more days,
+           comma-separated; defaults to the start date's weekday)
+- monthly: every ``interval`` calendar months on the start date's day,
+           clamped to the month's last day (Jan 31 → Feb 28 → Mar 31)
+
+up to ``rule.end_date`` (inclusive). Materialized occurrences carry
+(recurrence_series, occurrence_date), which is unique, so generation is
+idempotent and can be rerun or raced safely.
+
+Occurrences beyond what has been materialized are expanded on the fly
+for calendar reads (``virtual_occurrences``) and only become real rows
+when someone RSVPs (``materialize_occurrence``).
+"""
+import calendar
+from datetime import date, datetime, timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import cache, search
+from .models import RecurrenceRule, Scrimmage
+
+# Optional imports for integrations
+try:
+    from notifications.models import Notification
+except ImportError:
+    Notification = None
+
+try:
+    from calendars.models import CalendarItem
+except ImportError:
+    CalendarItem = None
+
+WEEKDAYS = {
+    "monday": 0, "mon": 0,
+    "tuesday": 1, "tue": 1, "tues": 1,
+    "wednesday": 2, "wed": 2,
+    "thursday": 3, "thu": 3, "thurs": 3,
+    "friday": 4, "fri": 4,
+    "saturday": 5, "sat": 5,
+    "sunday": 6, "sun": 6,
+}
+
+# Fields an occurrence does not inherit from its template
+NOT_COPIED = {
+    "id",
+    "start_datetime",
+    "end_datetime",
+    "status",
+    "recurrence_series",
+    "occurrence_date",
+    "created_at",
+    "updated_at",
+    *Scrimmage.DB_MAINTAINED_FIELDS,
+}
+
+
+# Series whose template has one of these statuses are not offered
+HIDDEN_TEMPLATE_STATUSES = ("draft", "cancelled")
+
+
+def horizon_days():
+    return getattr(settings, "SCRIMMAGE_RECURRENCE_HORIZON_DAYS", 56)
+
+
+# ============================================================
+# ✅ Date expansion
+# ============================================================
+
+def parse_weekdays(value, default):
+    days = sorted({WEEKDAYS[part] for part in value.lower().replace(" ", "").split(",") if part in WEEKDAYS})
+    return days or [default]
+
+
+def add_months(anchor, months):
+    """``anchor`` moved by ``months`` calendar months, day clamped to month end."""
+    month_index = anchor.month - 1 + months
+    year, month = anchor.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(anchor.day, calendar.monthrange(year, month)[1]))
+
+
+def occurrence_dates(rule, start, end):
+    """Dates of ``rule`` in [start, end), ascending."""
+    anchor = rule.start_date
+    interval = max(rule.interval or 1, 1)
+    if rule.end_date:
+        end = min(end, rule.end_date + timedelta(days=1))
+    start = max(start, anchor)
+    if start >= end:
+        return
+
+    if rule.frequency == "monthly":
+        months = (start.year - anchor.year) * 12 + start.month - anchor.month
+        step = max(months // interval - 1, 0) * interval  # back off one step for clamped days
+        while True:
+            day = add_months(anchor, step)
+            if day >= end:
+                return
+            if day >= start:
+                yield day
+            step += interval
+    else:
+        weekdays = parse_weekdays(rule.day_of_week or "", anchor.weekday())
+        week_zero = anchor - timedelta(days=anchor.weekday())
+        week = (start - week_zero).days // 7 // interval * interval
+        while True:
+            monday = week_zero + timedelta(weeks=week)
+            if monday >= end:
+                return
+            for weekday in weekdays:
+                day = monday + timedelta(days=weekday)
+                if start <= day < end:
+                    yield day
+            week += interval
+
+
+def occurrence_times(template, day):
+    """(start, end) of the occurrence on ``day``: template's local wall-clock time and duration."""
+    local_start = timezone.localtime(template.start_datetime)
+    start = timezone.make_aware(datetime.combine(day, local_start.time()), local_start.tzinfo)
+    return start, start + (template.end_datetime - template.start_datetime)
+
+
+def build_occurrence(rule, template, day):
+    """Unsaved Scrimmage for ``day``; save() side effects are applied by hand."""
+    start, end = occurrence_times(template, day)
+    values = {
+        field.attname: getattr(template, field.attname)
+        for field in Scrimmage._meta.concrete_fields
+        if field.name not in NOT_COPIED
+    }
+    occurrence = Scrimmage(
+        **values,
+        start_datetime=start,
+        end_datetime=end,
+        status="upcoming",
+        recurrence_series=rule,
+        occurrence_date=day,
+    )
+    # Share already-loaded relations (host, category, ...) with the template
+    for field in Scrimmage._meta.concrete_fields:
+        if field.is_relation and field.name not in NOT_COPIED and field.is_cached(template):
+            field.set_cached_value(occurrence, field.get_cached_value(template))
+    return occurrence
+
+
+def first_generated_date(template):
+    """Occurrences start the day after the template scrimmage itself."""
+    return timezone.localtime(template.start_datetime).date() + timedelta(days=1)
+
+
+# ============================================================
+# ✅ Occurrence keys ("<rule id>:<YYYY-MM-DD>")
+# ============================================================
+
+def occurrence_key(rule_id, day):
+    return f"{rule_id}:{day.isoformat()}"
+
+
+def parse_occurrence_key(key):
+    """(rule_id, date) from an occurrence key; raises ValueError if malformed."""
+    rule_id, _, day = str(key).partition(":")
+    return int(rule_id), date.fromisoformat(day)
+
+
+# ============================================================
+# ✅ Materialization
+# ============================================================
+
+def generate_occurrences(rules, until=None, dry_run=False):
+    """
+    Materialize occurrences of ``rules`` from today up to ``until``
+    (default: today + SCRIMMAGE_RECURRENCE_HORIZON_DAYS) in one bulk insert.
+    Occurrences that already exist are skipped. Returns the new scrimmages
+    (unsaved when ``dry_run``).
+    """
+    today = timezone.localdate()
+    until = until or today + timedelta(days=horizon_days())
+    rules = [rule for rule in rules if rule.active]
+    if not rules:
+        return []
+
+    planned = {}
+    for rule in rules:
+        template = rule.scrimmage
+        first = max(today, first_generated_date(template))
+        for day in occurrence_dates(rule, first, until):
+            planned[(rule.pk, day)] = (rule, template, day)
+    if not planned:
+        return []
+
+    existing = set(
+        Scrimmage.objects.filter(
+            recurrence_series__in=[rule.pk for rule in rules],
+            occurrence_date__gte=today,
+            occurrence_date__lt=until,
+        ).values_list("recurrence_series_id", "occurrence_date")
+    )
+    new_keys = sorted(key for key in planned if key not in existing)
+    new = [build_occurrence(*planned[key]) for key in new_keys]
+    if dry_run or not new:
+        return new
+
+    with transaction.atomic():
+        # Concurrent runs may insert the same keys; the unique constraint drops them.
+        Scrimmage.objects.bulk_create(new, batch_size=500, ignore_conflicts=True)
+        new_keys = set(new_keys)
+        created = [
+            scrim
+            for scrim in Scrimmage.objects.filter(
+                recurrence_series__in=[rule.pk for rule in rules],
+                occurrence_date__in={day for _, day in new_keys},
+            )
+            if (scrim.recurrence_series_id, scrim.occurrence_date) in new_keys
+        ]
+        search.index_scrimmages([s.pk for s in created])
+        _fan_out(created)
+    cache.invalidate()
+    return created
+
+
+def _fan_out(occurrences):
+    """One notification per series and calendar entries for the hosts, in bulk."""
+    if Notification:
+        per_series = {}
+        for scrim in occurrences:
+            per_series.setdefault(scrim.recurrence_series_id, []).append(scrim)
+        Notification.objects.bulk_create(
+            [
+                Notification(
+                    user_id=items[0].host_id,
+                    kind="scrimmage",
+                    title="Recurring Scrimmage Generated",
+                    body=(
+                        f"{len(items)} new occurrence(s) of '{items[0].title}' have been created automatically."
+                    ),
+                    url=f"/scrimmages/{items[0].id}/",
+                )
+                for items in per_series.values()
+            ],
+            batch_size=500,
+        )
+    if CalendarItem:
+        CalendarItem.objects.bulk_create(
+            [
+                CalendarItem(
+                    user_id=scrim.host_id,
+                    kind="scrimmage",
+                    title=scrim.title,
+                    start=scrim.start_datetime,
+                    end=scrim.end_datetime,
+                )
+                for scrim in occurrences
+            ],
+            batch_size=500,
+        )
+
+
+# ============================================================
+# ✅ Virtual expansion (read path) and on-demand materialization
+# ============================================================
+
+def virtual_occurrences(templates, start, end):
+    """
+    Unsaved occurrences of the templates' series in [start, end) that have
+    no real row yet. ``templates`` are scrimmages with a recurrence_rule
+    loaded. Costs one query, however long the series run.
+    """
+    rules = {t.recurrence_rule.pk: t for t in templates}
+    if not rules:
+        return []
+    materialized = set(
+        Scrimmage.objects.filter(
+            recurrence_series__in=list(rules),
+            occurrence_date__gte=start,
+            occurrence_date__lt=end,
+        ).values_list("recurrence_series_id", "occurrence_date")
+    )
+    occurrences = []
+    for rule_id, template in rules.items():
+        rule = template.recurrence_rule
+        for day in occurrence_dates(rule, max(start, first_generated_date(template)), end):
+            if (rule_id, day) not in materialized:
+                occurrences.append(build_occurrence(rule, template, day))
+    return occurrences
+
+
+def materialize_occurrence(rule, day):
+    """
+    The real scrimmage for ``rule`` on ``day``, creating it if needed.
+    Raises ValueError if the series has no occurrence that day, the day has
+    passed, or the series is a draft or cancelled.
+    """
+    template = rule.scrimmage
+    if not rule.active or template.status in HIDDEN_TEMPLATE_STATUSES:
+        raise ValueError("No such occurrence.")
+    if day < timezone.localdate():
+        raise ValueError("Occurrence is in the past.")
+    if day < first_generated_date(template):
+        raise ValueError("No such occurrence.")
+    if day not in occurrence_dates(rule, day, day + timedelta(days=1)):
+        raise ValueError("No such occurrence.")
+
+    lookup = {"recurrence_series": rule, "occurrence_date": day}
+    scrimmage = Scrimmage.objects.filter(**lookup).first()
+    if scrimmage:
+        return scrimmage
+    with transaction.atomic():
+        # Two first RSVPs may race here; the unique key keeps one row
+        Scrimmage.objects.bulk_create([build_occurrence(rule, template, day)], ignore_conflicts=True)
+        scrimmage = Scrimmage.objects.get(**lookup)
+        search.index_scrimmages([scrimmage.pk])
+    cache.invalidate()
+    return scrimmage
+
+
+def active_rules():
+    today = timezone.localdate()
+    return (
+        RecurrenceRule.objects.filter(active=True, auto_generate=True)
+        .exclude(end_date__lt=today)
+        .select_related("scrimmage")
+        .order_by("pk")
+    )
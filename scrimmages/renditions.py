@@ -0,0 +1,201 @@
+# scrimmages/renditions.py
+"""
+Thumbnail pipeline for scrimmage gallery images.
+
+Attaching an image to a scrimmage (a MediaRelation) only inserts pending
+MediaRendition rows, so uploads never wait on image processing. The
+``process_media_renditions`` worker claims pending rows in batches, reads
+each source image once, resizes it in a process pool (CPU-bound; see
+imaging.py) and saves the results. Relations that share one deduplicated
+Media share its rendition files too.
+
+Sizes come from SCRIMMAGE_MEDIA_RENDITIONS: (label, max width, max height).
+"""
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from media.models import MediaRelation
+from workqueue import WorkQueue
+
+from . import cache
+from .imaging import Image, render_renditions
+from .models import MediaRendition, Scrimmage
+
+DEFAULT_SIZES = (("thumb", 160, 160), ("small", 480, 480), ("medium", 1280, 1280))
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp", ".tif", ".tiff"}
+MAX_ATTEMPTS = 3
+CLAIM_TIMEOUT = timedelta(minutes=10)
+
+_pool = None
+
+
+def rendition_sizes():
+    return tuple(getattr(settings, "SCRIMMAGE_MEDIA_RENDITIONS", DEFAULT_SIZES))
+
+
+def max_source_bytes():
+    return getattr(settings, "SCRIMMAGE_RENDITION_MAX_SOURCE_BYTES", 30 * 1024 * 1024)
+
+
+def get_pool():
+    """The worker's process pool (spawned, so children start without Django state)."""
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=getattr(settings, "SCRIMMAGE_RENDITION_WORKERS", None),
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def is_image(name):
+    return os.path.splitext(name or "")[1].lower() in IMAGE_EXTENSIONS
+
+
+# ============================================================
+# ✅ Queueing (request path)
+# ============================================================
+
+def queue_renditions(relation):
+    """Queue renditions for a scrimmage gallery image; no-op for other media."""
+    if Image is None:
+        return 0
+    if relation.content_type_id != ContentType.objects.get_for_model(Scrimmage).id:
+        return 0
+    if not relation.media.file or not is_image(relation.media.file.name):
+        return 0
+    created = MediaRendition.objects.bulk_create(
+        [MediaRendition(relation=relation, label=label) for label, _, _ in rendition_sizes()],
+        ignore_conflicts=True,
+    )
+    return len(created)
+
+
+# ============================================================
+# ✅ Worker
+# ============================================================
+
+# Renditions have no available_at: a failed one is retried on the next batch
+queue = WorkQueue(
+    MediaRendition,
+    max_attempts=MAX_ATTEMPTS,
+    done="ready",
+    label="Media rendition",
+    ordering=("created_at", "id"),
+    select_related=("relation__media",),
+    error_field="error",
+    processed_field=None,
+    due_field=None,
+    claim_timeout=CLAIM_TIMEOUT,
+)
+
+
+def _read_source(media):
+    if media.file.size > max_source_bytes():
+        raise ValueError("Source image is too large to render.")
+    with media.file.open("rb") as fh:
+        return fh.read()
+
+
+def process_pending_renditions(limit=50, pool=None):
+    """
+    Render one batch of pending renditions. Returns {"ready", "retry", "failed"} counts.
+    """
+    claimed = queue.claim(limit)
+    if not claimed:
+        return queue.counts()
+    sizes = {label: (label, width, height) for label, width, height in rendition_sizes()}
+
+    by_media = {}
+    for rendition in claimed:
+        by_media.setdefault(rendition.relation.media_id, []).append(rendition)
+
+    # Files already rendered for the same Media (deduplicated uploads)
+    done = {
+        (row.relation.media_id, row.label): row
+        for row in MediaRendition.objects.filter(
+            relation__media_id__in=list(by_media), status="ready"
+        ).select_related("relation")
+    }
+
+    outcomes = {}
+    jobs = {}
+    pool = pool or get_pool()
+    for media_id, renditions in by_media.items():
+        todo = []
+        for rendition in renditions:
+            existing = done.get((media_id, rendition.label))
+            if existing:
+                rendition.file.name = existing.file.name
+                rendition.width, rendition.height = existing.width, existing.height
+                outcomes[rendition.pk] = None
+            elif rendition.label in sizes:
+                todo.append(rendition)
+            else:
+                outcomes[rendition.pk] = "Unknown rendition size."
+        if not todo:
+            continue
+        try:
+            source = _read_source(todo[0].relation.media)
+        except (OSError, ValueError) as exc:
+            outcomes.update({r.pk: str(exc) or exc.__class__.__name__ for r in todo})
+            continue
+        future = pool.submit(render_renditions, source, [sizes[r.label] for r in todo])
+        jobs[future] = todo
+
+    for future in as_completed(jobs):
+        todo = jobs[future]
+        try:
+            results = {label: (width, height, data) for label, width, height, data in future.result()}
+        except Exception as exc:  # bad image data, pool crash, ...
+            outcomes.update({r.pk: str(exc) or exc.__class__.__name__ for r in todo})
+            continue
+        for rendition in todo:
+            width, height, data = results[rendition.label]
+            name = f"{rendition.relation.media_id}-{rendition.label}.jpg"
+            rendition.file.save(name, ContentFile(data), save=False)
+            rendition.width, rendition.height = width, height
+            outcomes[rendition.pk] = None
+
+    counts = queue.counts()
+    ready = []
+    for rendition in claimed:
+        error = outcomes.get(rendition.pk, "Not processed.")
+        if error is not None:
+            outcome = queue.fail(rendition, error)
+        elif queue.complete(rendition, file=rendition.file.name, width=rendition.width, height=rendition.height):
+            outcome = "ready"
+            ready.append(rendition)
+        else:
+            outcome = None  # reclaimed by another worker, which saves its own result
+        if outcome:
+            counts[outcome] += 1
+
+    # Renditions are part of the detail payload: move ETags, drop cached copies
+    scrimmage_ids = {r.relation.object_id for r in ready}
+    if scrimmage_ids:
+        Scrimmage.objects.filter(pk__in=scrimmage_ids).update(updated_at=timezone.now())
+        for scrimmage_id in scrimmage_ids:
+            cache.invalidate(scrimmage_id, listings=False)
+    return counts
+
+
+def queue_missing_renditions(batch_size=500):
+    """Queue renditions for scrimmage images attached before the pipeline existed."""
+    content_type = ContentType.objects.get_for_model(Scrimmage)
+    queued = 0
+    relations = (
+        MediaRelation.objects.filter(content_type=content_type, scrimmage_renditions__isnull=True)
+        .select_related("media")
+        .order_by("pk")
+    )
+    for relation in relations.iterator(chunk_size=batch_size):
+        queued += queue_renditions(relation)
+    return queued
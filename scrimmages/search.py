@@ -0,0 +1,169 @@
+# scrimmages/search.py
+"""
+Full-text search over scrimmage title, description, category and type.
+
+The index lives in a side table managed with raw SQL:
+- SQLite:     FTS5 virtual table keyed by rowid = scrimmage id (bm25 rank)
+- PostgreSQL: weighted tsvector column with a GIN index (ts_rank)
+Other backends fall back to icontains matching.
+
+The side table is created by migration 0008. Rows are written by the
+signal handlers in signals.py on save/delete and can be rebuilt with
+``manage.py rebuild_scrimmage_search_index``.
+"""
+import re
+
+from django.db import connection
+from django.db.models import FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Scrimmage
+
+FTS_TABLE = "scrimmages_scrimmage_fts"
+PG_TABLE = "scrimmages_scrimmage_search"
+PG_CONFIG = "english"
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def backend():
+    return connection.vendor
+
+
+# ============================================================
+# ✅ Index maintenance
+# ============================================================
+
+def _documents(scrimmage_ids):
+    return list(
+        Scrimmage.objects.filter(pk__in=scrimmage_ids).values_list(
+            "id", "title", "description", "category__name", "scrimmage_type__name"
+        )
+    )
+
+
+def index_scrimmages(scrimmage_ids):
+    """(Re)index the given scrimmages; ids that no longer exist are dropped."""
+    scrimmage_ids = list(scrimmage_ids)
+    if not scrimmage_ids:
+        return
+    vendor = backend()
+    if vendor not in ("sqlite", "postgresql"):
+        return
+
+    rows = [
+        (pk, title or "", description or "", category or "", type_name or "")
+        for pk, title, description, category, type_name in _documents(scrimmage_ids)
+    ]
+    placeholders = ", ".join(["%s"] * len(scrimmage_ids))
+    with connection.cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", scrimmage_ids)
+            cursor.executemany(
+                f"INSERT INTO {FTS_TABLE}(rowid, title, description, category, scrimmage_type) "
+                "VALUES (%s, %s, %s, %s, %s)",
+                rows,
+            )
+        else:
+            cursor.execute(f"DELETE FROM {PG_TABLE} WHERE scrimmage_id IN ({placeholders})", scrimmage_ids)
+            cursor.executemany(
+                f"INSERT INTO {PG_TABLE} (scrimmage_id, document) VALUES (%s, "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'A') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'C') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B') || "
+                f"setweight(to_tsvector('{PG_CONFIG}', %s), 'B'))",
+                rows,
+            )
+
+
+def remove_scrimmages(scrimmage_ids):
+    scrimmage_ids = list(scrimmage_ids)
+    if not scrimmage_ids:
+        return
+    vendor = backend()
+    placeholders = ", ".join(["%s"] * len(scrimmage_ids))
+    with connection.cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid IN ({placeholders})", scrimmage_ids)
+        elif vendor == "postgresql":
+            cursor.execute(f"DELETE FROM {PG_TABLE} WHERE scrimmage_id IN ({placeholders})", scrimmage_ids)
+
+
+def rebuild_index(batch_size=1000):
+    """
+    Reindex every scrimmage in batches. Returns the number indexed.
+    Run inside a transaction so searches never see a half-built index.
+    """
+    vendor = backend()
+    with connection.cursor() as cursor:
+        if vendor == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+        elif vendor == "postgresql":
+            cursor.execute(f"TRUNCATE {PG_TABLE}")
+    ids = list(Scrimmage.objects.order_by("pk").values_list("pk", flat=True))
+    for start in range(0, len(ids), batch_size):
+        index_scrimmages(ids[start:start + batch_size])
+    return len(ids)
+
+
+# ============================================================
+# ✅ Querying
+# ============================================================
+
+def _fts5_query(text):
+    """Turn free text into an FTS5 query: every token must match (prefix match)."""
+    tokens = _TOKEN_RE.findall(text)
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def search_scrimmages(queryset, text):
+    """
+    Restrict ``queryset`` to scrimmages matching ``text`` and annotate a
+    ``search_rank`` (higher is better). The caller orders/limits.
+    """
+    text = (text or "").strip()
+    vendor = backend()
+    table = queryset.model._meta.db_table
+
+    if vendor == "sqlite":
+        match = _fts5_query(text)
+        if not match:
+            return queryset.none()
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -rank FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid = {table}.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    if vendor == "postgresql":
+        if not _TOKEN_RE.search(text):
+            return queryset.none()
+        tsquery = f"websearch_to_tsquery('{PG_CONFIG}', %s)"
+        return queryset.filter(
+            pk__in=RawSQL(f"SELECT scrimmage_id FROM {PG_TABLE} WHERE document @@ {tsquery}", [text])
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT ts_rank(document, {tsquery}) FROM {PG_TABLE} WHERE scrimmage_id = {table}.id",
+                [text],
+                output_field=FloatField(),
+            )
+        )
+
+    # Fallback for backends without a text index
+    condition = Q()
+    for token in _TOKEN_RE.findall(text):
+        condition &= (
+            Q(title__icontains=token)
+            | Q(description__icontains=token)
+            | Q(category__name__icontains=token)
+            | Q(scrimmage_type__name__icontains=token)
+        )
+    if not condition:
+        return queryset.none()
+    return queryset.filter(condition).annotate(
+        search_rank=RawSQL("SELECT 0.0", [], output_field=FloatField())
+    )
@@ -116,6 +116,7 @@ class ScrimmageRSVPSerializer(serializers.ModelSerializer):
 class ScrimmageMediaSerializer(serializers.ModelSerializer):
     media = serializers.PrimaryKeyRelatedField(queryset=Media.objects.all())
     file_url = serializers.SerializerMethodField()
+    renditions = serializers.SerializerMethodField()
     context_name = serializers.CharField(read_only=True)
     caption = serializers.CharField(required=False, allow_blank=True)
 
@@ -129,16 +130,28 @@ class ScrimmageMediaSerializer(serializers.ModelSerializer):
             "context_name",
             "media",
             "file_url",
+            "renditions",
             "caption",
             "approved",
             "file_size",
             "uploaded_at",
         ]
-        read_only_fields = ["app_name", "model_name", "uploaded_at", "file_url"]
+        read_only_fields = ["app_name", "model_name", "uploaded_at", "file_url", "renditions"]
 
     def get_file_url(self, obj):
         return obj.media.file.url if obj.media and obj.media.file else None
 
+    def get_renditions(self, obj):
+        """Ready thumbnails by label: {"thumb": {"url", "width", "height"}, ...}."""
+        renditions = getattr(obj, "scrimmage_renditions", None)
+        if renditions is None:
+            return {}
+        return {
+            r.label: {"url": r.file.url, "width": r.width, "height": r.height}
+            for r in renditions.all()
+            if r.status == "ready" and r.file
+        }
+
     def create(self, validated_data):
         """Ensure app/model linkage and uploader context automatically."""
         request = self.context.get("request")
@@ -201,10 +214,31 @@ class ScrimmageTemplateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
+# ============================================================
+# ✅ Sparse fieldsets (?fields= / ?expand=)
+#   - context["fields"]: only render these fields (plus "id")
+#   - context["expand"]: opt-in to fields listed in Meta.expandable_fields
+# ============================================================
+class SparseFieldsetMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        requested = set(self.context.get("fields") or ())
+        expand = set(self.context.get("expand") or ())
+        expandable = set(getattr(self.Meta, "expandable_fields", ()))
+
+        for name in list(self.fields):
+            if name == "id":
+                continue
+            if name in expandable and name not in expand:
+                self.fields.pop(name)
+            elif requested and name not in requested and name not in expand:
+                self.fields.pop(name)
+
+
 # ============================================================
 # ✅ Scrimmage Serializer (core model)
 # ============================================================
-class ScrimmageSerializer(serializers.ModelSerializer):
+class ScrimmageSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     host = serializers.StringRelatedField(read_only=True)
     category = ScrimmageCategorySerializer(read_only=True)
     category_id = serializers.PrimaryKeyRelatedField(
@@ -267,6 +301,8 @@ class ScrimmageSerializer(serializers.ModelSerializer):
             "updated_at",
             "spots_left",
             "spots_taken",
+            "going_count",
+            "waitlisted_count",
             "rsvps",
             "media_files",
             "recurrence_rule",
@@ -281,6 +317,8 @@ class ScrimmageSerializer(serializers.ModelSerializer):
             "updated_at",
             "spots_left",
             "spots_taken",
+            "going_count",
+            "waitlisted_count",
         ]
 
     def create(self, validated_data):
@@ -303,12 +341,13 @@ class ScrimmageSerializer(serializers.ModelSerializer):
                 data["address"] = parts[-1].strip() if parts else data["address"]
             return data
 
-        # Determine this user's RSVP status if any
-        rsvp = instance.rsvps.filter(user=user).first()
-        if rsvp:
-            status = rsvp.status
+        # Determine this user's RSVP status if any. ScrimmageViewSet annotates
+        # it for the whole page; fall back to a lookup for other callers.
+        if hasattr(instance, "viewer_rsvp_status"):
+            status = instance.viewer_rsvp_status
         else:
-            status = None
+            rsvp = instance.rsvps.filter(user=user).first()
+            status = rsvp.status if rsvp else None
 
         # If pending payment or waitlisted: mask precise location
         if status in ["pending_payment", "waitlisted"]:
@@ -326,6 +365,16 @@ class ScrimmageSerializer(serializers.ModelSerializer):
         return data
 
 
+# ============================================================
+# ✅ Scrimmage List Serializer (browse pages)
+#   - Same fields as ScrimmageSerializer minus the nested
+#     collections, which are only rendered via ?expand=
+# ============================================================
+class ScrimmageListSerializer(ScrimmageSerializer):
+    class Meta(ScrimmageSerializer.Meta):
+        expandable_fields = ["rsvps", "media_files", "media_relations", "recurrence_rule"]
+
+
 # ============================================================
 # ✅ Performance Stats Serializer
 # ============================================================
@@ -0,0 +1,217 @@
+# scrimmages/side_effects.py
+"""
+Outbox handlers: the calendar entries, notifications and recurrence
+generation that follow scrimmage and RSVP writes.
+
+Signal handlers enqueue these (see outbox.py); the worker runs each one
+in its own transaction together with marking the event done, so a
+failed handler leaves nothing behind and is simply retried.
+"""
+from django.contrib.auth import get_user_model
+
+from .models import RecurrenceRule, Scrimmage
+from .outbox import handler
+
+# Optional imports for integrations
+try:
+    from notifications.models import Notification
+    from notifications.fanout import broadcast
+except ImportError:
+    Notification = None
+    broadcast = None
+
+try:
+    from calendars.models import CalendarItem
+except ImportError:
+    CalendarItem = None
+
+try:
+    from groups.models import GroupMember
+except ImportError:
+    GroupMember = None
+
+User = get_user_model()
+
+
+# ============================================================
+# ✅ Helper functions
+# ============================================================
+
+def create_notification(user, title,  body, url=None, kind="scrimmage"):
+    """Utility: create a notification if the Notifications app exists."""
+    if Notification:
+        Notification.objects.create(
+            user=user,
+            kind=kind,
+            title=title,
+            body=body,
+            url=url or "",
+        )
+
+
+def create_calendar_entry(user, scrimmage):
+    """Utility: create a CalendarItem if Calendars app exists."""
+    if CalendarItem:
+        CalendarItem.objects.get_or_create(
+            user=user,
+            kind="scrimmage",
+            title=scrimmage.title,
+            start=scrimmage.start_datetime,
+            end=scrimmage.end_datetime,
+            #defaults={"description": scrimmage.description or ""},
+        )
+
+
+def _scrimmage(scrimmage_id):
+    """The scrimmage, or None if it was deleted before the event ran."""
+    return Scrimmage.objects.select_related("host").filter(pk=scrimmage_id).first()
+
+
+# ============================================================
+# ✅ Scrimmage lifecycle
+# ============================================================
+
+@handler("scrimmage_created")
+def scrimmage_created(scrimmage_id):
+    scrimmage = _scrimmage(scrimmage_id)
+    if scrimmage is None:
+        return
+
+    # Add scrimmage to host's calendar
+    create_calendar_entry(scrimmage.host, scrimmage)
+
+    # Notify host (and potentially group or league)
+    create_notification(
+        user=scrimmage.host,
+        title=f"New scrimmage created: {scrimmage.title}",
+        body="A new scrimmage has been added to your calendar.",
+        url=f"/scrimmages/{scrimmage.id}/",
+    )
+
+    # Notify the group's members (group.members are GroupMember rows)
+    if scrimmage.group_id and broadcast and GroupMember:
+        broadcast(
+            GroupMember.objects.filter(group_id=scrimmage.group_id).values_list("user_id", flat=True),
+            kind="scrimmage",
+            title="New Group Scrimmage",
+            body=f"{scrimmage.host} created a new scrimmage '{scrimmage.title}' in your group.",
+            url=f"/scrimmages/{scrimmage.id}/",
+            exclude=[scrimmage.host_id],
+            background=False,
+        )
+
+
+@handler("scrimmage_deleted")
+def scrimmage_deleted(scrimmage_id, title, host_id):
+    if CalendarItem:
+        CalendarItem.objects.filter(title=title, user_id=host_id, kind="scrimmage").delete()
+
+    if Notification:
+        Notification.objects.filter(url__icontains=f"/scrimmages/{scrimmage_id}/").delete()
+
+
+@handler("generate_recurrences")
+def generate_recurrences(scrimmage_id, rule_id):
+    from .recurrence import generate_occurrences
+
+    rule = RecurrenceRule.objects.select_related("scrimmage").filter(pk=rule_id).first()
+    if rule and rule.auto_generate and rule.active:
+        generate_occurrences([rule])
+
+
+# ============================================================
+# ✅ RSVPs
+# ============================================================
+
+@handler("rsvp_confirmed")
+def rsvp_confirmed(scrimmage_id, user_id):
+    scrimmage = _scrimmage(scrimmage_id)
+    user = User.objects.filter(pk=user_id).first()
+    if scrimmage is None or user is None:
+        return
+    create_calendar_entry(user, scrimmage)
+    create_notification(
+        user,
+        title="RSVP Confirmed",
+        body=f"You are confirmed for scrimmage '{scrimmage.title}'.",
+        url=f"/scrimmages/{scrimmage.id}/",
+    )
+
+
+@handler("rsvp_cancelled")
+def rsvp_cancelled(scrimmage_id, user_id):
+    scrimmage = _scrimmage(scrimmage_id)
+    user = User.objects.filter(pk=user_id).first()
+    if scrimmage is None or user is None:
+        return
+    create_notification(
+        user,
+        title="RSVP Cancelled",
+        body=f"Your RSVP for '{scrimmage.title}' was cancelled.",
+        url=f"/scrimmages/{scrimmage.id}/",
+    )
+
+
+@handler("rsvps_promoted")
+def rsvps_promoted(scrimmage_id, user_ids):
+    scrimmage = _scrimmage(scrimmage_id)
+    if scrimmage is None:
+        return
+    if broadcast:
+        broadcast(
+            user_ids,
+            kind="scrimmage",
+            title="Promoted to Going",
+            body=f"A spot opened up for '{scrimmage.title}'. You're now marked as going!",
+            url=f"/scrimmages/{scrimmage.id}/",
+            background=False,
+        )
+
+    if CalendarItem:
+        entry = {
+            "kind": "scrimmage",
+            "title": scrimmage.title,
+            "start": scrimmage.start_datetime,
+            "end": scrimmage.end_datetime,
+        }
+        existing = set(
+            CalendarItem.objects.filter(user_id__in=user_ids, **entry).values_list("user_id", flat=True)
+        )
+        CalendarItem.objects.bulk_create(
+            [CalendarItem(user_id=user_id, **entry) for user_id in user_ids if user_id not in existing],
+            batch_size=500,
+        )
+
+
+# ============================================================
+# ✅ Media
+# ============================================================
+
+@handler("media_uploaded")
+def media_uploaded(scrimmage_id, uploader_id):
+    scrimmage = _scrimmage(scrimmage_id)
+    uploader = User.objects.filter(pk=uploader_id).first()
+    if scrimmage is None or uploader is None:
+        return
+
+    # Notify host
+    create_notification(
+        scrimmage.host,
+        title="New Media Upload",
+        body=f"{uploader} uploaded new media to '{scrimmage.title}'.",
+        url=f"/scrimmages/{scrimmage.id}/",
+    )
+
+    # Notify all participants except uploader
+    if broadcast:
+        broadcast(
+            scrimmage.rsvps.filter(status__in=["going", "checked_in", "completed"]).values_list(
+                "user_id", flat=True
+            ),
+            kind="scrimmage",
+            title="New Scrimmage Media",
+            body=f"New highlight uploaded to '{scrimmage.title}'.",
+            url=f"/scrimmages/{scrimmage.id}/",
+            exclude=[uploader.pk],
+            background=False,
+        )
@@ -1,88 +1,92 @@
-from django.db.models.signals import post_save, post_delete
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.dispatch import receiver
 from django.utils import timezone
-from django.conf import settings
 
 from .models import (
     Scrimmage,
+    ScrimmageCategory,
+    ScrimmageType,
     ScrimmageRSVP,
     ScrimmageMedia,
     RecurrenceRule,
 )
-from datetime import timedelta
 
-# Optional imports for integrations
-try:
-    from notifications.models import Notification
-except ImportError:
-    Notification = None
-
-try:
-    from calendars.models import CalendarItem
-except ImportError:
-    CalendarItem = None
-
-try:
-    from payments.models import Payment
-except ImportError:
-    Payment = None
+from media.models import MediaRelation
 
+from . import cache, search
+from .counters import SEAT_STATUSES
+from .outbox import enqueue
+from .media_quota import release as release_media_quota
+from .ratings import apply_rating_change
+from .renditions import queue_renditions
+from .waitlist import promote_waitlisted
 
 # ============================================================
-# ✅ Helper functions
+# ✅ Scrimmage creation → Calendar + Notifications
 # ============================================================
+@receiver(post_save, sender=Scrimmage)
+def handle_scrimmage_created(sender, instance: Scrimmage, created, **kwargs):
+    # Any change can alter public listings and this scrimmage's detail
+    cache.invalidate(instance.pk)
 
-def create_notification(user, title,  body, url=None, kind="scrimmage"):
-    """Utility: create a notification if the Notifications app exists."""
-    if Notification:
-        Notification.objects.create(
-            user=user,
-            kind=kind,
-            title=title,
-            body=body,
-            url=url or "",
-        )
-
-
-def create_calendar_entry(user, scrimmage):
-    """Utility: create a CalendarItem if Calendars app exists."""
-    if CalendarItem:
-        CalendarItem.objects.get_or_create(
-            user=user,
-            kind="scrimmage",
-            title=scrimmage.title,
-            start=scrimmage.start_datetime,
-            end=scrimmage.end_datetime,
-            #defaults={"description": scrimmage.description or ""},
-        )
+    # Capacity may have grown: fill new seats from the waitlist
+    if not created:
+        promote_waitlisted(instance.pk)
+
+    if created:
+        # Host calendar entry and notifications (host + group members)
+        enqueue("scrimmage_created", instance.pk)
 
 
 # ============================================================
-# ✅ Scrimmage creation → Calendar + Notifications
+# ✅ Search index sync
+#   - Scrimmage saved → (re)index its document
+#   - Category/type renamed → reindex the scrimmages using it
+#   - Category/type deleted → the FK is nulled by a queryset UPDATE (no
+#     save signal), so collect the scrimmages first and reindex after
 # ============================================================
 @receiver(post_save, sender=Scrimmage)
-def handle_scrimmage_created(sender, instance: Scrimmage, created, **kwargs):
-    if created:
-        # Add scrimmage to host's calendar
-        create_calendar_entry(instance.host, instance)
-
-        # Notify host (and potentially group or league)
-        create_notification(
-            user=instance.host,
-            title=f"New scrimmage created: {instance.title}",
-            body="A new scrimmage has been added to your calendar.",
-            url=f"/scrimmages/{instance.id}/",
-        )
-
-        # Optionally, notify members of a group or league
-        if instance.group and hasattr(instance.group, "members"):
-            for member in instance.group.members.exclude(id=instance.host.id):
-                create_notification(
-                    member,
-                    title="New Group Scrimmage",
-                    body=f"{instance.host} created a new scrimmage '{instance.title}' in your group.",
-                    url=f"/scrimmages/{instance.id}/",
-                )
+def index_scrimmage(sender, instance: Scrimmage, raw=False, **kwargs):
+    if raw:
+        return
+    search.index_scrimmages([instance.pk])
+
+
+@receiver(post_save, sender=ScrimmageCategory)
+def reindex_category_scrimmages(sender, instance: ScrimmageCategory, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    ids = list(Scrimmage.objects.filter(category=instance).values_list("pk", flat=True))
+    search.index_scrimmages(ids)
+    # Names are part of list and detail payloads
+    cache.invalidate_many(ids)
+
+
+@receiver(post_save, sender=ScrimmageType)
+def reindex_type_scrimmages(sender, instance: ScrimmageType, created, raw=False, **kwargs):
+    if created or raw:
+        return
+    ids = list(Scrimmage.objects.filter(scrimmage_type=instance).values_list("pk", flat=True))
+    search.index_scrimmages(ids)
+    cache.invalidate_many(ids)
+
+
+@receiver(pre_delete, sender=ScrimmageCategory)
+@receiver(pre_delete, sender=ScrimmageType)
+def collect_classified_scrimmages(sender, instance, **kwargs):
+    field = "category" if sender is ScrimmageCategory else "scrimmage_type"
+    instance._reindex_scrimmage_ids = list(
+        Scrimmage.objects.filter(**{field: instance}).values_list("pk", flat=True)
+    )
+
+
+@receiver(post_delete, sender=ScrimmageCategory)
+@receiver(post_delete, sender=ScrimmageType)
+def reindex_declassified_scrimmages(sender, instance, **kwargs):
+    ids = getattr(instance, "_reindex_scrimmage_ids", None)
+    if ids:
+        search.index_scrimmages(ids)
+        cache.invalidate_many(ids)
 
 
 # ============================================================
@@ -93,41 +97,39 @@ def handle_rsvp_updated(sender, instance: ScrimmageRSVP, created, **kwargs):
     scrimmage = instance.scrimmage
     user = instance.user
 
+    # Counts changed: drop this detail, and listings if the scrimmage is public
+    cache.invalidate(scrimmage.id, listings=scrimmage.visibility == "public")
+
     # Add to user's calendar when confirmed "going"
     if instance.status == "going":
-        create_calendar_entry(user, scrimmage)
-        create_notification(
-            user,
-            title="RSVP Confirmed",
-            body=f"You are confirmed for scrimmage '{scrimmage.title}'.",
-            url=f"/scrimmages/{scrimmage.id}/",
-        )
-
-    # Handle auto-promotion from waitlist
-    if instance.status == "waitlisted":
-        if scrimmage.spots_left > 0:
+        enqueue("rsvp_confirmed", scrimmage.id, user_id=user.pk)
+
+    # Seats open and people waiting → promote the oldest waitlisted RSVPs
+    # in one set-based step (this RSVP too, if it is first in line)
+    if instance.status not in SEAT_STATUSES and scrimmage.spots_left > 0 and scrimmage.waitlisted_count:
+        promoted = promote_waitlisted(scrimmage.id)
+        if any(pk == instance.pk for pk, _ in promoted):
             instance.status = "going"
-            instance.save(update_fields=["status"])
-            create_notification(
-                user,
-                title="Promoted to Going",
-                body=f"A spot opened up for '{scrimmage.title}'. You're now marked as going!",
-                url=f"/scrimmages/{scrimmage.id}/",
-            )
 
     # Optional: refund trigger if cancelled
-    if instance.status == "cancelled" and scrimmage.is_paid and Payment:
-        payments = Payment.objects.filter(
-            user=user, scrimmage_id=scrimmage.id, status="succeeded"
-        )
-        for pay in payments:
-            pay.refund(reason="User cancelled RSVP")
-        create_notification(
-            user,
-            title="RSVP Cancelled",
-            body=f"Your RSVP for '{scrimmage.title}' was cancelled. Refund initiated if applicable.",
-            url=f"/scrimmages/{scrimmage.id}/",
-        )
+    if instance.status == "cancelled" and scrimmage.is_paid:
+        enqueue("rsvp_cancelled", scrimmage.id, user_id=user.pk)
+
+
+# ============================================================
+# ✅ RSVP deleted → keep scrimmage counters in sync
+#   (post_delete also fires for cascades and queryset deletes,
+#    inside the deleting transaction)
+# ============================================================
+@receiver(post_delete, sender=ScrimmageRSVP)
+def handle_rsvp_deleted(sender, instance: ScrimmageRSVP, **kwargs):
+    from .counters import apply_status_change
+
+    apply_status_change(instance.scrimmage_id, instance.status, None)
+    apply_rating_change(instance.scrimmage_id, instance.rating, None)
+    cache.invalidate(instance.scrimmage_id)
+    if instance.status in SEAT_STATUSES:
+        promote_waitlisted(instance.scrimmage_id)
 
 
 # ============================================================
@@ -135,30 +137,27 @@ def handle_rsvp_updated(sender, instance: ScrimmageRSVP, created, **kwargs):
 # ============================================================
 @receiver(post_save, sender=ScrimmageMedia)
 def handle_media_uploaded(sender, instance: ScrimmageMedia, created, **kwargs):
-    if not created:
-        return
-    scrimmage = instance.scrimmage
-    uploader = instance.uploader
-
-    # Notify host
-    create_notification(
-        scrimmage.host,
-        title="New Media Upload",
-        body=f"{uploader} uploaded new media to '{scrimmage.title}'.",
-        url=f"/scrimmages/{scrimmage.id}/",
-    )
+    # Media is part of the detail payload: move its ETag and drop cached copies
+    Scrimmage.objects.filter(pk=instance.scrimmage_id).update(updated_at=timezone.now())
+    cache.invalidate(instance.scrimmage_id, listings=False)
+    if created:
+        # Notify host & participants
+        enqueue("media_uploaded", instance.scrimmage_id, uploader_id=instance.uploader_id)
+
+
+@receiver(post_save, sender=MediaRelation)
+def queue_media_renditions(sender, instance: MediaRelation, created, **kwargs):
+    """Thumbnails are rendered by the process_media_renditions worker."""
+    if created:
+        queue_renditions(instance)
+
 
-    # Notify all participants except uploader
-    participants = scrimmage.rsvps.filter(
-        status__in=["going", "checked_in", "completed"]
-    ).exclude(user=uploader)
-    for rsvp in participants:
-        create_notification(
-            rsvp.user,
-            title="New Scrimmage Media",
-            body=f"New highlight uploaded to '{scrimmage.title}'.",
-            url=f"/scrimmages/{scrimmage.id}/",
-        )
+@receiver(post_delete, sender=ScrimmageMedia)
+def handle_media_deleted(sender, instance: ScrimmageMedia, **kwargs):
+    """Credit the upload back to the uploader's quota ledger."""
+    release_media_quota(instance.uploader_id, instance.scrimmage_id, 1, instance.file_size)
+    Scrimmage.objects.filter(pk=instance.scrimmage_id).update(updated_at=timezone.now())
+    cache.invalidate(instance.scrimmage_id, listings=False)
 
 
 # ============================================================
@@ -167,63 +166,14 @@ def handle_media_uploaded(sender, instance: ScrimmageMedia, created, **kwargs):
 @receiver(post_save, sender=RecurrenceRule)
 def handle_recurrence_rule(sender, instance: RecurrenceRule, created, **kwargs):
     """
-    When RecurrenceRule is saved and active, generate next occurrence(s)
-    if auto_generate=True.
-    This logic can also be called manually by a management command.
+    When RecurrenceRule is saved and active, materialize its occurrences
+    over the generation horizon if auto_generate=True.
+    The nightly ``generate_recurrences`` command does the same for all rules.
     """
     if not instance.auto_generate or not instance.active:
         return
 
-    base = instance.scrimmage
-    freq = instance.frequency
-    interval = instance.interval or 1
-
-    if freq == "weekly":
-        delta = timedelta(weeks=interval)
-    else:
-        delta = timedelta(days=30 * interval)
-
-    next_start = base.start_datetime + delta
-    next_end = base.end_datetime + delta
-
-    # Prevent duplication: only create if no upcoming copy
-    exists = Scrimmage.objects.filter(
-        host=base.host,
-        title=base.title,
-        start_datetime__date=next_start.date(),
-    ).exists()
-    if exists:
-        return
-
-    new_scrimmage = Scrimmage.objects.create(
-        host=base.host,
-        title=base.title,
-        description=base.description,
-        category=base.category,
-        scrimmage_type=base.scrimmage_type,
-        visibility=base.visibility,
-        location_name=base.location_name,
-        address=base.address,
-        latitude=base.latitude,
-        longitude=base.longitude,
-        start_datetime=next_start,
-        end_datetime=next_end,
-        max_participants=base.max_participants,
-        entry_fee=base.entry_fee,
-        currency=base.currency,
-        credit_required=False,
-        is_paid=base.is_paid,
-        teams=base.teams,
-        status="upcoming",
-    )
-
-    create_notification(
-        base.host,
-        title="Recurring Scrimmage Generated",
-        body=f"A new occurrence of '{base.title}' has been created automatically.",
-        url=f"/scrimmages/{new_scrimmage.id}/",
-    )
-    create_calendar_entry(base.host, new_scrimmage)
+    enqueue("generate_recurrences", instance.scrimmage_id, rule_id=instance.pk)
 
 
 # ============================================================
@@ -231,12 +181,7 @@ def handle_recurrence_rule(sender, instance: RecurrenceRule, created, **kwargs):
 # ============================================================
 @receiver(post_delete, sender=Scrimmage)
 def handle_scrimmage_deleted(sender, instance: Scrimmage, **kwargs):
-    if CalendarItem:
-        CalendarItem.objects.filter(
-            title=instance.title, user=instance.host, kind="scrimmage"
-        ).delete()
-
-    if Notification:
-        Notification.objects.filter(
-            url__icontains=f"/scrimmages/{instance.id}/"
-        ).delete()
+    cache.invalidate(instance.pk)
+    # Calendar entries and notifications pointing at it
+    enqueue("scrimmage_deleted", instance.pk, title=instance.title, host_id=instance.host_id)
+    search.remove_scrimmages([instance.pk])
@@ -1,10 +1,15 @@
 # scrimmages/tests.py
+import time
+import uuid
 from django.contrib.auth import get_user_model
+from django.test import TransactionTestCase, override_settings
 from django.urls import reverse
 from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from django.utils import timezone
 from datetime import timedelta
+from unittest import skipUnless
+from .imaging import Image
 from .models import Scrimmage, ScrimmageRSVP
 
 User = get_user_model()
@@ -89,3 +94,1434 @@ class ScrimmageTests(BaseTestCase):
         )
 
 from datetime import date, timedelta
+
+
+class RSVPCounterTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(email="host@example.com", password="pass123")
+        self.players = [
+            User.objects.create_user(email=f"p{i}@example.com", password="pass123")
+            for i in range(3)
+        ]
+        self.scrimmage = Scrimmage.objects.create(
+            title="Counter Scrimmage",
+            host=self.host,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            visibility="public",
+            status="upcoming",
+            max_participants=1,
+        )
+
+    def counts(self):
+        self.scrimmage.refresh_from_db()
+        return self.scrimmage.going_count, self.scrimmage.waitlisted_count
+
+    def test_counters_follow_create_update_delete(self):
+        first = ScrimmageRSVP.objects.create(scrimmage=self.scrimmage, user=self.players[0], status="going")
+        ScrimmageRSVP.objects.create(scrimmage=self.scrimmage, user=self.players[1], status="waitlisted")
+        self.assertEqual(self.counts(), (1, 1))
+
+        # Freeing the seat promotes the waitlisted RSVP
+        first.status = "cancelled"
+        first.save(update_fields=["status"])
+        self.assertEqual(self.counts(), (1, 0))
+        self.assertEqual(self.scrimmage.cancelled_count, 1)
+
+        first.delete()
+        self.scrimmage.refresh_from_db()
+        self.assertEqual(self.scrimmage.cancelled_count, 0)
+
+    def test_spots_read_counters_without_queries(self):
+        ScrimmageRSVP.objects.create(scrimmage=self.scrimmage, user=self.players[0], status="going")
+        scrim = Scrimmage.objects.get(pk=self.scrimmage.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(scrim.spots_left, 0)
+            self.assertEqual(scrim.spots_taken, 1)
+
+    def test_rebuild_command_fixes_drift(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        ScrimmageRSVP.objects.create(scrimmage=self.scrimmage, user=self.players[0], status="going")
+        Scrimmage.objects.filter(pk=self.scrimmage.pk).update(going_count=7)
+
+        out = StringIO()
+        call_command("rebuild_rsvp_counters", stdout=out)
+        self.assertIn("going_count: 7 → 1", out.getvalue())
+        self.assertEqual(self.counts(), (1, 0))
+
+
+class ScrimmageListTestBase(APITestCase):
+    def setUp(self):
+        self.viewer = User.objects.create_user(email="viewer@example.com", password="pass123")
+        self.host = User.objects.create_user(email="listhost@example.com", password="pass123")
+        self.others = [
+            User.objects.create_user(email=f"guest{i}@example.com", password="pass123")
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.viewer)
+
+    def make_scrimmages(self, n):
+        for i in range(n):
+            scrim = Scrimmage.objects.create(
+                title=f"Run {i}",
+                host=self.host,
+                address="12 Court St, Springfield",
+                start_datetime=timezone.now() + timedelta(days=i + 1),
+                end_datetime=timezone.now() + timedelta(days=i + 1, hours=2),
+                visibility="public",
+                status="upcoming",
+            )
+            ScrimmageRSVP.objects.create(scrimmage=scrim, user=self.viewer, status="going")
+            for other in self.others:
+                ScrimmageRSVP.objects.create(scrimmage=scrim, user=other, status="interested")
+
+    def rows(self, res):
+        return res.data["results"] if isinstance(res.data, dict) else res.data
+
+
+class ScrimmageListQueryCountTests(ScrimmageListTestBase):
+    def list_query_count(self, params=None):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            res = self.client.get(reverse("scrimmage-list"), params or {})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return len(ctx.captured_queries)
+
+    def test_list_query_count_is_constant(self):
+        self.make_scrimmages(2)
+        self.list_query_count()  # warm the content type cache
+        small = self.list_query_count()
+        self.make_scrimmages(8)
+        self.assertEqual(self.list_query_count(), small)
+
+    def test_viewer_status_controls_location_masking(self):
+        self.make_scrimmages(1)
+        res = self.client.get(reverse("scrimmage-list"))
+        self.assertEqual(self.rows(res)[0]["address"], "12 Court St, Springfield")
+
+    def test_expanded_list_query_count_is_constant(self):
+        params = {"expand": "rsvps,recurrence_rule"}
+        self.make_scrimmages(2)
+        self.list_query_count(params)
+        small = self.list_query_count(params)
+        self.make_scrimmages(8)
+        self.assertEqual(self.list_query_count(params), small)
+
+
+class ScrimmageSparseFieldsetTests(ScrimmageListTestBase):
+    def test_list_omits_nested_collections_by_default(self):
+        self.make_scrimmages(1)
+        row = self.rows(self.client.get(reverse("scrimmage-list")))[0]
+        self.assertNotIn("rsvps", row)
+        self.assertNotIn("media_relations", row)
+        self.assertIn("spots_left", row)
+
+    def test_expand_and_fields(self):
+        self.make_scrimmages(1)
+        res = self.client.get(reverse("scrimmage-list"), {"fields": "title", "expand": "rsvps"})
+        row = self.rows(res)[0]
+        self.assertEqual(set(row), {"id", "title", "rsvps"})
+        self.assertEqual(len(row["rsvps"]), 4)
+
+    def test_detail_keeps_full_representation(self):
+        self.make_scrimmages(1)
+        scrim = Scrimmage.objects.get()
+        res = self.client.get(reverse("scrimmage-detail", args=[scrim.id]))
+        self.assertIn("rsvps", res.data)
+
+
+class ScrimmageCursorPaginationTests(ScrimmageListTestBase):
+    def walk(self, params):
+        url, seen = reverse("scrimmage-list"), []
+        while url:
+            res = self.client.get(url, params)
+            seen.extend(row["id"] for row in res.data["results"])
+            url, params = res.data["next"], None
+        return seen
+
+    def test_walks_all_rows_in_start_order(self):
+        self.make_scrimmages(5)
+        expected = list(Scrimmage.objects.order_by("start_datetime", "id").values_list("id", flat=True))
+        self.assertEqual(self.walk({"page_size": 2}), expected)
+
+    def test_inserts_do_not_shift_pages(self):
+        self.make_scrimmages(4)
+        first = self.client.get(reverse("scrimmage-list"), {"page_size": 2})
+        # A new scrimmage starting before everything already seen
+        Scrimmage.objects.create(
+            title="Late addition",
+            host=self.host,
+            start_datetime=timezone.now() + timedelta(hours=1),
+            end_datetime=timezone.now() + timedelta(hours=2),
+            visibility="public",
+            status="upcoming",
+        )
+        second = self.client.get(first.data["next"])
+        first_ids = [row["id"] for row in first.data["results"]]
+        second_ids = [row["id"] for row in second.data["results"]]
+        self.assertFalse(set(first_ids) & set(second_ids))
+        self.assertEqual(len(second_ids), 2)
+
+    def test_previous_link_returns_prior_page(self):
+        self.make_scrimmages(4)
+        first = self.client.get(reverse("scrimmage-list"), {"page_size": 2})
+        second = self.client.get(first.data["next"])
+        back = self.client.get(second.data["previous"])
+        self.assertEqual(back.data["results"], first.data["results"])
+
+    def test_invalid_cursor(self):
+        res = self.client.get(reverse("scrimmage-list"), {"cursor": "not-a-cursor"})
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class ScrimmageVisibilityTests(APITestCase):
+    def setUp(self):
+        from groups.models import Group, GroupMember
+        from leagues.models import League
+
+        self.viewer = User.objects.create_user(email="seer@example.com", password="pass123")
+        self.host = User.objects.create_user(email="privatehost@example.com", password="pass123")
+        group = Group.objects.create(owner=self.host, name="Crew")
+        league = League.objects.create(name="Sunday League", owner=self.viewer)
+
+        def scrim(title, **extra):
+            return Scrimmage.objects.create(
+                title=title,
+                host=self.host,
+                start_datetime=timezone.now() + timedelta(days=1),
+                end_datetime=timezone.now() + timedelta(days=1, hours=1),
+                status="upcoming",
+                **{"visibility": "private", **extra},
+            )
+
+        self.public = scrim("Public", visibility="public")
+        self.hidden = scrim("Hidden")
+        self.grouped = scrim("Group run", group=group)
+        self.league = scrim("League night", league=league)
+        self.attending = scrim("Invite only")
+        GroupMember.objects.create(group=group, user=self.viewer)
+        # Two memberships on the same group used to duplicate rows before DISTINCT
+        GroupMember.objects.create(group=group, user=self.host)
+        ScrimmageRSVP.objects.create(scrimmage=self.attending, user=self.viewer, status="interested")
+        ScrimmageRSVP.objects.create(scrimmage=self.attending, user=self.host, status="going")
+
+    def test_visible_scrimmages(self):
+        from .access import visible_scrimmages
+
+        ids = list(visible_scrimmages(self.viewer).values_list("id", flat=True))
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(
+            set(ids), {self.public.id, self.grouped.id, self.league.id, self.attending.id}
+        )
+
+    def test_anonymous_sees_public_only(self):
+        from django.contrib.auth.models import AnonymousUser
+        from .access import visible_scrimmages
+
+        ids = set(visible_scrimmages(AnonymousUser()).values_list("id", flat=True))
+        self.assertEqual(ids, {self.public.id})
+
+
+class ScrimmageNearbyTests(ScrimmageListTestBase):
+    def place(self, title, lat, lng):
+        return Scrimmage.objects.create(
+            title=title,
+            host=self.host,
+            latitude=lat,
+            longitude=lng,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=1),
+            visibility="public",
+            status="upcoming",
+        )
+
+    def test_geohash_set_on_save(self):
+        scrim = self.place("Geo", 57.64911, 10.40744)
+        self.assertEqual(scrim.geohash[:7], "u4pruyd")
+
+    def test_nearby_sorted_by_distance(self):
+        from .geo import haversine_km
+
+        far = self.place("Across town", 40.7800, -73.9500)
+        near = self.place("Around the corner", 40.7130, -74.0050)
+        self.place("Other city", 34.0522, -118.2437)
+
+        res = self.client.get(reverse("scrimmage-nearby"), {"lat": 40.7128, "lng": -74.0060, "radius": 15})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual([row["id"] for row in res.data], [near.id, far.id])
+        self.assertAlmostEqual(
+            res.data[1]["distance_km"], haversine_km(40.7128, -74.0060, 40.7800, -73.9500), places=1
+        )
+
+    def test_nearby_across_antimeridian(self):
+        east = self.place("Fiji east", -17.0, 179.99)
+        res = self.client.get(reverse("scrimmage-nearby"), {"lat": -17.0, "lng": -179.99, "radius": 10})
+        self.assertEqual([row["id"] for row in res.data], [east.id])
+
+    def test_nearby_keeps_points_just_inside_radius(self):
+        import math
+
+        from .geo import EARTH_RADIUS_KM, haversine_km
+
+        lat, lng, distance = 60.0, 10.0, 9.99
+        dlat = math.degrees(distance / EARTH_RADIUS_KM)
+        dlng = math.degrees(2 * math.asin(math.sin(distance / (2 * EARTH_RADIUS_KM)) / math.cos(math.radians(lat))))
+        north = self.place("North", lat + dlat, lng)
+        east = self.place("East", lat, lng + dlng)
+        self.place("Outside", lat + dlat * 1.01, lng)
+        self.assertLess(haversine_km(lat, lng, lat, lng + dlng), 10)
+
+        res = self.client.get(reverse("scrimmage-nearby"), {"lat": lat, "lng": lng, "radius": 10})
+        self.assertEqual({row["id"] for row in res.data}, {north.id, east.id})
+
+    def test_prefilter_matches_geohash_cells_by_prefix(self):
+        from .geo import proximity_prefilter
+
+        # Prefix lookups (LIKE 'abc%') hold under any collation; range bounds do not
+        sql = str(Scrimmage.objects.filter(proximity_prefilter(40.7128, -74.0060, 5)).query)
+        self.assertIn("LIKE", sql)
+        self.assertNotIn('"geohash" <', sql)
+
+    def test_nearby_requires_coordinates(self):
+        res = self.client.get(reverse("scrimmage-nearby"))
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ScrimmageSearchTests(ScrimmageListTestBase):
+    def place(self, title, description="", category=None, visibility="public"):
+        return Scrimmage.objects.create(
+            title=title,
+            description=description,
+            category=category,
+            host=self.host,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=1),
+            visibility=visibility,
+            status="upcoming",
+        )
+
+    def search(self, q, **params):
+        res = self.client.get(reverse("scrimmage-search"), {"q": q, **params})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in res.data]
+
+    def test_title_match_ranks_above_description_match(self):
+        in_desc = self.place("Sunday run", description="Casual basketball for everyone")
+        in_title = self.place("Basketball pickup")
+        self.place("Volleyball night")
+        self.assertEqual(self.search("basketball"), [in_title.id, in_desc.id])
+
+    def test_category_name_and_rename_are_indexed(self):
+        from .models import ScrimmageCategory
+
+        category = ScrimmageCategory.objects.create(name="Futsal", created_by=self.host, approved=True)
+        scrim = self.place("Thursday game", category=category)
+        self.assertEqual(self.search("futsal"), [scrim.id])
+
+        category.name = "Indoor soccer"
+        category.save()
+        self.assertEqual(self.search("futsal"), [])
+        self.assertEqual(self.search("soccer"), [scrim.id])
+
+    def test_deleted_category_and_type_leave_the_index(self):
+        from .models import ScrimmageCategory, ScrimmageType
+
+        category = ScrimmageCategory.objects.create(name="Futsal", created_by=self.host, approved=True)
+        kind = ScrimmageType.objects.create(category=category, name="Pickleball", created_by=self.host)
+        scrim = self.place("Thursday game", category=category)
+        scrim.scrimmage_type = kind
+        scrim.save()
+        self.assertEqual(self.search("pickleball"), [scrim.id])
+
+        kind.delete()
+        self.assertEqual(self.search("pickleball"), [])
+        self.assertEqual(self.search("futsal"), [scrim.id])
+        category.delete()
+        self.assertEqual(self.search("futsal"), [])
+        self.assertEqual(self.search("thursday"), [scrim.id])
+
+    def test_index_follows_updates_and_deletes(self):
+        scrim = self.place("Tennis doubles")
+        scrim.title = "Padel doubles"
+        scrim.save()
+        self.assertEqual(self.search("tennis"), [])
+        self.assertEqual(self.search("padel"), [scrim.id])
+
+        scrim.delete()
+        self.assertEqual(self.search("padel"), [])
+
+    def test_prefix_and_visibility(self):
+        visible = self.place("Badminton ladder")
+        self.place("Badminton private session", visibility="private")
+        self.assertEqual(self.search("badmin"), [visible.id])
+
+    def test_requires_query(self):
+        res = self.client.get(reverse("scrimmage-search"), {"q": "  "})
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+@override_settings(SCRIMMAGE_CACHE_ALLOW_LOCAL=True)  # the test cache is LocMem
+class AnonymousResponseCacheTests(ScrimmageListTestBase):
+    def setUp(self):
+        from . import cache
+
+        super().setUp()
+        cache.get_cache().clear()
+        self.anon = APIClient()
+
+    def test_list_is_served_from_cache_until_a_scrimmage_changes(self):
+        self.make_scrimmages(2)
+        url = reverse("scrimmage-list")
+        self.assertEqual(self.anon.get(url)["X-Cache"], "MISS")
+        res = self.anon.get(url)
+        self.assertEqual(res["X-Cache"], "HIT")
+        self.assertEqual(len(self.rows(res)), 2)
+        self.assertEqual(self.anon.get(url, {"page_size": 1})["X-Cache"], "MISS")
+
+        scrim = Scrimmage.objects.first()
+        scrim.title = "Renamed"
+        scrim.save()
+        res = self.anon.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertIn("Renamed", [row["title"] for row in self.rows(res)])
+
+    def test_rsvp_change_invalidates_detail(self):
+        self.make_scrimmages(1)
+        scrim = Scrimmage.objects.get()
+        url = reverse("scrimmage-detail", args=[scrim.id])
+        self.anon.get(url)
+        self.assertEqual(self.anon.get(url)["X-Cache"], "HIT")
+
+        ScrimmageRSVP.objects.filter(scrimmage=scrim, user=self.viewer).delete()
+        res = self.anon.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(res.data["going_count"], 0)
+
+    def test_category_rename_invalidates_listings(self):
+        from .models import ScrimmageCategory
+
+        self.make_scrimmages(1)
+        category = ScrimmageCategory.objects.create(name="Pickup", created_by=self.host, approved=True)
+        Scrimmage.objects.update(category=category)
+        url = reverse("scrimmage-list")
+        self.anon.get(url)
+        self.assertEqual(self.anon.get(url)["X-Cache"], "HIT")
+
+        category.name = "Open run"
+        category.save()
+        res = self.anon.get(url)
+        self.assertEqual(res["X-Cache"], "MISS")
+        self.assertEqual(self.rows(res)[0]["category"]["name"], "Open run")
+
+    @override_settings(SCRIMMAGE_CACHE_ALLOW_LOCAL=False)
+    def test_per_process_backend_is_not_used(self):
+        self.make_scrimmages(1)
+        self.assertNotIn("X-Cache", self.anon.get(reverse("scrimmage-list")))
+
+    def test_authenticated_requests_bypass_cache_and_stats_are_counted(self):
+        from . import cache
+
+        self.make_scrimmages(1)
+        url = reverse("scrimmage-list")
+        self.assertNotIn("X-Cache", self.client.get(url))
+        self.anon.get(url)
+        self.anon.get(url)
+        self.assertEqual(cache.stats(), {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+        self.viewer.is_staff = True
+        self.viewer.save()
+        res = self.client.get(reverse("scrimmage-cache-stats"))
+        self.assertEqual(res.data["hits"], 1)
+
+
+class ScrimmageETagTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(1)
+        self.scrim = Scrimmage.objects.get()
+
+    def test_detail_not_modified_until_rsvp_changes(self):
+        url = reverse("scrimmage-detail", args=[self.scrim.id])
+        first = self.client.get(url)
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('W/"detail-'))
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res["ETag"], etag)
+
+        rsvp = ScrimmageRSVP.objects.get(scrimmage=self.scrim, user=self.others[0])
+        rsvp.team_name = "Blue"
+        rsvp.save(update_fields=["team_name"])
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res["ETag"], etag)
+
+    def test_rsvps_list_etag_and_scrimmage_edit(self):
+        url = reverse("scrimmage-rsvps", args=[self.scrim.id])
+        etag = self.client.get(url)["ETag"]
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.scrim.title = "Edited"
+        self.scrim.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+    def test_etag_depends_on_viewer(self):
+        url = reverse("scrimmage-detail", args=[self.scrim.id])
+        etag = self.client.get(url)["ETag"]
+        anon = APIClient()
+        self.assertEqual(anon.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_200_OK)
+
+
+class RSVPAdmissionTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.scrim = Scrimmage.objects.create(
+            title="Two seats",
+            host=self.host,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            visibility="public",
+            status="upcoming",
+            max_participants=2,
+        )
+
+    def rsvp(self, user):
+        self.client.force_authenticate(user=user)
+        return self.client.post(reverse("scrimmage-rsvp", args=[self.scrim.id]), {"payment_method": "cash"})
+
+    def test_going_until_full_then_waitlisted(self):
+        statuses = [self.rsvp(user).data["status"] for user in self.others]
+        self.assertEqual(statuses, ["going", "going", "waitlisted"])
+        self.scrim.refresh_from_db()
+        self.assertEqual((self.scrim.going_count, self.scrim.waitlisted_count), (2, 1))
+
+    def test_full_without_waitlist_is_rejected(self):
+        Scrimmage.objects.filter(pk=self.scrim.pk).update(waitlist_enabled=False)
+        self.rsvp(self.others[0])
+        self.rsvp(self.others[1])
+        res = self.rsvp(self.others[2])
+        self.assertEqual(res.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(
+            ScrimmageRSVP.objects.get(scrimmage=self.scrim, user=self.others[2]).status, "interested"
+        )
+
+    def test_rsvp_retry_with_idempotency_key_is_replayed(self):
+        from .models import OutboxEvent
+
+        self.client.force_authenticate(user=self.others[0])
+        url = reverse("scrimmage-rsvp", args=[self.scrim.id])
+        first = self.client.post(url, {"payment_method": "cash"}, HTTP_IDEMPOTENCY_KEY="rsvp-1")
+        again = self.client.post(url, {"payment_method": "cash"}, HTTP_IDEMPOTENCY_KEY="rsvp-1")
+        self.assertEqual((again.status_code, again.data), (first.status_code, first.data))
+        self.assertEqual(again["Idempotent-Replayed"], "true")
+        self.assertEqual(OutboxEvent.objects.filter(kind="rsvp_confirmed").count(), 1)
+
+    def test_repeat_going_keeps_the_seat(self):
+        self.rsvp(self.others[0])
+        self.rsvp(self.others[1])
+        self.assertEqual(self.rsvp(self.others[0]).data["status"], "going")
+        self.scrim.refresh_from_db()
+        self.assertEqual(self.scrim.going_count, 2)
+
+
+class RSVPAdmissionConcurrencyTests(TransactionTestCase):
+    """Hundreds of simultaneous "going" RSVPs must never exceed capacity."""
+
+    CAPACITY = 25
+    REQUESTS = 300
+    WORKERS = 16
+
+    def setUp(self):
+        self.host = User.objects.create_user(email="stresshost@example.com", password="pass123")
+        self.users = [
+            User.objects.create_user(email=f"stress{i}@example.com", password=None)
+            for i in range(self.REQUESTS)
+        ]
+        self.scrim = Scrimmage.objects.create(
+            title="Popular free run",
+            host=self.host,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            visibility="public",
+            status="upcoming",
+            max_participants=self.CAPACITY,
+        )
+
+    def rsvp_going(self, user):
+        from django.db import OperationalError, connection
+
+        try:
+            # SQLite reports write contention as "database is locked" instead
+            # of waiting on a row lock; retry like a client would.
+            for _ in range(200):
+                try:
+                    return ScrimmageRSVP.objects.create(scrimmage=self.scrim, user=user, status="going").status
+                except OperationalError:
+                    time.sleep(0.01)
+            raise AssertionError("RSVP never acquired the database")
+        finally:
+            connection.close()
+
+    def test_capacity_invariant_under_concurrent_rsvps(self):
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=self.WORKERS) as pool:
+            granted = list(pool.map(self.rsvp_going, self.users))
+
+        self.assertEqual(granted.count("going"), self.CAPACITY)
+        self.assertEqual(granted.count("waitlisted"), self.REQUESTS - self.CAPACITY)
+
+        self.scrim.refresh_from_db()
+        rows = ScrimmageRSVP.objects.filter(scrimmage=self.scrim)
+        self.assertEqual(rows.filter(status="going").count(), self.CAPACITY)
+        self.assertEqual(self.scrim.going_count, self.CAPACITY)
+        self.assertEqual(self.scrim.waitlisted_count, self.REQUESTS - self.CAPACITY)
+        self.assertEqual(self.scrim.spots_left, 0)
+
+
+class WaitlistPromotionTests(APITestCase):
+    def setUp(self):
+        self.host = User.objects.create_user(email="wlhost@example.com", password="pass123")
+        self.scrim = Scrimmage.objects.create(
+            title="Waitlist run",
+            host=self.host,
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            visibility="public",
+            status="upcoming",
+            max_participants=2,
+        )
+
+    def join(self, n, status="going"):
+        rsvps = []
+        for i in range(n):
+            user = User.objects.create_user(email=f"wl{User.objects.count()}@example.com", password=None)
+            rsvps.append(ScrimmageRSVP.objects.create(scrimmage=self.scrim, user=user, status=status))
+        return rsvps
+
+    def test_cancel_promotes_oldest_waitlisted(self):
+        going = self.join(2)
+        waiting = self.join(2)
+        self.assertEqual([r.status for r in waiting], ["waitlisted", "waitlisted"])
+
+        going[0].status = "cancelled"
+        going[0].save(update_fields=["status"])
+
+        statuses = dict(ScrimmageRSVP.objects.filter(pk__in=[w.pk for w in waiting]).values_list("pk", "status"))
+        self.assertEqual(statuses, {waiting[0].pk: "going", waiting[1].pk: "waitlisted"})
+        self.scrim.refresh_from_db()
+        self.assertEqual((self.scrim.going_count, self.scrim.waitlisted_count), (2, 1))
+
+    @override_settings(NOTIFICATION_FANOUT_BACKGROUND=False)
+    def test_promoting_fifty_seats_is_set_based(self):
+        from notifications.models import Notification
+
+        from .outbox import drain_all
+        from .waitlist import promote_waitlisted
+
+        self.join(2)
+        waiting = self.join(60, status="waitlisted")
+        Scrimmage.objects.filter(pk=self.scrim.pk).update(max_participants=52)
+
+        with self.assertNumQueries(10):
+            promoted = promote_waitlisted(self.scrim.pk)
+
+        self.assertEqual([pk for pk, _ in promoted], [r.pk for r in waiting[:50]])
+        self.scrim.refresh_from_db()
+        self.assertEqual((self.scrim.going_count, self.scrim.waitlisted_count), (52, 10))
+        self.assertFalse(Notification.objects.filter(title="Promoted to Going").exists())
+        drain_all()
+        self.assertEqual(Notification.objects.filter(title="Promoted to Going").count(), 50)
+        self.assertEqual(promote_waitlisted(self.scrim.pk), [])
+
+    def test_raising_capacity_fills_from_waitlist(self):
+        self.join(2)
+        self.join(3, status="waitlisted")
+        self.scrim.max_participants = 4
+        self.scrim.save()
+        self.scrim.refresh_from_db()
+        self.assertEqual((self.scrim.going_count, self.scrim.waitlisted_count), (4, 1))
+
+
+class BulkCheckInTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(1)
+        self.scrim = Scrimmage.objects.get()
+        ScrimmageRSVP.objects.filter(scrimmage=self.scrim, user=self.others[0]).update(status="going")
+        Scrimmage.objects.filter(pk=self.scrim.pk).update(going_count=2, interested_count=2)
+        self.client.force_authenticate(user=self.host)
+        self.url = reverse("scrimmage-bulk-check-in", args=[self.scrim.id])
+
+    def test_mixed_ids_and_tokens_with_outcomes(self):
+        from .checkin import make_check_in_token
+
+        stranger = User.objects.create_user(email="stranger@example.com", password="pass123")
+        payload = {
+            "user_ids": [self.viewer.id, self.others[1].id, stranger.id],
+            "tokens": [make_check_in_token(self.scrim.id, self.others[0].id), "forged"],
+        }
+        with self.assertNumQueries(7):
+            res = self.client.post(self.url, payload, format="json")
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [row["outcome"] for row in res.data["results"]],
+            ["checked_in", "not_eligible", "not_rsvpd", "checked_in", "invalid_token"],
+        )
+        self.scrim.refresh_from_db()
+        self.assertEqual((self.scrim.going_count, self.scrim.checked_in_count), (0, 2))
+
+    def test_replay_is_idempotent(self):
+        payload = {"user_ids": [self.viewer.id, self.others[0].id]}
+        self.client.post(self.url, payload, format="json")
+        res = self.client.post(self.url, payload, format="json")
+        self.assertEqual(res.data["summary"], {"already_checked_in": 2})
+        self.scrim.refresh_from_db()
+        self.assertEqual(self.scrim.checked_in_count, 2)
+
+    def test_token_for_other_scrimmage_is_rejected(self):
+        from .checkin import make_check_in_token
+
+        res = self.client.post(self.url, {"tokens": [make_check_in_token(self.scrim.id + 1, self.viewer.id)]}, format="json")
+        self.assertEqual(res.data["summary"], {"invalid_token": 1})
+
+    def test_only_host_may_check_in(self):
+        self.client.force_authenticate(user=self.viewer)
+        res = self.client.post(self.url, {"user_ids": [self.viewer.id]}, format="json")
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+        token = self.client.get(reverse("scrimmage-check-in-token", args=[self.scrim.id])).data["token"]
+        self.client.force_authenticate(user=self.host)
+        res = self.client.post(self.url, {"tokens": [token]}, format="json")
+        self.assertEqual(res.data["summary"], {"checked_in": 1})
+
+
+class RatingAggregateTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(1)
+        self.scrim = Scrimmage.objects.get()
+
+    def feedback(self, user, rating):
+        self.client.force_authenticate(user=user)
+        url = reverse("scrimmage-feedback", args=[self.scrim.id])
+        return self.client.post(url, {"rating": rating, "feedback": "gg"})
+
+    def aggregates(self):
+        self.scrim.refresh_from_db()
+        return self.scrim.rating_sum, self.scrim.rating_count, round(self.scrim.rating_avg, 4)
+
+    def test_new_changed_and_removed_ratings(self):
+        self.feedback(self.viewer, 5)
+        self.feedback(self.others[0], 2)
+        self.assertEqual(self.aggregates(), (7, 2, 3.5))
+
+        self.feedback(self.others[0], 4)
+        self.assertEqual(self.aggregates(), (9, 2, 4.5))
+
+        ScrimmageRSVP.objects.get(scrimmage=self.scrim, user=self.viewer).delete()
+        self.assertEqual(self.aggregates(), (4, 1, 4.0))
+
+        rsvp = ScrimmageRSVP.objects.get(scrimmage=self.scrim, user=self.others[0])
+        rsvp.rating = None
+        rsvp.save()
+        self.assertEqual(self.aggregates(), (0, 0, 0.0))
+
+    def test_feedback_does_not_read_other_ratings(self):
+        for other in self.others:
+            self.feedback(other, 3)
+        self.client.force_authenticate(user=self.viewer)
+        url = reverse("scrimmage-feedback", args=[self.scrim.id])
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(url, {"rating": 4, "feedback": "ok"})
+        self.assertFalse(
+            [q for q in ctx.captured_queries if "rating" in q["sql"] and q["sql"].startswith("SELECT") and "IS NOT NULL" in q["sql"]]
+        )
+        self.assertEqual(self.aggregates(), (13, 4, 3.25))
+
+    def test_verifier_fixes_drift(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        self.feedback(self.viewer, 4)
+        Scrimmage.objects.filter(pk=self.scrim.pk).update(rating_sum=99, rating_count=7, rating_avg=1.0)
+        out = StringIO()
+        call_command("verify_rating_aggregates", stdout=out)
+        self.assertIn("fixed drift on 1", out.getvalue())
+        self.assertEqual(self.aggregates(), (4, 1, 4.0))
+
+
+class RecurrenceEngineTests(APITestCase):
+    def setUp(self):
+        from .models import RecurrenceRule
+
+        self.RecurrenceRule = RecurrenceRule
+        self.host = User.objects.create_user(email="series@example.com", password="pass123")
+        self.template = Scrimmage.objects.create(
+            title="Weekly league night",
+            host=self.host,
+            address="1 Gym Rd",
+            latitude=40.0,
+            longitude=-75.0,
+            start_datetime=timezone.now() + timedelta(hours=2),
+            end_datetime=timezone.now() + timedelta(hours=4),
+            visibility="public",
+            status="upcoming",
+            entry_fee=5,
+        )
+
+    def rule(self, **kwargs):
+        from datetime import date
+
+        # Build unsaved: the post_save handler would generate immediately
+        return self.RecurrenceRule(scrimmage=self.template, start_date=kwargs.pop("start_date", date(2026, 1, 5)), **kwargs)
+
+    def test_weekly_days_interval_and_end_date(self):
+        from datetime import date
+
+        from .recurrence import occurrence_dates
+
+        rule = self.rule(frequency="weekly", interval=2, day_of_week="mon,thu", end_date=date(2026, 2, 5))
+        self.assertEqual(
+            list(occurrence_dates(rule, date(2026, 1, 1), date(2026, 3, 1))),
+            [date(2026, 1, 5), date(2026, 1, 8), date(2026, 1, 19), date(2026, 1, 22), date(2026, 2, 2), date(2026, 2, 5)],
+        )
+        # Starting mid-series lands on the same cadence
+        self.assertEqual(
+            list(occurrence_dates(rule, date(2026, 1, 20), date(2026, 1, 31))),
+            [date(2026, 1, 22)],
+        )
+
+    def test_monthly_uses_calendar_months(self):
+        from datetime import date
+
+        from .recurrence import occurrence_dates
+
+        rule = self.rule(frequency="monthly", interval=1, start_date=date(2026, 1, 31))
+        self.assertEqual(
+            list(occurrence_dates(rule, date(2026, 3, 1), date(2026, 6, 1))),
+            [date(2026, 3, 31), date(2026, 4, 30), date(2026, 5, 31)],
+        )
+
+    def test_generation_is_bulk_and_idempotent(self):
+        from .recurrence import generate_occurrences
+
+        rule = self.rule(frequency="weekly", interval=1, start_date=timezone.localdate(), active=False)
+        rule.save()
+        rule.active = True
+
+        created = generate_occurrences([rule], until=timezone.localdate() + timedelta(days=29))
+        self.assertEqual(len(created), 4)
+        first = created[0]
+        self.assertEqual(first.address, "1 Gym Rd")
+        self.assertTrue(first.is_paid)
+        self.assertEqual(first.geohash, self.template.geohash)
+        self.assertEqual(
+            timezone.localtime(first.start_datetime).time(),
+            timezone.localtime(self.template.start_datetime).time(),
+        )
+        self.assertEqual(generate_occurrences([rule], until=timezone.localdate() + timedelta(days=29)), [])
+        self.assertEqual(Scrimmage.objects.filter(recurrence_series=rule).count(), 4)
+
+    def test_saving_rule_and_command_generate_occurrences(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        from .outbox import drain_all
+
+        rule = self.rule(frequency="weekly", interval=1, start_date=timezone.localdate())
+        rule.save()
+        self.assertFalse(Scrimmage.objects.filter(recurrence_series=rule).exists())
+        drain_all()
+        generated = Scrimmage.objects.filter(recurrence_series=rule).count()
+        self.assertGreater(generated, 0)
+
+        out = StringIO()
+        call_command("generate_recurrences", "--chunk-size", "1", "--horizon-days", "70", stdout=out)
+        self.assertIn("Created 2 occurrences for 1 rules", out.getvalue())
+        self.assertEqual(Scrimmage.objects.filter(recurrence_series=rule).count(), generated + 2)
+
+    def test_calendar_expands_virtual_occurrences_without_rows(self):
+        rule = self.rule(frequency="weekly", interval=1, start_date=timezone.localdate(), active=False)
+        rule.save()
+        rule.active = True
+        rule.save(update_fields=["active"])
+        start = timezone.localdate()
+        end = start + timedelta(days=364)
+        before = Scrimmage.objects.count()
+
+        res = self.client.get(
+            reverse("scrimmage-calendar"), {"start": start.isoformat(), "end": end.isoformat(), "limit": 1000}
+        )
+        self.assertEqual(res.status_code, 200)
+        virtual = [row for row in res.data if row["virtual"]]
+        concrete = [row for row in res.data if not row["virtual"]]
+        # Saving the rule materialized the horizon; the rest of the year is virtual
+        materialized = Scrimmage.objects.filter(recurrence_series=rule).count()
+        self.assertEqual(len(virtual) + materialized, 51)
+        self.assertEqual(len(concrete), materialized + 1)
+        self.assertEqual(concrete[0]["id"], self.template.id)
+        self.assertEqual(len({row["occurrence"] for row in res.data if row["occurrence"]}), 51)
+        self.assertTrue(all(row["id"] is None and row["occurrence"] for row in virtual))
+        starts = [row["start_datetime"] for row in res.data]
+        self.assertEqual(starts, sorted(starts))
+        self.assertEqual(Scrimmage.objects.count(), before)
+
+        bad = self.client.get(reverse("scrimmage-calendar"), {"start": start.isoformat(), "end": start.isoformat()})
+        self.assertEqual(bad.status_code, 400)
+
+    def test_occurrence_rsvp_materializes_once(self):
+        from .recurrence import occurrence_key
+
+        rule = self.rule(frequency="weekly", interval=1, start_date=timezone.localdate(), active=False)
+        rule.save()
+        rule.active = True
+        rule.save(update_fields=["active"])
+        day = timezone.localdate() + timedelta(weeks=20)
+        key = occurrence_key(rule.pk, day)
+
+        for email in ("occ1@example.com", "occ2@example.com"):
+            self.client.force_authenticate(User.objects.create_user(email=email, password="pass123"))
+            res = self.client.post(reverse("scrimmage-occurrence-rsvp"), {"occurrence": key, "payment_method": "cash"})
+            self.assertIn(res.status_code, (200, 201), res.data)
+
+        occurrence = Scrimmage.objects.get(recurrence_series=rule, occurrence_date=day)
+        self.assertEqual(occurrence.rsvps.count(), 2)
+        self.assertEqual(occurrence.title, self.template.title)
+
+        # Materialized dates are no longer virtual
+        res = self.client.get(
+            reverse("scrimmage-calendar"), {"start": day.isoformat(), "end": (day + timedelta(days=1)).isoformat()}
+        )
+        self.assertEqual([(row["id"], row["virtual"]) for row in res.data], [(occurrence.id, False)])
+
+        off_day = self.client.post(
+            reverse("scrimmage-occurrence-rsvp"), {"occurrence": occurrence_key(rule.pk, day + timedelta(days=1))}
+        )
+        self.assertEqual(off_day.status_code, 404)
+        malformed = self.client.post(reverse("scrimmage-occurrence-rsvp"), {"occurrence": "nope"})
+        self.assertEqual(malformed.status_code, 400)
+
+    def test_occurrences_of_hidden_series_cannot_be_booked(self):
+        from .recurrence import materialize_occurrence, occurrence_key
+
+        rule = self.rule(frequency="weekly", interval=1, start_date=timezone.localdate(), active=False)
+        rule.save()
+        rule.active = True
+        rule.save(update_fields=["active"])
+        day = timezone.localdate() + timedelta(weeks=3)
+        self.client.force_authenticate(User.objects.create_user(email="hidden@example.com", password="pass123"))
+
+        for status_value in ("cancelled", "draft"):
+            Scrimmage.objects.filter(pk=self.template.pk).update(status=status_value)
+            rule.scrimmage.refresh_from_db()
+            with self.assertRaises(ValueError):
+                materialize_occurrence(rule, day)
+            res = self.client.post(
+                reverse("scrimmage-occurrence-rsvp"),
+                {"occurrence": occurrence_key(rule.pk, day), "payment_method": "cash"},
+            )
+            self.assertEqual(res.status_code, 404)
+        self.assertFalse(Scrimmage.objects.filter(recurrence_series=rule).exists())
+
+    def test_past_occurrences_cannot_be_booked(self):
+        from .recurrence import materialize_occurrence, occurrence_key
+
+        past = timezone.now() - timedelta(weeks=4)
+        Scrimmage.objects.filter(pk=self.template.pk).update(
+            start_datetime=past, end_datetime=past + timedelta(hours=2)
+        )
+        self.template.refresh_from_db()
+        rule = self.rule(frequency="weekly", interval=1, start_date=timezone.localdate(past), active=False)
+        rule.save()
+        rule.active = True
+        rule.save(update_fields=["active"])
+        day = timezone.localdate(past) + timedelta(weeks=2)
+
+        with self.assertRaises(ValueError):
+            materialize_occurrence(rule, day)
+        self.client.force_authenticate(User.objects.create_user(email="late@example.com", password="pass123"))
+        res = self.client.post(
+            reverse("scrimmage-occurrence-rsvp"), {"occurrence": occurrence_key(rule.pk, day), "payment_method": "cash"}
+        )
+        self.assertEqual(res.status_code, 404)
+        self.assertFalse(Scrimmage.objects.filter(recurrence_series=rule, occurrence_date=day).exists())
+
+
+class MediaQuotaLedgerTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(2)
+        self.scrim, self.other_scrim = Scrimmage.objects.order_by("start_datetime")
+
+    def upload(self, scrim, size):
+        from media.models import Media
+
+        from .models import ScrimmageMedia
+
+        return ScrimmageMedia.objects.create(
+            scrimmage=scrim, uploader=self.viewer, media=Media.objects.create(), file_size=size
+        )
+
+    def ledger(self):
+        from .media_quota import usage
+
+        return usage(self.viewer.pk, self.scrim.pk)
+
+    def test_uploads_and_deletes_move_the_ledger(self):
+        first = self.upload(self.scrim, 1000)
+        self.upload(self.scrim, 500)
+        self.upload(self.other_scrim, 250)
+        self.assertEqual(self.ledger(), (2, 1750))
+
+        first.delete()
+        self.assertEqual(self.ledger(), (1, 750))
+
+    @override_settings(SCRIMMAGE_MEDIA_MAX_FILES_PER_SCRIMMAGE=2, SCRIMMAGE_MEDIA_MAX_TOTAL_BYTES=2000)
+    def test_over_quota_upload_is_rejected_atomically(self):
+        from .media_quota import MediaQuotaExceeded
+        from .models import ScrimmageMedia
+
+        self.upload(self.scrim, 900)
+        self.upload(self.scrim, 900)
+        with self.assertRaises(MediaQuotaExceeded):
+            self.upload(self.scrim, 1)
+        with self.assertRaises(MediaQuotaExceeded):
+            self.upload(self.other_scrim, 201)
+        self.upload(self.other_scrim, 200)
+        self.assertEqual(ScrimmageMedia.objects.count(), 3)
+        self.assertEqual(self.ledger(), (2, 2000))
+
+    def test_quota_check_is_a_ledger_read(self):
+        from .validators import validate_media_upload
+
+        for size in (10, 20, 30):
+            self.upload(self.scrim, size)
+        # Plan lookup + one ledger row read, however many uploads exist
+        with self.assertNumQueries(2):
+            validate_media_upload(self.viewer, self.scrim, 1024)
+
+    def test_membership_plan_raises_quota(self):
+        from membership.models import Membership, MembershipPlan
+
+        from .media_quota import quota_for
+
+        plan = MembershipPlan.objects.create(name="Pro", price=10, media_max_files_per_scrimmage=50)
+        Membership.objects.create(user=self.viewer, plan=plan, status="active")
+        self.assertEqual(quota_for(self.viewer.pk), (50, 50 * 1024 * 1024))
+        self.assertEqual(quota_for(self.host.pk), (5, 50 * 1024 * 1024))
+
+    def test_verifier_fixes_drift(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        from .models import MediaUsage
+
+        self.upload(self.scrim, 100)
+        MediaUsage.objects.filter(user=self.viewer).update(file_count=9, total_bytes=1)
+        out = StringIO()
+        call_command("verify_media_usage", "--user", str(self.viewer.pk), stdout=out)
+        self.assertIn("fixed drift on 1 ledger rows", out.getvalue())
+        self.assertEqual(MediaUsage.objects.values_list("file_count", "total_bytes").get(user=self.viewer), (1, 100))
+
+
+@override_settings(SCRIMMAGE_UPLOAD_MAX_CHUNK_SIZE=1024)
+class ChunkedUploadTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(1)
+        self.scrim = Scrimmage.objects.get()
+        self.payload = bytes(range(256)) * 10  # 2560 bytes → 3 chunks
+
+    def start(self, size=None):
+        url = reverse("scrimmage-uploads", args=[self.scrim.id])
+        res = self.client.post(url, {"filename": "clip.mp4", "total_size": size or len(self.payload)})
+        self.assertEqual(res.status_code, 201, res.data)
+        return res.data["upload_id"]
+
+    def put(self, upload_id, offset, chunk):
+        url = reverse("scrimmage-upload-chunk", args=[self.scrim.id, upload_id])
+        return self.client.put(
+            f"{url}?offset={offset}", data=chunk, content_type="application/octet-stream"
+        )
+
+    def upload_all(self, caption=""):
+        upload_id = self.start()
+        for offset in range(0, len(self.payload), 1024):
+            res = self.put(upload_id, offset, self.payload[offset:offset + 1024])
+            self.assertEqual(res.status_code, 200, res.data)
+        url = reverse("scrimmage-complete-upload", args=[self.scrim.id, upload_id])
+        return self.client.post(url, {"caption": caption})
+
+    def test_chunks_resume_and_finalize_into_media(self):
+        import hashlib
+
+        from .models import MediaBlob, MediaUploadSession, ScrimmageMedia
+
+        upload_id = self.start()
+        self.assertEqual(self.put(upload_id, 0, self.payload[:1024]).data["received_bytes"], 1024)
+
+        # A retried or skipped chunk is refused with the offset to resume from
+        res = self.put(upload_id, 2048, self.payload[2048:])
+        self.assertEqual(res.status_code, 409)
+        self.assertEqual(res.data["received_bytes"], 1024)
+        status_url = reverse("scrimmage-upload-chunk", args=[self.scrim.id, upload_id])
+        self.assertEqual(self.client.get(status_url).data["received_bytes"], 1024)
+
+        self.put(upload_id, 1024, self.payload[1024:2048])
+        complete = reverse("scrimmage-complete-upload", args=[self.scrim.id, upload_id])
+        self.assertEqual(self.client.post(complete).status_code, 400)  # not all bytes yet
+        self.put(upload_id, 2048, self.payload[2048:])
+        res = self.client.post(complete, {"caption": "dunk"})
+        self.assertEqual(res.status_code, 201, res.data)
+        self.assertFalse(res.data["deduplicated"])
+
+        blob = MediaBlob.objects.get()
+        self.assertEqual(blob.sha256, hashlib.sha256(self.payload).hexdigest())
+        with blob.media.file.open("rb") as fh:
+            self.assertEqual(fh.read(), self.payload)
+        self.assertEqual(ScrimmageMedia.objects.get().file_size, len(self.payload))
+        self.assertEqual(MediaUploadSession.objects.get().status, "complete")
+
+    def test_identical_uploads_share_one_blob(self):
+        from .models import MediaBlob, ScrimmageMedia
+
+        self.assertFalse(self.upload_all().data["deduplicated"])
+        self.client.force_authenticate(user=self.others[0])
+        ScrimmageRSVP.objects.filter(scrimmage=self.scrim, user=self.others[0]).update(status="going")
+        res = self.upload_all()
+        self.assertEqual(res.status_code, 201, res.data)
+        self.assertTrue(res.data["deduplicated"])
+        self.assertEqual(MediaBlob.objects.count(), 1)
+        self.assertEqual(ScrimmageMedia.objects.values("media").distinct().count(), 1)
+        self.assertEqual(ScrimmageMedia.objects.count(), 2)
+
+    def test_declared_size_is_checked_against_quota_and_chunks(self):
+        url = reverse("scrimmage-uploads", args=[self.scrim.id])
+        res = self.client.post(url, {"filename": "huge.mp4", "total_size": 10 * 1024 ** 3})
+        self.assertEqual(res.status_code, 400)
+
+        upload_id = self.start(size=100)
+        self.assertEqual(self.put(upload_id, 0, b"x" * 101).status_code, 400)
+
+    def test_only_participants_can_upload(self):
+        self.client.force_authenticate(user=self.others[0])  # only "interested"
+        url = reverse("scrimmage-uploads", args=[self.scrim.id])
+        self.assertEqual(self.client.post(url, {"filename": "a.jpg", "total_size": 10}).status_code, 403)
+
+    def test_upload_permission_checks_the_scrimmage_in_the_url(self):
+        from rest_framework.request import Request
+        from rest_framework.test import APIRequestFactory
+
+        from .permissions import MediaUploadPermission
+        from .views import ScrimmageViewSet
+
+        def allowed(user, pk):
+            request = Request(APIRequestFactory().post("/"))
+            request.user = user
+            view = ScrimmageViewSet(kwargs={"pk": pk}, action="uploads")
+            return MediaUploadPermission().has_permission(request, view)
+
+        self.assertTrue(allowed(self.viewer, self.scrim.pk))
+        self.assertTrue(allowed(self.host, self.scrim.pk))
+        self.assertFalse(allowed(self.others[0], self.scrim.pk))  # only "interested"
+        self.assertFalse(allowed(self.viewer, 999999))
+        self.assertFalse(allowed(self.viewer, "nope"))
+
+    def test_chunk_body_is_read_outside_the_transaction(self):
+        import io
+
+        from django.db import connection
+
+        from .models import MediaUploadSession
+        from .uploads import append_chunk
+
+        upload_id = self.start()
+        session = MediaUploadSession.objects.get(pk=upload_id)
+        outer_blocks = len(connection.atomic_blocks)
+        depths = []
+
+        class Stream(io.BytesIO):
+            def read(self, size=-1):
+                depths.append(len(connection.atomic_blocks))
+                return super().read(size)
+
+        session = append_chunk(session, 0, Stream(self.payload[:1024]), 1024)
+        self.assertEqual(session.received_bytes, 1024)
+        self.assertEqual(set(depths), {outer_blocks})
+
+    def test_running_hashes_are_bounded_and_rebuilt_from_disk(self):
+        import hashlib
+
+        from .models import MediaBlob
+        from .uploads import _hashers
+
+        with override_settings(SCRIMMAGE_UPLOAD_MAX_HASHERS=1):
+            first = self.start()
+            self.put(first, 0, self.payload[:1024])
+            second = self.start()
+            self.put(second, 0, self.payload[:1024])
+            self.assertEqual(list(_hashers), [uuid.UUID(second)])
+
+            for offset in (1024, 2048):  # evicted: hashed from disk at finalize
+                res = self.put(first, offset, self.payload[offset:offset + 1024])
+                self.assertEqual(res.status_code, 200, res.data)
+            self.assertNotIn(uuid.UUID(first), _hashers)
+            res = self.client.post(reverse("scrimmage-complete-upload", args=[self.scrim.id, first]))
+        self.assertEqual(res.status_code, 201, res.data)
+        self.assertEqual(MediaBlob.objects.get().sha256, hashlib.sha256(self.payload).hexdigest())
+
+
+@skipUnless(Image, "Pillow is not installed")
+class MediaRenditionPipelineTests(ScrimmageListTestBase):
+    @classmethod
+    def setUpClass(cls):
+        from concurrent.futures import ProcessPoolExecutor
+        import multiprocessing
+
+        super().setUpClass()
+        cls.pool = ProcessPoolExecutor(max_workers=2, mp_context=multiprocessing.get_context("spawn"))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.pool.shutdown()
+        super().tearDownClass()
+
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(1)
+        self.scrim = Scrimmage.objects.get()
+
+    def attach(self, media=None, content=None, name="court.png"):
+        import io
+
+        from django.core.files.base import ContentFile
+        from media.models import Media, MediaRelation
+
+        if media is None:
+            if content is None:
+                out = io.BytesIO()
+                Image.new("RGB", (2000, 1000), "orange").save(out, "PNG")
+                content = out.getvalue()
+            media = Media()
+            media.file.save(name, ContentFile(content), save=True)
+        return MediaRelation.objects.create(media=media, content_object=self.scrim)
+
+    def test_upload_queues_and_worker_renders_every_size(self):
+        from .models import MediaRendition
+        from .renditions import process_pending_renditions
+
+        relation = self.attach()
+        self.assertEqual(
+            sorted(MediaRendition.objects.filter(status="pending").values_list("label", flat=True)),
+            ["medium", "small", "thumb"],
+        )
+        self.assertEqual(process_pending_renditions(pool=self.pool), {"ready": 3, "retry": 0, "failed": 0})
+        thumb = MediaRendition.objects.get(relation=relation, label="thumb")
+        self.assertEqual((thumb.width, thumb.height), (160, 80))
+        self.assertEqual(Image.open(thumb.file.path).size, (160, 80))
+
+        url = reverse("scrimmage-detail", args=[self.scrim.id])
+        gallery = self.client.get(url).data["media_relations"]
+        self.assertEqual(set(gallery[0]["renditions"]), {"thumb", "small", "medium"})
+        self.assertEqual(gallery[0]["renditions"]["medium"]["width"], 1280)
+
+    def test_shared_media_is_rendered_once(self):
+        from .models import MediaRendition
+        from .renditions import process_pending_renditions
+
+        first = self.attach()
+        process_pending_renditions(pool=self.pool)
+        second = self.attach(media=first.media)
+        self.assertEqual(process_pending_renditions(pool=self.pool)["ready"], 3)
+        self.assertEqual(
+            set(MediaRendition.objects.filter(relation=first).values_list("file", flat=True)),
+            set(MediaRendition.objects.filter(relation=second).values_list("file", flat=True)),
+        )
+
+    def test_broken_images_retry_then_fail(self):
+        from .models import MediaRendition
+        from .renditions import MAX_ATTEMPTS, process_pending_renditions
+
+        self.attach(content=b"not an image", name="broken.jpg")
+        for _ in range(MAX_ATTEMPTS - 1):
+            self.assertEqual(process_pending_renditions(pool=self.pool)["retry"], 3)
+        self.assertEqual(process_pending_renditions(pool=self.pool)["failed"], 3)
+        self.assertFalse(MediaRendition.objects.exclude(status="failed").exists())
+
+    def test_non_images_are_not_queued(self):
+        from .models import MediaRendition
+
+        self.attach(content=b"\x00" * 10, name="highlight.mp4")
+        self.assertFalse(MediaRendition.objects.exists())
+
+
+@override_settings(NOTIFICATION_FANOUT_BACKGROUND=False)
+class NotificationFanOutTests(ScrimmageListTestBase):
+    def test_group_scrimmage_notifies_members_in_bulk(self):
+        from groups.models import Group, GroupMember
+        from notifications.models import Notification
+
+        from .outbox import drain_all
+
+        group = Group.objects.create(owner=self.host, name="Tuesday Hoops")
+        members = [User.objects.create_user(email=f"member{i}@example.com", password="pass123") for i in range(40)]
+        GroupMember.objects.bulk_create(
+            [GroupMember(group=group, user=user) for user in [self.host, *members]]
+        )
+
+        Scrimmage.objects.create(
+            title="Group run",
+            host=self.host,
+            group=group,
+            address="1 Gym Rd",
+            start_datetime=timezone.now() + timedelta(days=1),
+            end_datetime=timezone.now() + timedelta(days=1, hours=2),
+            status="upcoming",
+        )
+        drain_all()
+        notified = Notification.objects.filter(title="New Group Scrimmage")
+        self.assertEqual(set(notified.values_list("user_id", flat=True)), {m.pk for m in members})
+
+    def test_media_upload_notifies_participants_except_uploader(self):
+        from media.models import Media
+        from notifications.models import Notification
+
+        from .models import ScrimmageMedia
+        from .outbox import drain_all
+
+        self.make_scrimmages(1)
+        scrim = Scrimmage.objects.get()
+        ScrimmageRSVP.objects.filter(scrimmage=scrim, user__in=self.others[:2]).update(status="going")
+        ScrimmageMedia.objects.create(scrimmage=scrim, uploader=self.viewer, media=Media.objects.create())
+        drain_all()
+        notified = Notification.objects.filter(title="New Scrimmage Media").values_list("user_id", flat=True)
+        self.assertEqual(sorted(notified), sorted(u.pk for u in self.others[:2]))
+
+
+class OutboxTests(ScrimmageListTestBase):
+    def setUp(self):
+        super().setUp()
+        self.make_scrimmages(2)
+        self.first, self.second = Scrimmage.objects.order_by("pk")
+        from .models import OutboxEvent
+
+        OutboxEvent.objects.all().delete()
+        self.calls = []
+
+    def record(self, scrimmage_id, **payload):
+        self.calls.append(payload["n"])
+
+    def flaky(self, scrimmage_id, **payload):
+        self.calls.append(payload["n"])
+        raise RuntimeError("calendar service down")
+
+    def handlers(self):
+        from unittest import mock
+
+        from .outbox import HANDLERS
+
+        return mock.patch.dict(HANDLERS, {"ok": self.record, "flaky": self.flaky})
+
+    def test_rsvp_writes_one_event_and_effects_wait_for_the_worker(self):
+        from notifications.models import Notification
+
+        from .models import OutboxEvent
+        from .outbox import drain_all
+
+        user = self.others[0]
+        self.client.force_authenticate(user=user)
+        res = self.client.post(reverse("scrimmage-rsvp", args=[self.first.id]), {"payment_method": "cash"})
+        self.assertEqual(res.data["status"], "going")
+
+        event = OutboxEvent.objects.get()
+        self.assertEqual((event.kind, event.scrimmage_id, event.payload), ("rsvp_confirmed", self.first.id, {"user_id": user.pk}))
+        self.assertFalse(Notification.objects.filter(user=user, title="RSVP Confirmed").exists())
+
+        self.assertEqual(drain_all(), {"done": 1, "retry": 0, "failed": 0})
+        self.assertTrue(Notification.objects.filter(user=user, title="RSVP Confirmed").exists())
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("done", 1))
+
+    def test_event_for_a_deleted_user_is_done_not_retried(self):
+        from .models import OutboxEvent
+        from .outbox import drain_all, enqueue
+
+        gone = User.objects.create_user(email="gone@example.com", password="pass123")
+        event = enqueue("rsvp_cancelled", self.first.id, user_id=gone.pk)
+        gone.delete()
+
+        self.assertEqual(drain_all(), {"done": 1, "retry": 0, "failed": 0})
+        event.refresh_from_db()
+        self.assertEqual(event.status, "done")
+
+    def test_events_roll_back_with_the_write(self):
+        from django.db import transaction
+
+        from .models import OutboxEvent
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            ScrimmageRSVP.objects.filter(scrimmage=self.first, user=self.others[0]).get().delete()
+            Scrimmage.objects.filter(pk=self.second.pk).get().delete()
+            self.assertTrue(OutboxEvent.objects.filter(kind="scrimmage_deleted").exists())
+            raise RuntimeError
+        self.assertFalse(OutboxEvent.objects.exists())
+
+    def test_failed_event_blocks_later_events_of_its_scrimmage_only(self):
+        from .models import OutboxEvent
+        from .outbox import drain, enqueue
+
+        enqueue("flaky", self.first.id, n=1)
+        enqueue("ok", self.first.id, n=2)
+        enqueue("ok", self.second.id, n=3)
+
+        with self.handlers():
+            self.assertEqual(drain(), {"done": 1, "retry": 1, "failed": 0})
+            self.assertEqual(self.calls, [1, 3])
+            # Backing off: nothing of the first scrimmage is due yet
+            self.assertEqual(drain(), {"done": 0, "retry": 0, "failed": 0})
+
+            flaky = OutboxEvent.objects.get(kind="flaky")
+            self.assertEqual((flaky.status, flaky.attempts), ("pending", 1))
+            self.assertIn("calendar service down", flaky.last_error)
+            self.assertEqual(OutboxEvent.objects.get(payload__n=2).attempts, 0)
+
+            # Fixed and due again: the scrimmage's events run in order
+            OutboxEvent.objects.filter(pk=flaky.pk).update(kind="ok", available_at=timezone.now())
+            self.calls.clear()
+            self.assertEqual(drain(), {"done": 2, "retry": 0, "failed": 0})
+            self.assertEqual(self.calls, [1, 2])
+
+    @override_settings(SCRIMMAGE_OUTBOX_MAX_ATTEMPTS=2)
+    def test_event_fails_after_max_attempts(self):
+        from .models import OutboxEvent
+        from .outbox import drain, enqueue
+
+        event = enqueue("flaky", self.first.id, n=1)
+        with self.handlers():
+            self.assertEqual(drain()["retry"], 1)
+            OutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+            self.assertEqual(drain()["failed"], 1)
+        event.refresh_from_db()
+        self.assertEqual((event.status, event.attempts), ("failed", 2))
+
+    def test_drain_command(self):
+        from django.core.management import call_command
+        from io import StringIO
+
+        from .models import OutboxEvent
+        from .outbox import enqueue
+
+        enqueue("rsvp_confirmed", self.first.id, user_id=self.others[0].pk)
+        out = StringIO()
+        call_command("drain_scrimmage_outbox", "--once", "--purge-days", "0", stdout=out)
+        self.assertIn("Applied 1, retrying 0, failed 0", out.getvalue())
+        self.assertEqual(OutboxEvent.objects.get().status, "done")
@@ -0,0 +1,291 @@
+# scrimmages/uploads.py
+"""
+Resumable chunked media uploads.
+
+1. ``start_upload`` opens a MediaUploadSession for a declared size (the
+   quota is checked up front).
+2. ``append_chunk`` streams each chunk from the request to a ``.part``
+   file on disk at the session's current offset. Chunks must arrive in
+   order; a client that lost track asks for ``received_bytes`` and resumes
+   from there.
+3. ``finalize_upload`` hashes the file (SHA-256), stores it as a
+   ``media.Media`` unless a MediaBlob with the same hash exists, and
+   attaches it to the scrimmage.
+
+Each chunk is read from the client into its own temp file with no
+transaction open, so a slow client holds neither a connection's
+transaction nor the session row. Only then is the offset claimed with a
+conditional UPDATE and the chunk copied into place (local disk, at most
+one chunk) before that short transaction commits.
+
+The hash is updated as chunks are written. The running hash lives in the
+worker process (a bounded LRU, SCRIMMAGE_UPLOAD_MAX_HASHERS sessions), so
+when a chunk lands on another worker, after a restart or after eviction,
+the file is re-read from disk once at finalize instead.
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from media.models import Media, MediaRelation
+
+from .media_quota import MediaQuotaExceeded, check_quota
+from .models import MediaBlob, MediaUploadSession, ScrimmageMedia
+
+STREAM_BLOCK = 64 * 1024
+
+# session id → (running sha256, bytes hashed so far); per worker process,
+# least recently used first
+_hashers = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+class UploadError(ValidationError):
+    pass
+
+
+class UploadOffsetMismatch(UploadError):
+    def __init__(self, received_bytes):
+        super().__init__(f"Expected offset {received_bytes}.")
+        self.received_bytes = received_bytes
+
+
+def upload_dir():
+    path = getattr(settings, "SCRIMMAGE_UPLOAD_DIR", None) or os.path.join(
+        tempfile.gettempdir(), "scrimmage-uploads"
+    )
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def max_chunk_size():
+    return getattr(settings, "SCRIMMAGE_UPLOAD_MAX_CHUNK_SIZE", 8 * 1024 * 1024)
+
+
+def max_hashers():
+    return getattr(settings, "SCRIMMAGE_UPLOAD_MAX_HASHERS", 256)
+
+
+def part_path(session_id):
+    return os.path.join(upload_dir(), f"{session_id}.part")
+
+
+def _get_hasher(session_id):
+    with _hashers_lock:
+        return _hashers.get(session_id, (None, 0))
+
+
+def _remember_hasher(session_id, hasher, hashed):
+    with _hashers_lock:
+        _hashers[session_id] = (hasher, hashed)
+        _hashers.move_to_end(session_id)
+        while len(_hashers) > max_hashers():
+            _hashers.popitem(last=False)
+
+
+def _forget_hasher(session_id):
+    with _hashers_lock:
+        _hashers.pop(session_id, None)
+
+
+def _discard(session_id):
+    _forget_hasher(session_id)
+    try:
+        os.remove(part_path(session_id))
+    except FileNotFoundError:
+        pass
+
+
+# ============================================================
+# ✅ Protocol steps
+# ============================================================
+
+def start_upload(scrimmage, user, filename, total_size, content_type=""):
+    """Open an upload session; raises MediaQuotaExceeded if the file won't fit."""
+    if total_size <= 0:
+        raise UploadError("total_size must be positive.")
+    check_quota(user.pk, scrimmage.pk, total_size)
+    session = MediaUploadSession.objects.create(
+        scrimmage=scrimmage,
+        uploader=user,
+        filename=os.path.basename(filename)[:255] or "upload",
+        content_type=content_type[:100],
+        total_size=total_size,
+    )
+    open(part_path(session.pk), "wb").close()
+    return session
+
+
+def _check_chunk(session, offset, length):
+    if session.status != "open":
+        raise UploadError("Upload already completed.")
+    if offset != session.received_bytes:
+        raise UploadOffsetMismatch(session.received_bytes)
+    if offset + length > session.total_size:
+        raise UploadError("Chunk runs past the declared total_size.")
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Write ``length`` bytes read from ``stream`` at ``offset``.
+    Raises UploadOffsetMismatch unless ``offset`` is the session's
+    ``received_bytes``. Returns the updated session.
+    """
+    if length <= 0 or length > max_chunk_size():
+        raise UploadError(f"Chunks must be 1..{max_chunk_size()} bytes.")
+    session = MediaUploadSession.objects.get(pk=session.pk)
+    _check_chunk(session, offset, length)  # fail fast, before reading the body
+
+    # Hash a copy: the cached state only advances once the chunk is claimed
+    hasher, hashed = _get_hasher(session.pk)
+    if offset == 0:
+        hasher = hashlib.sha256()
+    elif hasher and hashed == offset:
+        hasher = hasher.copy()
+    else:
+        hasher = None
+
+    chunk_path = os.path.join(upload_dir(), f"{session.pk}.{uuid.uuid4().hex}.chunk")
+    try:
+        # 1. Receive the chunk (as slow as the client) outside any transaction
+        written = 0
+        with open(chunk_path, "wb") as fh:
+            while written < length:
+                block = stream.read(min(STREAM_BLOCK, length - written))
+                if not block:
+                    break
+                fh.write(block)
+                if hasher:
+                    hasher.update(block)
+                written += len(block)
+        if written != length:
+            raise UploadError(f"Received {written} of {length} bytes; resend the chunk.")
+
+        # 2. Claim the offset and copy the chunk into place
+        with transaction.atomic():
+            claimed = MediaUploadSession.objects.filter(
+                pk=session.pk, status="open", received_bytes=offset, total_size__gte=offset + length
+            ).update(received_bytes=F("received_bytes") + length, updated_at=timezone.now())
+            if not claimed:
+                _check_chunk(MediaUploadSession.objects.get(pk=session.pk), offset, length)
+                raise UploadOffsetMismatch(offset)
+            with open(chunk_path, "rb") as src, open(part_path(session.pk), "r+b") as dst:
+                dst.seek(offset)
+                dst.truncate()  # drop bytes of an earlier copy that never committed
+                shutil.copyfileobj(src, dst, STREAM_BLOCK)
+    finally:
+        try:
+            os.remove(chunk_path)
+        except FileNotFoundError:
+            pass
+
+    if hasher:
+        _remember_hasher(session.pk, hasher, offset + length)
+    else:
+        _forget_hasher(session.pk)
+    session.refresh_from_db()
+    return session
+
+
+def file_sha256(path):
+    hasher = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(STREAM_BLOCK), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def finalize_upload(session, caption=""):
+    """
+    Store the completed upload and attach it to the scrimmage.
+    Returns (MediaRelation, ScrimmageMedia, deduplicated).
+    """
+    with transaction.atomic():
+        session = (
+            MediaUploadSession.objects.select_for_update()
+            .select_related("scrimmage")
+            .get(pk=session.pk)
+        )
+        if session.status != "open":
+            raise UploadError("Upload already completed.")
+        if session.received_bytes != session.total_size:
+            raise UploadError(f"Received {session.received_bytes} of {session.total_size} bytes.")
+        check_quota(session.uploader_id, session.scrimmage_id, session.total_size)
+
+        path = part_path(session.pk)
+        hasher, hashed = _get_hasher(session.pk)
+        digest = hasher.hexdigest() if hasher and hashed == session.total_size else file_sha256(path)
+
+        blob = MediaBlob.objects.select_related("media").filter(sha256=digest).first()
+        stored = None
+        if blob is None:
+            stored = Media()
+            with open(path, "rb") as fh:
+                stored.file.save(session.filename, File(fh), save=False)
+            stored.save()
+            try:
+                with transaction.atomic():
+                    blob = MediaBlob.objects.create(sha256=digest, media=stored, size=session.total_size)
+            except IntegrityError:
+                # Same content finalized concurrently: keep theirs
+                stored.file.delete(save=False)
+                stored.delete()
+                stored = None
+                blob = MediaBlob.objects.select_related("media").get(sha256=digest)
+
+        try:
+            relation = MediaRelation.objects.create(
+                media=blob.media,
+                content_object=session.scrimmage,
+                caption=caption,
+                file_size=session.total_size,
+            )
+            scrimmage_media = ScrimmageMedia.objects.create(
+                scrimmage=session.scrimmage,
+                uploader_id=session.uploader_id,
+                media=blob.media,
+                caption=caption,
+                file_size=session.total_size,
+            )
+        except MediaQuotaExceeded:
+            if stored is not None:
+                stored.file.delete(save=False)
+            raise
+
+        session.status = "complete"
+        session.sha256 = digest
+        session.save(update_fields=["status", "sha256", "updated_at"])
+        transaction.on_commit(lambda: _discard(session.pk))
+    return relation, scrimmage_media, stored is None
+
+
+# ============================================================
+# ✅ Cleanup
+# ============================================================
+
+def purge_stale_uploads(older_than=timedelta(hours=24)):
+    """
+    Delete sessions idle for longer than ``older_than`` (abandoned ones with
+    their chunks on disk). Returns the number of sessions deleted.
+    """
+    stale = list(
+        MediaUploadSession.objects.filter(updated_at__lt=timezone.now() - older_than).values_list(
+            "pk", flat=True
+        )
+    )
+    for session_id in stale:
+        _discard(session_id)
+    MediaUploadSession.objects.filter(pk__in=stale).delete()
+    return len(stale)
@@ -108,27 +108,21 @@ def validate_scrimmage_dates(start_datetime, end_datetime):
 # ✅ Media Upload Validation
 # ============================================================
 
-def validate_media_upload(user, scrimmage, file_size_bytes: int, max_files_per_user=5, max_total_bytes=50 * 1024 * 1024):
+def validate_media_upload(user, scrimmage, file_size_bytes: int, max_files_per_user=None, max_total_bytes=None):
     """
-    Enforce media upload limits:
+    Enforce media upload limits from the quota ledger (see media_quota):
     - max_files_per_user per scrimmage
     - max_total_bytes total per user
+    Limits default to the user's membership plan, then site settings.
     """
-    from .models import ScrimmageMedia
+    from .media_quota import check_quota, quota_for
 
-    user_uploads = ScrimmageMedia.objects.filter(scrimmage=scrimmage, uploader=user)
-    total_files = user_uploads.count()
-    total_bytes = sum(u.file_size for u in user_uploads)
-
-    if total_files >= max_files_per_user:
-        raise ValidationError(
-            f"You've reached the upload limit ({max_files_per_user} files per scrimmage)."
-        )
-
-    if total_bytes + file_size_bytes > max_total_bytes:
-        raise ValidationError(
-            f"Total upload size exceeds {max_total_bytes / (1024 * 1024):.1f} MB limit."
-        )
+    max_files, max_bytes = quota_for(user.pk)
+    quota = (
+        max_files if max_files_per_user is None else max_files_per_user,
+        max_bytes if max_total_bytes is None else max_total_bytes,
+    )
+    check_quota(user.pk, scrimmage.pk, file_size_bytes, quota)
 
 
 # ============================================================
@@ -166,19 +160,9 @@ def validate_rsvp_data(data):
 
 def promote_next_waitlisted(scrimmage):
     """
-    Promote the earliest waitlisted RSVP if a slot opens.
-    To be called in signals or post-delete hooks.
+    Promote the earliest waitlisted RSVPs into any open slots.
+    To be called in signals or post-delete hooks; see waitlist.promote_waitlisted.
     """
-    from .models import ScrimmageRSVP
+    from .waitlist import promote_waitlisted
 
-    available_slots = scrimmage.spots_left
-    if available_slots <= 0:
-        return
-
-    waitlisted = (
-        ScrimmageRSVP.objects.filter(scrimmage=scrimmage, status="waitlisted")
-        .order_by("created_at")[:available_slots]
-    )
-    for rsvp in waitlisted:
-        rsvp.status = "going"
-        rsvp.save(update_fields=["status"])
+    return promote_waitlisted(scrimmage.pk)
@@ -1,11 +1,20 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAuthenticated, IsAdminUser, AllowAny, SAFE_METHODS
+from rest_framework.exceptions import NotFound, ValidationError
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils import timezone
-from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.http import parse_etags
+from django.db import transaction
+from django.db.models import Q, OuterRef, Subquery, Prefetch
+from datetime import date, datetime, time, timedelta
 from decimal import Decimal
+import hashlib
+from functools import partial
+
+from media.models import MediaRelation
 
 from .models import (
     Scrimmage,
@@ -13,12 +22,14 @@ from .models import (
     ScrimmageType,
     ScrimmageRSVP,
     ScrimmageMedia,
+    MediaUploadSession,
     RecurrenceRule,
     ScrimmageTemplate,
     PerformanceStat,
 )
 from .serializers import (
     ScrimmageSerializer,
+    ScrimmageListSerializer,
     ScrimmageCategorySerializer,
     ScrimmageTypeSerializer,
     ScrimmageRSVPSerializer,
@@ -27,6 +38,28 @@ from .serializers import (
     ScrimmageTemplateSerializer,
     PerformanceStatSerializer,
 )
+from . import cache as response_cache
+from .access import visible_scrimmages
+from .checkin import INVALID_TOKEN, bulk_check_in, make_check_in_token, read_check_in_token
+from .counters import ScrimmageFull
+from .media_quota import MediaQuotaExceeded
+from .geo import haversine_expression, proximity_prefilter
+from .pagination import ScrimmageCursorPagination
+from .recurrence import (
+    HIDDEN_TEMPLATE_STATUSES,
+    materialize_occurrence,
+    occurrence_key,
+    parse_occurrence_key,
+    virtual_occurrences,
+)
+from .search import search_scrimmages
+from .uploads import (
+    UploadOffsetMismatch,
+    append_chunk,
+    finalize_upload,
+    max_chunk_size,
+    start_upload,
+)
 from .permissions import (
     ScrimmagePermission,
     RSVPWritePermission,
@@ -42,6 +75,13 @@ from .validators import (
     promote_next_waitlisted,
 )
 
+# Optional: Idempotency-Key replay for RSVPs that may charge (payments app)
+try:
+    from payments.idempotency import idempotent
+except ImportError:
+    def idempotent(view):
+        return view
+
 
 # ============================================================
 # ✅ Category & Type ViewSets
@@ -79,24 +119,189 @@ class ScrimmageViewSet(viewsets.ModelViewSet):
     queryset = Scrimmage.objects.select_related("category", "scrimmage_type", "host")
     serializer_class = ScrimmageSerializer
     permission_classes = [ScrimmagePermission]
+    pagination_class = ScrimmageCursorPagination
+
+    # Nested collections and how to load each with a single query
+    NESTED_LOADERS = {
+        "rsvps": lambda qs: qs.prefetch_related(
+            Prefetch("rsvps", queryset=ScrimmageRSVP.objects.select_related("user"))
+        ),
+        "media_relations": lambda qs: qs.prefetch_related(
+            Prefetch(
+                "media_relations",
+                queryset=MediaRelation.objects.select_related("media").prefetch_related("scrimmage_renditions"),
+            )
+        ),
+        "media_files": lambda qs: qs.prefetch_related("media_files"),
+        "recurrence_rule": lambda qs: qs.select_related("recurrence_rule"),
+    }
+
+    # Collection actions rendered with the compact list serializer
+    LIST_ACTIONS = ("list", "nearby", "search", "calendar")
+
+    def get_serializer_class(self):
+        if self.action in self.LIST_ACTIONS:
+            return ScrimmageListSerializer
+        return super().get_serializer_class()
+
+    def filter_queryset(self, queryset):
+        """
+        Browse filters for collection endpoints:
+        ?status=upcoming,ongoing ?visibility=public ?category=<id>
+        ?scrimmage_type=<id> ?group=<id> ?starts_after=<iso> ?starts_before=<iso>
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.detail:
+            return queryset
+
+        params = self.request.query_params
+        for name in ("status", "visibility"):
+            values = self._query_list(name)
+            if values:
+                queryset = queryset.filter(**{f"{name}__in": values})
+        for name in ("category", "scrimmage_type", "group"):
+            value = params.get(name)
+            if value:
+                if not value.isdigit():
+                    raise ValidationError({name: "Must be an id."})
+                queryset = queryset.filter(**{f"{name}_id": int(value)})
+        for name, lookup in (("starts_after", "gte"), ("starts_before", "lt")):
+            value = params.get(name)
+            if value:
+                moment = parse_datetime(value)
+                if moment is None:
+                    raise ValidationError({name: "Must be an ISO 8601 datetime."})
+                queryset = queryset.filter(**{f"start_datetime__{lookup}": moment})
+        return queryset
+
+    def _query_list(self, name):
+        """Parse a comma-separated query param (?fields=a,b or ?fields=a&fields=b)."""
+        values = []
+        for raw in self.request.query_params.getlist(name):
+            values.extend(v.strip() for v in raw.split(",") if v.strip())
+        return values
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in SAFE_METHODS:
+            context["fields"] = self._query_list("fields")
+            context["expand"] = self._query_list("expand")
+        return context
+
+    def nested_to_render(self):
+        """Nested collections the serializer will actually render for this request."""
+        fields = set(self._query_list("fields"))
+        expand = set(self._query_list("expand"))
+        nested = expand if self.action in self.LIST_ACTIONS else set(self.NESTED_LOADERS)
+        if fields:
+            nested = nested & (fields | expand)
+        return nested & set(self.NESTED_LOADERS)
 
     def get_queryset(self):
         user = self.request.user
         now = timezone.now()
         qs = self.queryset
 
+        # Read actions: load only the nested collections being rendered
+        if self.action in (*self.LIST_ACTIONS, "retrieve"):
+            qs = qs.select_related(
+                "category__created_by",
+                "scrimmage_type__category__created_by",
+                "scrimmage_type__created_by",
+            )
+            for name in self.nested_to_render():
+                qs = self.NESTED_LOADERS[name](qs)
+
         # Public for everyone
         if not user.is_authenticated:
-            return qs.filter(visibility="public", status__in=["upcoming", "ongoing"])
+            return visible_scrimmages(user, qs)
+
+        # Viewer's own RSVP status (drives location masking in the serializer)
+        qs = qs.annotate(
+            viewer_rsvp_status=Subquery(
+                ScrimmageRSVP.objects.filter(scrimmage=OuterRef("pk"), user=user).values("status")[:1]
+            )
+        )
 
         # Authenticated users: show public + their group/league/private
-        return qs.filter(
-            Q(visibility="public")
-            | Q(host=user)
-            | Q(rsvps__user=user)
-            | Q(group__members__user=user)
-            #| Q(league__members__user=user)
-        ).distinct()
+        return visible_scrimmages(user, qs)
+
+    # ----------------------------
+    # Anonymous response cache (see cache.py)
+    # ----------------------------
+
+    def _cached_response(self, request, scope, render, scrimmage_id=None):
+        """Serve anonymous reads from the shared cache; everyone else renders."""
+        if request.user.is_authenticated or not response_cache.is_enabled():
+            return render()
+
+        key = response_cache.response_key(request, scope, scrimmage_id)
+        data = response_cache.get_response_data(key)
+        if data is not None:
+            response = Response(data)
+            response["X-Cache"] = "HIT"
+            return response
+
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            response_cache.set_response_data(key, response.data)
+        response["X-Cache"] = "MISS"
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(request, "list", partial(super().list, request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        render = partial(super().retrieve, request, *args, **kwargs)
+        return self._conditional_response(
+            request,
+            "detail",
+            partial(self._cached_response, request, "detail", render, scrimmage_id=kwargs.get("pk")),
+        )
+
+    # ----------------------------
+    # Conditional GET (ETag / If-None-Match)
+    # ----------------------------
+
+    def _etag(self, scope):
+        """
+        Weak ETag for the scrimmage in the URL, from updated_at and the RSVP
+        change counter. One indexed lookup; None if the scrimmage is not visible.
+        The viewer and query string are folded in because both shape the payload.
+        """
+        row = (
+            self.get_queryset()
+            .prefetch_related(None)
+            .filter(pk=self.kwargs.get(self.lookup_field))
+            .values("pk", "updated_at", "rsvp_version")
+            .first()
+        )
+        if row is None:
+            return None
+        variant = hashlib.sha1(
+            repr((self.request.user.pk, sorted(self.request.query_params.lists()))).encode()
+        ).hexdigest()[:12]
+        stamp = int(row["updated_at"].timestamp() * 1_000_000)
+        return f'W/"{scope}-{row["pk"]}-{stamp}-{row["rsvp_version"]}-{variant}"'
+
+    def _conditional_response(self, request, scope, render):
+        """Answer If-None-Match with 304 without serializing; otherwise tag the response."""
+        etag = self._etag(scope)
+        if etag is None:
+            return render()
+        # Weak comparison (RFC 9110 §13.1.2): ignore W/ prefixes
+        wanted = {tag.removeprefix("W/") for tag in parse_etags(request.headers.get("If-None-Match", ""))}
+        if "*" in wanted or etag.removeprefix("W/") in wanted:
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        response = render()
+        if response.status_code == status.HTTP_200_OK:
+            response["ETag"] = etag
+        return response
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAdminUser])
+    def cache_stats(self, request):
+        """Hit/miss counters of the anonymous response cache."""
+        return Response(response_cache.stats())
 
     def perform_create(self, serializer):
         """Create scrimmage and enforce credit/payment rules."""
@@ -121,17 +326,188 @@ class ScrimmageViewSet(viewsets.ModelViewSet):
             except Exception:
                 credit_required = True
 
-        scrimmage = serializer.save(host=user, credit_required=credit_required)
+        # One commit: the scrimmage and its outbox events (calendar, notifications)
+        with transaction.atomic():
+            scrimmage = serializer.save(host=user, credit_required=credit_required)
         return scrimmage
 
+    # ----------------------------
+    # Near me (geohash prefilter + haversine)
+    # ----------------------------
+
+    @action(detail=False, methods=["get"])
+    def nearby(self, request):
+        """
+        Scrimmages within ?radius= km (default 10) of ?lat=&lng=, closest
+        first. Accepts the regular browse filters and ?limit= (max 200).
+        """
+        try:
+            lat = float(request.query_params["lat"])
+            lng = float(request.query_params["lng"])
+            radius = float(request.query_params.get("radius", 10))
+            limit = int(request.query_params.get("limit", 50))
+        except KeyError:
+            raise ValidationError("lat and lng are required.")
+        except ValueError:
+            raise ValidationError("lat, lng, radius and limit must be numbers.")
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise ValidationError("lat/lng out of range.")
+        if not 0 < radius <= 500:
+            raise ValidationError("radius must be between 0 and 500 km.")
+        limit = max(1, min(limit, 200))
+
+        qs = (
+            self.filter_queryset(self.get_queryset())
+            .filter(proximity_prefilter(lat, lng, radius))
+            .annotate(distance_km=haversine_expression(lat, lng))
+            .filter(distance_km__lte=radius)
+            .order_by("distance_km", "start_datetime", "id")[:limit]
+        )
+        scrimmages = list(qs)
+        data = self.get_serializer(scrimmages, many=True).data
+        for row, scrim in zip(data, scrimmages):
+            row["distance_km"] = round(scrim.distance_km, 2)
+        return Response(data)
+
+    # ----------------------------
+    # Full-text search (FTS5 / tsvector index)
+    # ----------------------------
+
+    @action(detail=False, methods=["get"])
+    def search(self, request):
+        """
+        Scrimmages matching ?q= in title, description, category or type,
+        best match first. Accepts the regular browse filters and ?limit= (max 100).
+        """
+        text = request.query_params.get("q", "").strip()
+        if not text:
+            raise ValidationError({"q": "A search term is required."})
+        try:
+            limit = int(request.query_params.get("limit", 20))
+        except ValueError:
+            raise ValidationError({"limit": "Must be a number."})
+        limit = max(1, min(limit, 100))
+
+        qs = search_scrimmages(self.filter_queryset(self.get_queryset()), text)
+        scrimmages = list(qs.order_by("-search_rank", "start_datetime", "id")[:limit])
+        data = self.get_serializer(scrimmages, many=True).data
+        for row, scrim in zip(data, scrimmages):
+            row["search_rank"] = round(scrim.search_rank, 4)
+        return Response(data)
+
+    # ----------------------------
+    # Calendar window (concrete + virtual recurring occurrences)
+    # ----------------------------
+
+    CALENDAR_MAX_DAYS = 366
+
+    @action(detail=False, methods=["get"])
+    def calendar(self, request):
+        """
+        Scrimmages starting in [?start=, ?end=) (ISO dates, at most a year),
+        merged with not-yet-materialized occurrences of recurring series.
+        Accepts ?category=, ?scrimmage_type=, ?group= and ?limit= (max 1000).
+        Virtual rows have "id": null and an "occurrence" key to RSVP with.
+        """
+        try:
+            start = date.fromisoformat(request.query_params["start"])
+            end = date.fromisoformat(request.query_params["end"])
+            limit = int(request.query_params.get("limit", 200))
+        except KeyError:
+            raise ValidationError("start and end are required.")
+        except ValueError:
+            raise ValidationError("start/end must be ISO dates and limit a number.")
+        if not start < end <= start + timedelta(days=self.CALENDAR_MAX_DAYS):
+            raise ValidationError(f"end must be after start and at most {self.CALENDAR_MAX_DAYS} days later.")
+        limit = max(1, min(limit, 1000))
+
+        tz = timezone.get_current_timezone()
+        window_start = timezone.make_aware(datetime.combine(start, time.min), tz)
+        window_end = timezone.make_aware(datetime.combine(end, time.min), tz)
+
+        concrete = list(
+            self.filter_queryset(self.get_queryset())
+            .filter(start_datetime__gte=window_start, start_datetime__lt=window_end)
+            .order_by("start_datetime", "id")[:limit]
+        )
+
+        # Series templates the viewer can see; their future dates are expanded in memory
+        templates = self.queryset.select_related("recurrence_rule").filter(
+            recurrence_rule__active=True,
+            recurrence_rule__start_date__lt=end,
+        ).filter(
+            Q(recurrence_rule__end_date__isnull=True) | Q(recurrence_rule__end_date__gte=start)
+        ).exclude(status__in=HIDDEN_TEMPLATE_STATUSES)
+        for name in ("category", "scrimmage_type", "group"):
+            value = request.query_params.get(name)
+            if value and value.isdigit():
+                templates = templates.filter(**{f"{name}_id": int(value)})
+        if request.user.is_authenticated:
+            templates = visible_scrimmages(request.user, templates)
+        else:
+            templates = templates.filter(visibility="public")
+        virtual = virtual_occurrences(list(templates), start, end)
+        for occ in virtual:
+            occ.viewer_rsvp_status = None
+
+        rows = sorted(
+            [(s.start_datetime, 0, s.pk, s) for s in concrete]
+            + [(o.start_datetime, 1, o.recurrence_series_id, o) for o in virtual],
+            key=lambda row: row[:3],
+        )[:limit]
+
+        # Unsaved occurrences have no nested collections to expand
+        virtual_context = {**self.get_serializer_context(), "expand": []}
+        data = []
+        for _, is_virtual, _, scrim in rows:
+            context = virtual_context if is_virtual else self.get_serializer_context()
+            item = self.get_serializer(scrim, context=context).data
+            item["virtual"] = bool(is_virtual)
+            item["occurrence"] = (
+                occurrence_key(scrim.recurrence_series_id, scrim.occurrence_date)
+                if scrim.recurrence_series_id
+                else None
+            )
+            data.append(item)
+        return Response(data)
+
     # ----------------------------
     # RSVP Flow (Safe Payment Logic)
     # ----------------------------
 
     @action(detail=True, methods=["post"], permission_classes=[RSVPWritePermission])
+    @idempotent
     def rsvp(self, request, pk=None):
         """RSVP or update attendance."""
-        scrim = self.get_object()
+        return self._rsvp(request, self.get_object())
+
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    @idempotent
+    def occurrence_rsvp(self, request):
+        """
+        RSVP to a (possibly virtual) occurrence of a recurring series:
+        {"occurrence": "<rule id>:<YYYY-MM-DD>", ...rsvp fields}. The
+        occurrence becomes a real scrimmage on first RSVP.
+        """
+        try:
+            rule_id, day = parse_occurrence_key(request.data.get("occurrence"))
+        except ValueError:
+            raise ValidationError({"occurrence": "Expected '<rule id>:<YYYY-MM-DD>'."})
+        template = (
+            visible_scrimmages(request.user, Scrimmage.objects.select_related("recurrence_rule"))
+            .filter(recurrence_rule__pk=rule_id)
+            .exclude(status__in=HIDDEN_TEMPLATE_STATUSES)
+            .first()
+        )
+        if template is None:
+            return Response({"error": "Series not found."}, status=404)
+        try:
+            scrim = materialize_occurrence(template.recurrence_rule, day)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=404)
+        return self._rsvp(request, scrim)
+
+    def _rsvp(self, request, scrim):
         user = request.user
         data = request.data.copy()
         data["scrimmage"] = scrim.id
@@ -184,24 +560,30 @@ class ScrimmageViewSet(viewsets.ModelViewSet):
         if desired_status:
             data["status"] = desired_status
 
-        # Upsert RSVP
-        rsvp, created = ScrimmageRSVP.objects.get_or_create(scrimmage=scrim, user=user)
-        serializer = ScrimmageRSVPSerializer(rsvp, data=data, partial=True, context={"request": request})
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-
-        # Waitlist handling: demote to waitlist if confirmed going but no spots left
-        if scrim.spots_left <= 0 and scrim.waitlist_enabled and serializer.instance.status == "going":
-            serializer.instance.status = "waitlisted"
-            serializer.instance.save(update_fields=["status"])
+        # Upsert RSVP in one commit, together with its outbox events
+        # (calendar entry, notifications) and counter updates.
+        # Seat admission is decided atomically on save: "going" is only
+        # granted if a seat is free, otherwise the RSVP is waitlisted.
+        with transaction.atomic():
+            rsvp, created = ScrimmageRSVP.objects.get_or_create(scrimmage=scrim, user=user)
+            serializer = ScrimmageRSVPSerializer(rsvp, data=data, partial=True, context={"request": request})
+            serializer.is_valid(raise_exception=True)
+            try:
+                # RSVP.save runs in a savepoint: a full scrimmage keeps the row as it was
+                serializer.save()
+            except ScrimmageFull as exc:
+                return Response({"error": exc.message}, status=status.HTTP_409_CONFLICT)
 
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     @action(detail=True, methods=["get"], permission_classes=[AllowAny])
     def rsvps(self, request, pk=None):
-        scrim = self.get_object()
-        rsvps = scrim.rsvps.all().select_related("user")
-        return Response(ScrimmageRSVPSerializer(rsvps, many=True).data)
+        def render():
+            scrim = self.get_object()
+            rsvps = scrim.rsvps.all().select_related("user")
+            return Response(ScrimmageRSVPSerializer(rsvps, many=True).data)
+
+        return self._conditional_response(request, "rsvps", render)
 
     @action(detail=True, methods=["post"], permission_classes=[RSVPWritePermission])
     def feedback(self, request, pk=None):
@@ -215,17 +597,11 @@ class ScrimmageViewSet(viewsets.ModelViewSet):
         feedback = request.data.get("feedback")
         validate_rsvp_data({"rating": rating})
 
-        rsvp.rating = rating
+        # Scrimmage rating aggregates follow incrementally on save
+        rsvp.rating = int(rating) if rating not in (None, "") else None
         rsvp.feedback = feedback
         rsvp.save(update_fields=["rating", "feedback"])
 
-        # Update scrimmage rating average
-        ratings = scrim.rsvps.filter(rating__isnull=False).values_list("rating", flat=True)
-        if ratings:
-            scrim.rating_count = len(ratings)
-            scrim.rating_avg = sum(ratings) / scrim.rating_count
-            scrim.save(update_fields=["rating_avg", "rating_count"])
-
         return Response({"success": "Feedback submitted."})
 
     @action(detail=True, methods=["get"], permission_classes=[AllowAny])
@@ -237,18 +613,132 @@ class ScrimmageViewSet(viewsets.ModelViewSet):
 
     @action(detail=True, methods=["post"], permission_classes=[MediaUploadPermission])
     def upload_media(self, request, pk=None):
-        """Upload new media with file size validation."""
+        """Upload new media with quota validation."""
         scrim = self.get_object()
         user = request.user
-        file_size = int(request.data.get("file_size", 0))
-
-        validate_media_upload(user, scrim, file_size)
         serializer = ScrimmageMediaSerializer(data=request.data, context={"request": request})
         serializer.is_valid(raise_exception=True)
-        serializer.save(scrimmage=scrim)
+
+        # Size of the stored file, not what the client claims
+        media = serializer.validated_data["media"]
+        try:
+            file_size = media.file.size if media.file else int(request.data.get("file_size", 0))
+        except (TypeError, ValueError):
+            raise ValidationError({"file_size": "Must be a number of bytes."})
+        if file_size < 0:
+            raise ValidationError({"file_size": "Must be a number of bytes."})
+
+        # Cheap ledger read first; the save below re-checks atomically
+        try:
+            validate_media_upload(user, scrim, file_size)
+        except MediaQuotaExceeded as exc:
+            raise ValidationError(exc.messages)
+        try:
+            with transaction.atomic():
+                relation = serializer.save(content_object=scrim, file_size=file_size)
+                ScrimmageMedia.objects.create(
+                    scrimmage=scrim,
+                    uploader=user,
+                    media=relation.media,
+                    caption=relation.caption,
+                    approved=relation.approved,
+                    file_size=file_size,
+                )
+        except MediaQuotaExceeded as exc:
+            raise ValidationError(exc.messages)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    # ----------------------------
+    # Resumable chunked uploads (see uploads.py)
+    # ----------------------------
+
+    @action(detail=True, methods=["post"], permission_classes=[MediaUploadPermission])
+    def uploads(self, request, pk=None):
+        """
+        Start a chunked upload: {"filename", "total_size", "content_type"}.
+        Then PUT raw chunks to uploads/<upload_id>/ with ?offset=<bytes>,
+        and POST uploads/<upload_id>/complete/ to attach the media.
+        """
+        scrim = self.get_object()
+        try:
+            total_size = int(request.data.get("total_size"))
+        except (TypeError, ValueError):
+            raise ValidationError({"total_size": "Must be a number of bytes."})
+        try:
+            session = start_upload(
+                scrim,
+                request.user,
+                str(request.data.get("filename") or ""),
+                total_size,
+                str(request.data.get("content_type") or ""),
+            )
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.messages)
+        return Response(self._upload_state(session), status=status.HTTP_201_CREATED)
+
+    @action(
+        detail=True,
+        methods=["get", "put"],
+        url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})",
+        permission_classes=[MediaUploadPermission],
+    )
+    def upload_chunk(self, request, pk=None, upload_id=None):
+        """GET: how much has been received (to resume). PUT: append a raw chunk."""
+        session = self._upload_session(upload_id)
+        if request.method == "GET":
+            return Response(self._upload_state(session))
+        try:
+            offset = int(request.query_params.get("offset", session.received_bytes))
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            raise ValidationError("offset and Content-Length must be numbers.")
+        try:
+            # Read the body straight off the socket; request.data is never parsed
+            session = append_chunk(session, offset, request.stream, length)
+        except UploadOffsetMismatch as exc:
+            return Response(
+                {"error": exc.messages[0], "received_bytes": exc.received_bytes},
+                status=status.HTTP_409_CONFLICT,
+            )
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.messages)
+        return Response(self._upload_state(session))
+
+    @action(
+        detail=True,
+        methods=["post"],
+        url_path=r"uploads/(?P<upload_id>[0-9a-f-]{36})/complete",
+        permission_classes=[MediaUploadPermission],
+    )
+    def complete_upload(self, request, pk=None, upload_id=None):
+        """Finish a chunked upload and attach it to the scrimmage gallery."""
+        session = self._upload_session(upload_id)
+        try:
+            relation, _, deduplicated = finalize_upload(session, str(request.data.get("caption") or ""))
+        except DjangoValidationError as exc:
+            raise ValidationError(exc.messages)
+        data = ScrimmageMediaSerializer(relation, context={"request": request}).data
+        data["deduplicated"] = deduplicated
+        return Response(data, status=status.HTTP_201_CREATED)
+
+    def _upload_session(self, upload_id):
+        scrim = self.get_object()
+        try:
+            return MediaUploadSession.objects.get(pk=upload_id, scrimmage=scrim, uploader=self.request.user)
+        except MediaUploadSession.DoesNotExist:
+            raise NotFound("Upload not found.")
+
+    @staticmethod
+    def _upload_state(session):
+        return {
+            "upload_id": str(session.pk),
+            "status": session.status,
+            "total_size": session.total_size,
+            "received_bytes": session.received_bytes,
+            "max_chunk_size": max_chunk_size(),
+        }
+
     @action(detail=True, methods=["post"], permission_classes=[IsHostOrAdmin])
     def cancel(self, request, pk=None):
         """Cancel scrimmage and trigger refunds if applicable."""
@@ -277,6 +767,48 @@ class ScrimmageViewSet(viewsets.ModelViewSet):
         rsvp.save(update_fields=["status", "checked_in_at"])
         return Response({"success": f"{rsvp.user} checked in."})
 
+    BULK_CHECK_IN_LIMIT = 1000
+
+    @action(detail=True, methods=["post"], permission_classes=[IsHostOrAdmin])
+    def bulk_check_in(self, request, pk=None):
+        """
+        Check in a batch of arrivals: {"user_ids": [...], "tokens": [...]}.
+        Returns one outcome per submitted entry; replays are idempotent.
+        """
+        scrim = self.get_object()
+        user_ids = request.data.get("user_ids") or []
+        tokens = request.data.get("tokens") or []
+        if not isinstance(user_ids, list) or not isinstance(tokens, list):
+            raise ValidationError("user_ids and tokens must be lists.")
+        if not user_ids and not tokens:
+            raise ValidationError("Provide user_ids or tokens.")
+        if len(user_ids) + len(tokens) > self.BULK_CHECK_IN_LIMIT:
+            raise ValidationError(f"At most {self.BULK_CHECK_IN_LIMIT} entries per request.")
+        try:
+            user_ids = [int(uid) for uid in user_ids]
+        except (TypeError, ValueError):
+            raise ValidationError({"user_ids": "Must be a list of ids."})
+
+        entries = [{"user_id": uid} for uid in user_ids]
+        for token in tokens:
+            entries.append({"token": token, "user_id": read_check_in_token(token, scrim.id)})
+
+        outcomes = bulk_check_in(scrim, [e["user_id"] for e in entries if e["user_id"] is not None])
+        summary = {}
+        for entry in entries:
+            uid = entry["user_id"]
+            entry["outcome"] = INVALID_TOKEN if uid is None else outcomes[uid]
+            summary[entry["outcome"]] = summary.get(entry["outcome"], 0) + 1
+        return Response({"results": entries, "summary": summary})
+
+    @action(detail=True, methods=["get"], permission_classes=[IsAuthenticated])
+    def check_in_token(self, request, pk=None):
+        """Signed token (for a QR code) the caller shows at the door."""
+        scrim = self.get_object()
+        if not ScrimmageRSVP.objects.filter(scrimmage=scrim, user=request.user).exists():
+            return Response({"error": "You have not RSVP'd for this scrimmage."}, status=400)
+        return Response({"token": make_check_in_token(scrim.id, request.user.id)})
+
 
 # ============================================================
 # ✅ Media ViewSet
@@ -0,0 +1,76 @@
+# scrimmages/waitlist.py
+"""
+Set-based waitlist promotion.
+
+When seats free up, the oldest waitlisted RSVPs are moved to "going" in
+one UPDATE and the counters follow with one F() update, instead of saving
+(and signalling) each RSVP. Calendar entries and notifications for
+everyone promoted are one outbox event ("rsvps_promoted"), written in the
+same transaction.
+"""
+from django.db import transaction
+from django.db.models import F
+
+from . import cache
+from .counters import apply_status_change, seats_taken_expression
+from .models import Scrimmage, ScrimmageRSVP
+from .outbox import enqueue
+
+
+def _free_seats(scrimmage_id):
+    """(free seats, waitlisted count) from the stored counters."""
+    row = (
+        Scrimmage.objects.filter(pk=scrimmage_id)
+        .annotate(taken=seats_taken_expression())
+        .values("max_participants", "taken", "waitlisted_count")
+        .first()
+    )
+    if row is None:
+        return 0, 0
+    return max(row["max_participants"] - row["taken"], 0), row["waitlisted_count"]
+
+
+def promote_waitlisted(scrimmage_id, limit=None):
+    """
+    Promote the oldest waitlisted RSVPs into the free seats.
+    Returns the list of (rsvp_id, user_id) promoted.
+    """
+    free, waiting = _free_seats(scrimmage_id)
+    if not free or not waiting:
+        return []
+
+    with transaction.atomic():
+        # Take the scrimmage row's write lock first (admissions and other
+        # promotions queue behind it), then re-read the seats under it.
+        Scrimmage.objects.filter(pk=scrimmage_id).update(rsvp_version=F("rsvp_version") + 1)
+        free, waiting = _free_seats(scrimmage_id)
+        if limit is not None:
+            free = min(free, limit)
+        if not free or not waiting:
+            return []
+
+        candidates = list(
+            ScrimmageRSVP.objects.filter(scrimmage_id=scrimmage_id, status="waitlisted")
+            .order_by("created_at", "id")
+            .values_list("pk", "user_id")[:free]
+        )
+        # Rows cancelled since the read are skipped by the status guard;
+        # the counters move by exactly the number of rows updated.
+        promoted_count = ScrimmageRSVP.objects.filter(
+            pk__in=[pk for pk, _ in candidates], status="waitlisted"
+        ).update(status="going")
+        if promoted_count != len(candidates):
+            promoted_ids = set(
+                ScrimmageRSVP.objects.filter(
+                    pk__in=[pk for pk, _ in candidates], status="going"
+                ).values_list("pk", flat=True)
+            )
+            candidates = [(pk, user_id) for pk, user_id in candidates if pk in promoted_ids]
+        if candidates:
+            apply_status_change(scrimmage_id, "waitlisted", "going", count=len(candidates))
+            enqueue("rsvps_promoted", scrimmage_id, user_ids=[user_id for _, user_id in candidates])
+
+    if candidates:
+        visibility = Scrimmage.objects.filter(pk=scrimmage_id).values_list("visibility", flat=True).first()
+        cache.invalidate(scrimmage_id, listings=visibility == "public")
+    return candidates
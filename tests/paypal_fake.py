@@ -0,0 +1,176 @@
+# tests/paypal_fake.py
+"""
+Offline stand-in for PayPal's webhook signing, for tests and benchmarks.
+
+``FakePayPal`` generates a throwaway RSA key and self-signed certificate
+and serves, on 127.0.0.1:
+
+- GET  /certs/<name>                                  the signing certificate
+- POST /v1/notifications/verify-webhook-signature     the remote check
+
+``sign(body)`` returns the PAYPAL-* headers of a delivery, and
+``settings()`` the overrides that point payments.paypal at the fake.
+Request counts are kept in ``cert_fetches`` and ``remote_checks``.
+
+    with FakePayPal() as paypal, override_settings(**paypal.settings()):
+        headers = paypal.sign(body)
+
+Requires ``cryptography``.
+"""
+import base64
+import json
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography import x509
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding, rsa
+from cryptography.x509.oid import NameOID
+
+from payments.paypal import signed_message
+
+WEBHOOK_ID = "WH-FAKE-PAYPAL"
+
+
+def _self_signed(key, days=1):
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "messageverificationcerts.fake.paypal")])
+    now = datetime.now(dt_timezone.utc)
+    return (
+        x509.CertificateBuilder()
+        .subject_name(name)
+        .issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - timedelta(minutes=5))
+        .not_valid_after(now + timedelta(days=days))
+        .sign(key, hashes.SHA256())
+    )
+
+
+class FakePayPal:
+    def __init__(self, webhook_id=WEBHOOK_ID):
+        self.webhook_id = webhook_id
+        self.key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        self.cert_pem = _self_signed(self.key).public_bytes(serialization.Encoding.PEM)
+        self.cert_name = f"cert-{uuid.uuid4().hex}.pem"
+        self.cert_fetches = 0
+        self.remote_checks = 0
+        self._signed = {}  # transmission id -> body, as PayPal knows what it sent
+        self._lock = threading.Lock()
+        self._server = None
+
+    # ----------------------------
+    # Server
+    # ----------------------------
+
+    def start(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like PayPal
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, body, content_type):
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path != f"/certs/{fake.cert_name}":
+                    return self._send(404, b"", "text/plain")
+                with fake._lock:
+                    fake.cert_fetches += 1
+                self._send(200, fake.cert_pem, "application/x-pem-file")
+
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+                if self.path != "/v1/notifications/verify-webhook-signature":
+                    return self._send(404, b"", "text/plain")
+                with fake._lock:
+                    fake.remote_checks += 1
+                ok = fake.check(json.loads(body))
+                status = "SUCCESS" if ok else "FAILURE"
+                self._send(200, json.dumps({"verification_status": status}).encode(), "application/json")
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    @property
+    def cert_url(self):
+        return f"{self.base_url}/certs/{self.cert_name}"
+
+    def settings(self):
+        return {
+            "PAYPAL_API_BASE": self.base_url,
+            "PAYPAL_CERT_URL_PREFIXES": (f"{self.base_url}/certs/",),
+            "PAYPAL_WEBHOOK_ID": self.webhook_id,
+            "PAYPAL_CLIENT_ID": "fake-client",
+            "PAYPAL_CLIENT_SECRET": "fake-secret",
+        }
+
+    # ----------------------------
+    # Signing
+    # ----------------------------
+
+    def sign(self, body, transmission_id=None, transmission_time=None):
+        """PAYPAL-* headers for delivering ``body`` (bytes)."""
+        transmission_id = transmission_id or str(uuid.uuid4())
+        transmission_time = transmission_time or datetime.now(dt_timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+        self._signed[transmission_id] = body
+        signature = self.key.sign(
+            signed_message(transmission_id, transmission_time, self.webhook_id, body),
+            padding.PKCS1v15(),
+            hashes.SHA256(),
+        )
+        return {
+            "PAYPAL-AUTH-ALGO": "SHA256withRSA",
+            "PAYPAL-CERT-URL": self.cert_url,
+            "PAYPAL-TRANSMISSION-ID": transmission_id,
+            "PAYPAL-TRANSMISSION-SIG": base64.b64encode(signature).decode(),
+            "PAYPAL-TRANSMISSION-TIME": transmission_time,
+        }
+
+    def check(self, payload):
+        """The remote API's answer for a verify-webhook-signature payload."""
+        body = self._signed.get(payload.get("transmission_id"))
+        if body is None or json.loads(body) != payload.get("webhook_event"):
+            return False
+        try:
+            self.key.public_key().verify(
+                base64.b64decode(payload.get("transmission_sig") or ""),
+                signed_message(
+                    payload.get("transmission_id"), payload.get("transmission_time"), payload.get("webhook_id"), body
+                ),
+                padding.PKCS1v15(),
+                hashes.SHA256(),
+            )
+        except (InvalidSignature, ValueError):
+            return False
+        return True
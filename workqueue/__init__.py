@@ -0,0 +1,14 @@
+# workqueue/__init__.py
+"""
+Database-backed work queues shared by the apps' background workers
+(scrimmage outbox, media renditions, notification broadcasts, payment
+webhooks).
+
+Not a Django app: there are no models here. Each app keeps its own queue
+table and wraps it in a ``WorkQueue``; its worker command subclasses
+``WorkerCommand``.
+"""
+from .commands import WorkerCommand
+from .queue import ClaimLost, WorkQueue
+
+__all__ = ["ClaimLost", "WorkQueue", "WorkerCommand"]
@@ -0,0 +1,39 @@
+# workqueue/commands.py
+import time
+
+from django.core.management.base import BaseCommand
+
+
+class WorkerCommand(BaseCommand):
+    """
+    Worker loop for a queue: ``process(batch_size)`` runs one batch and
+    returns its counts. Repeats until interrupted, sleeping while nothing
+    is due, or stops after one batch with --once. ``prepare`` runs first
+    (purges, backfills).
+    """
+    batch_size = 50
+    sleep = 1.0
+    summary = ""  # formatted with the counts of each non-empty batch
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=self.batch_size)
+        parser.add_argument("--sleep", type=float, default=self.sleep, help="Seconds to wait when nothing is due.")
+        parser.add_argument("--once", action="store_true", help="Process one batch and exit.")
+
+    def prepare(self, options):
+        pass
+
+    def process(self, batch_size):
+        raise NotImplementedError
+
+    def handle(self, *args, **options):
+        self.prepare(options)
+        while True:
+            counts = self.process(options["batch_size"])
+            if any(counts.values()):
+                self.stdout.write(self.summary.format(**counts))
+            if options["once"]:
+                break
+            if not any(counts.values()):
+                time.sleep(options["sleep"])
+        self.stdout.write(self.style.SUCCESS("Done."))
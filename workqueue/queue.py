@@ -0,0 +1,190 @@
+# workqueue/queue.py
+"""
+Claim-by-stamp queue over a model table.
+
+The model needs ``status``, ``attempts`` and ``claimed_at`` columns, plus
+``available_at`` when retries back off. A worker:
+
+1. picks the ids of due rows ("pending" and available, or "processing"
+   but claimed longer than ``claim_timeout`` ago by a worker that died)
+2. claims them with one UPDATE that stamps ``claimed_at`` and counts the
+   attempt, then re-reads the rows carrying its own stamp
+3. applies each row in its own transaction
+
+Every later write is guarded by the stamp (``status="processing"`` and
+the ``claimed_at`` we set). A worker that stalled past ``claim_timeout``
+finds its row reclaimed: its result is rolled back and the new owner's
+outcome stands, so a row is never applied twice or marked done by a
+worker that no longer owns it.
+
+Failures are retried with exponential backoff and given the terminal
+``dead`` status after ``max_attempts``.
+"""
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+
+class ClaimLost(Exception):
+    """Another worker reclaimed the row; this worker's result is discarded."""
+
+
+class WorkQueue:
+    claim_timeout = timedelta(minutes=5)
+    backoff_base = timedelta(seconds=5)
+    max_backoff = timedelta(hours=1)
+
+    def __init__(
+        self,
+        model,
+        *,
+        max_attempts,
+        done="done",
+        dead="failed",
+        label=None,
+        ordering=("id",),
+        select_related=(),
+        error_field="last_error",
+        processed_field="processed_at",
+        due_field="available_at",
+        claim_timeout=None,
+    ):
+        """
+        ``max_attempts`` is an int or a callable (read per batch, so it can
+        follow settings). ``done`` and ``dead`` are the model's success and
+        terminal failure statuses. Pass ``due_field=None`` for a table
+        without ``available_at``: failures are then retried on the next
+        batch, without backoff.
+        """
+        self.model = model
+        self._max_attempts = max_attempts
+        self.done = done
+        self.dead = dead
+        self.label = label or model._meta.verbose_name.capitalize()
+        self.ordering = tuple(ordering)
+        self.select_related = tuple(select_related)
+        self.error_field = error_field
+        self.processed_field = processed_field
+        self.due_field = due_field
+        if claim_timeout is not None:
+            self.claim_timeout = claim_timeout
+
+    @property
+    def max_attempts(self):
+        return self._max_attempts() if callable(self._max_attempts) else self._max_attempts
+
+    def counts(self):
+        return {self.done: 0, "retry": 0, self.dead: 0}
+
+    def backoff(self, attempts):
+        return min(self.backoff_base * 2 ** attempts, self.max_backoff)
+
+    # ----------------------------
+    # Claiming
+    # ----------------------------
+
+    def claimable(self, now):
+        pending = Q(status="pending")
+        if self.due_field:
+            pending &= Q(**{f"{self.due_field}__lte": now})
+        return pending | Q(status="processing", claimed_at__lt=now - self.claim_timeout)
+
+    def eligible(self, queryset, now):
+        """Hook: narrow the claimable rows further (e.g. ordering rules)."""
+        return queryset
+
+    def claim(self, limit, pks=None):
+        """Claim up to ``limit`` due rows (only among ``pks``, if given)."""
+        now = timezone.now()
+        claimable = self.claimable(now)
+        candidates = self.eligible(self.model.objects.filter(claimable), now)
+        if pks is not None:
+            candidates = candidates.filter(pk__in=pks)
+        ids = list(candidates.order_by(*self.ordering).values_list("pk", flat=True)[:limit])
+        if not ids:
+            return []
+        # The stamp separates our rows from ones another worker claimed meanwhile
+        self.model.objects.filter(claimable, pk__in=ids).update(
+            status="processing", claimed_at=now, attempts=F("attempts") + 1
+        )
+        claimed = self.model.objects.filter(pk__in=ids, status="processing", claimed_at=now)
+        if self.select_related:
+            claimed = claimed.select_related(*self.select_related)
+        return list(claimed.order_by(*self.ordering))
+
+    def _owned(self, item):
+        return self.model.objects.filter(pk=item.pk, status="processing", claimed_at=item.claimed_at)
+
+    # ----------------------------
+    # Outcomes (all guarded by the claim)
+    # ----------------------------
+
+    def complete(self, item, **fields):
+        """Mark ``item`` done. Returns False if another worker reclaimed it."""
+        fields.update(status=self.done, **{self.error_field: ""})
+        if self.processed_field:
+            fields[self.processed_field] = timezone.now()
+        return bool(self._owned(item).update(**fields))
+
+    def fail(self, item, error):
+        """
+        Record a failed attempt: back off and retry, or give up after
+        ``max_attempts``. Returns the outcome ("retry" or the dead status),
+        or None if another worker reclaimed the row.
+        """
+        if isinstance(error, BaseException):
+            error = f"{error.__class__.__name__}: {error}"
+        max_length = self.model._meta.get_field(self.error_field).max_length
+        dead = item.attempts >= self.max_attempts
+        fields = {"status": self.dead if dead else "pending", self.error_field: error[:max_length]}
+        if self.due_field:
+            fields[self.due_field] = timezone.now() + self.backoff(item.attempts)
+        if not self._owned(item).update(**fields):
+            return None
+        return self.dead if dead else "retry"
+
+    def release(self, item):
+        """Put a claimed row back untouched, without spending an attempt."""
+        return bool(self._owned(item).update(status="pending", attempts=F("attempts") - 1))
+
+    # ----------------------------
+    # Processing
+    # ----------------------------
+
+    def run(self, item, apply):
+        """
+        Apply one claimed row in its own transaction. Returns the outcome
+        (the done status, "retry", the dead status) or None if the claim
+        was lost, in which case ``apply``'s writes are rolled back.
+        """
+        try:
+            with transaction.atomic():
+                apply(item)
+                if not self.complete(item):
+                    raise ClaimLost
+            return self.done
+        except ClaimLost:
+            logger.warning("%s %s was reclaimed by another worker; result discarded", self.label, item.pk)
+            return None
+        except Exception as exc:
+            logger.exception("%s %s failed", self.label, item.pk)
+            return self.fail(item, exc)
+
+    def process(self, limit, apply, pks=None):
+        """Claim and apply one batch. Returns the outcome counts."""
+        counts = self.counts()
+        for item in self.claim(limit, pks):
+            outcome = self.run(item, apply)
+            if outcome:
+                counts[outcome] += 1
+        return counts
+
+    def purge_done(self, older_than=timedelta(days=7)):
+        return self.model.objects.filter(
+            status=self.done, **{f"{self.processed_field}__lt": timezone.now() - older_than}
+        ).delete()[0]